@@ -0,0 +1,584 @@
+"""
+Batch execution through the OpenAI Batch API.
+
+For latency-insensitive bulk runs (the nightly ingest): research and topic
+selection run synchronously (they need live web search), then the draft,
+edit and SEO calls for every movie go through the Batch API stage by stage.
+A request never waits on the Batch API: {"topics": [...]} submits the first
+stage and returns a job id; {"batch_job": id} (or GET ?batch_tick=1, which
+advances every job, from a scheduler) collects a finished stage, submits the
+next, and after the last persists the posts and returns them. Job state
+lives in the OpenAI Files API, so any invocation can pick a job up.
+AGENT_BATCH_BASE_URL points the batch client at a local stand-in (see
+_tools.py serve-batch-stub).
+
+Request building and parsing come from the pipeline nodes in research.py,
+which imports this module for its handler.
+"""
+
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from openai import OpenAI
+
+import _persist
+import research
+
+logger = logging.getLogger("research-agent")
+logger.info("[Batch] 📦 Setting up batch execution mode...")
+
+BATCH_TIMEOUT_S = float(os.getenv("AGENT_BATCH_TIMEOUT_S", str(24 * 3600)))  # per stage
+BATCH_MAX_REQUESTS = int(os.getenv("AGENT_BATCH_MAX_REQUESTS", "50000"))
+BATCH_MAX_TOPICS = int(os.getenv("AGENT_BATCH_MAX_TOPICS", "200"))
+BATCH_TERMINAL_STATES = ("completed", "failed", "expired", "cancelled")
+BATCH_RESULT_TTL_S = float(os.getenv("AGENT_BATCH_RESULT_TTL_S", str(7 * 86400)))
+BATCH_JOB_PREFIX = "agent-batch-job-"
+BATCH_SAVE_RETRIES = int(os.getenv("AGENT_BATCH_SAVE_RETRIES", "3"))
+BATCH_SAVE_BACKOFF_S = float(os.getenv("AGENT_BATCH_SAVE_BACKOFF_S", "0.5"))
+BATCH_STAGES = (
+    ("draft", "/v1/responses"),
+    ("edit", "/v1/chat/completions"),
+    ("seo_generator", "/v1/chat/completions"),
+)
+# Per-movie fields a stored job carries between stages
+BATCH_JOB_STATE_KEYS = (
+    "topic",
+    "selected_topics",
+    "drafts",
+    "sources",
+    "finals",
+    "posts",
+    "edit_fast_path",
+)
+
+
+def batch_client():
+    """Un-traced OpenAI client for file uploads and batch jobs"""
+    base_url = os.getenv("AGENT_BATCH_BASE_URL") or None
+    return OpenAI(api_key=research.openai_api_key or "local-batch", base_url=base_url)
+
+
+def _response_output_text(body):
+    """Concatenate output_text parts of a raw Responses API body"""
+    if "output_text" in body:
+        return body["output_text"]
+    texts = []
+    for item in body.get("output", []):
+        if item.get("type") != "message":
+            continue
+        for part in item.get("content", []):
+            if part.get("type") == "output_text":
+                texts.append(part.get("text", ""))
+    return "".join(texts)
+
+
+class BatchRunner:
+    def __init__(self, client, timeout=None):
+        self.client = client
+        self.timeout = BATCH_TIMEOUT_S if timeout is None else timeout
+
+    def submit(self, endpoint, requests, node, metadata=None, submitted=None):
+        """
+        Upload [(custom_id, body)] and create its batch(es); returns the batch ids.
+
+        Each id is appended to submitted as soon as its batch exists, and
+        chunks already listed there are not sent again, so a submit that
+        failed halfway resumes where it stopped.
+        """
+        chunks = [
+            requests[i : i + BATCH_MAX_REQUESTS]
+            for i in range(0, len(requests), BATCH_MAX_REQUESTS)
+        ]
+        batch_ids = submitted if submitted is not None else []
+        for chunk in chunks[len(batch_ids) :]:
+            batch_ids.append(self._submit(endpoint, chunk, metadata))
+        logger.info(
+            f"[Batch] 📤 {node}: submitted {len(requests)} requests in {len(batch_ids)} batch(es)"
+        )
+        run = research.current_run()
+        if run:
+            run.count(f"batch.{node}.requests", len(requests))
+        return batch_ids
+
+    def statuses(self, batch_ids):
+        """{batch_id: status}"""
+        return {batch_id: self.client.batches.retrieve(batch_id).status for batch_id in batch_ids}
+
+    def cancel(self, batch_ids):
+        for batch_id in batch_ids:
+            try:
+                self.client.batches.cancel(batch_id)
+            except Exception as e:
+                logger.warning(f"[Batch] ⚠️ Could not cancel batch {batch_id}: {e}")
+
+    def collect(self, batch_ids, custom_ids, node):
+        """
+        Read the output of finished batches.
+
+        Returns {custom_id: response body}; failed requests map to None.
+        """
+        results = {custom_id: None for custom_id in custom_ids}
+        for batch_id in batch_ids:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status != "completed":
+                logger.error(f"[Batch] 💥 Batch {batch.id} ended with status '{batch.status}'")
+            results.update(self._collect(batch, node))
+
+        failed = sum(1 for body in results.values() if body is None)
+        logger.info(f"[Batch] ✅ {node}: {len(results) - failed}/{len(results)} succeeded")
+        run = research.current_run()
+        if run:
+            run.count(f"batch.{node}.failed", failed)
+        return results
+
+    def _submit(self, endpoint, chunk, metadata=None):
+        lines = [
+            json.dumps({"custom_id": custom_id, "method": "POST", "url": endpoint, "body": body})
+            for custom_id, body in chunk
+        ]
+        upload = self.client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=upload.id,
+            endpoint=endpoint,
+            completion_window="24h",
+            **({"metadata": metadata} if metadata else {}),
+        )
+        logger.debug(f"[Batch] 📤 Created batch {batch.id} ({len(chunk)} requests)")
+        return batch.id
+
+    def _collect(self, batch, node):
+        results = {}
+        run = research.current_run()
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = self.client.files.content(file_id).text
+            for line in content.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                body = response.get("body") or {}
+                if response.get("status_code") != 200:
+                    logger.warning(
+                        f"[Batch] ⚠️ {record.get('custom_id')} failed: {record.get('error') or body.get('error')}"
+                    )
+                    continue
+
+                results[record["custom_id"]] = body
+                if run:
+                    usage = body.get("usage") or {}
+                    run.record_call(
+                        node=node,
+                        model=body.get("model", ""),
+                        latency_ms=0,
+                        ok=True,
+                        attempt=1,
+                        batch=True,
+                        input_tokens=usage.get("input_tokens", usage.get("prompt_tokens", 0)),
+                        output_tokens=usage.get(
+                            "output_tokens", usage.get("completion_tokens", 0)
+                        ),
+                    )
+        return results
+
+
+def _select_and_search(state):
+    state.update(research.select_topics_node(state))
+    if research.DRAFT_SEARCH == "shared" and state.get("selected_research"):
+        state["shared_context"] = research.shared_draft_search(
+            state["topic"], state["selected_research"]
+        )
+    return state
+
+
+def _batch_research(topics, edit_fast_path=None):
+    """Stage 0, run synchronously: grouped research, then selection per movie"""
+    states = [{"topic": topic, "speculative": False} for topic in topics]
+    if edit_fast_path:
+        for state in states:
+            state["edit_fast_path"] = edit_fast_path
+    researched = research.research_many(topics)
+    for state in states:
+        state.update(researched[state["topic"]])
+    with ThreadPoolExecutor(
+        max_workers=research.MAX_CONCURRENCY, thread_name_prefix="batch-research"
+    ) as pool:
+        futures = [research.submit_with_context(pool, _select_and_search, st) for st in states]
+        for future in futures:
+            future.result()
+    return states
+
+
+def _batch_requests(stage, states):
+    """A stage's Batch API requests for every movie; returns (requests, meta)"""
+    requests, meta = [], {}
+    if stage == "draft":
+        draft_model = research.model_router.candidates("draft")[0]
+        for m, state in enumerate(states):
+            for k, ctx in enumerate(state.get("selected_research", []), 1):
+                background = (
+                    research._draft_background(
+                        ctx, state.get("research_context", []), state.get("shared_context", "")
+                    )
+                    if research.DRAFT_SEARCH != "per_article"
+                    else ""
+                )
+                request, research_url, avoid_domain = research._draft_request(
+                    state["topic"], ctx, research.DRAFT_SEARCH, background
+                )
+                custom_id = f"m{m}-{k}-draft"
+                requests.append((custom_id, {"model": draft_model, **request}))
+                meta[custom_id] = [research_url, avoid_domain]
+    elif stage == "edit":
+        # meta: custom_id -> fast path mode of the drafts that passed the gate
+        edit_model = research.model_router.candidates("edit")[0]
+        title_model = research.model_router.candidates("edit_title")[0]
+        run = research.current_run()
+        for m, state in enumerate(states):
+            mode = state.get("edit_fast_path") or research.EDIT_FAST_PATH
+            for k, draft in enumerate(state.get("drafts", []), 1):
+                custom_id = f"m{m}-{k}-edit"
+                passed = mode != "off" and research.check_editor_contract(draft)[0]
+                if run and mode != "off":
+                    run.count("edit.gate_checked")
+                    run.count("edit.gate_passed", int(passed))
+                if passed:
+                    meta[custom_id] = mode
+                    if mode == "seo":
+                        continue
+                    requests.append(
+                        (custom_id, {"model": title_model, **research._title_request(k, draft)})
+                    )
+                else:
+                    requests.append(
+                        (custom_id, {"model": edit_model, **research._editor_request(k, draft)})
+                    )
+    else:
+        seo_model = research.model_router.candidates("seo_generator")[0]
+        requests = [
+            (f"m{m}-{k}-seo", {"model": seo_model, **research._seo_request(k, post)})
+            for m, state in enumerate(states)
+            for k, post in enumerate(state.get("posts", []), 1)
+        ]
+    return requests, meta
+
+
+def _apply_batch_outputs(stage, states, outputs, meta):
+    """Fold a stage's batch outputs ({custom_id: body or None}) into the per-movie states"""
+    if stage == "draft":
+        for m, state in enumerate(states):
+            drafts, sources = [], []
+            for k, topic in enumerate(state.get("selected_topics", []), 1):
+                custom_id = f"m{m}-{k}-draft"
+                research_url, avoid_domain = meta.get(custom_id, ("", ""))
+                body = outputs.get(custom_id)
+                if body is None:
+                    drafts.append(f"Error generating draft for topic: {topic}")
+                    sources.append([research_url] if research_url else [])
+                    continue
+                draft, draft_sources = research._parse_draft_response(
+                    k,
+                    _response_output_text(body).strip(),
+                    research_url,
+                    avoid_domain,
+                    SimpleNamespace(output_items=body.get("output", [])),
+                )
+                drafts.append(draft)
+                sources.append(draft_sources)
+            state.update(drafts=drafts, sources=sources)
+            state.update(research.validate_sources_node(state))
+    elif stage == "edit":
+        run = research.current_run()
+        for m, state in enumerate(states):
+            finals = []
+            for k, draft in enumerate(state.get("drafts", []), 1):
+                custom_id = f"m{m}-{k}-edit"
+                fast = meta.get(custom_id)
+                if fast == "seo":
+                    finals.append({"title": "", "content": draft.strip(), "title_pending": True})
+                    continue
+                body = outputs.get(custom_id)
+                if body is None:
+                    finals.append(research._editor_fallback(k, draft))
+                    continue
+                content = body["choices"][0]["message"]["content"].strip()
+                if fast:
+                    title = research._parse_title_response(k, content)
+                    finals.append({"title": title, "content": draft.strip()})
+                else:
+                    finals.append(research._parse_editor_response(k, content))
+            if run:
+                run.count(
+                    "edit.fast_path", sum(1 for key in meta if key.startswith(f"m{m}-"))
+                )
+            state["finals"] = finals
+            state.update(research.post_node(state))
+    else:
+        for m, state in enumerate(states):
+            posts = []
+            for k, post in enumerate(state.get("posts", []), 1):
+                body = outputs.get(f"m{m}-{k}-seo")
+                if body is None:
+                    posts.append(post)
+                    continue
+                content = body["choices"][0]["message"]["content"].strip()
+                posts.append(research._parse_seo_response(k, content, post))
+            state["posts"] = posts
+
+
+class BatchJobStore:
+    """
+    Batch jobs kept as JSON files in the OpenAI Files API.
+
+    One file per job, named BATCH_JOB_PREFIX + job id, replaced whenever the
+    job moves on. An advancer claims a job by deleting its file before it
+    collects or submits anything, so a caller poll and a cron tick racing on
+    the same job never both submit its next stage.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def list(self):
+        """[(file_id, job_id)] of every stored job"""
+        return [
+            (f.id, f.filename[len(BATCH_JOB_PREFIX) : -len(".json")])
+            for f in self.client.files.list(purpose="user_data")
+            if (f.filename or "").startswith(BATCH_JOB_PREFIX)
+        ]
+
+    def find(self, job_id):
+        """File id holding job_id, or None"""
+        return next((file_id for file_id, jid in self.list() if jid == job_id), None)
+
+    def load(self, file_id):
+        return json.loads(self.client.files.content(file_id).text)
+
+    def save(self, job):
+        upload = self.client.files.create(
+            file=(f"{BATCH_JOB_PREFIX}{job['id']}.json", json.dumps(job).encode("utf-8")),
+            purpose="user_data",
+        )
+        return upload.id
+
+    def save_with_retries(self, job):
+        for attempt in range(BATCH_SAVE_RETRIES + 1):
+            try:
+                return self.save(job)
+            except Exception as e:
+                if attempt == BATCH_SAVE_RETRIES:
+                    raise
+                delay = BATCH_SAVE_BACKOFF_S * 2**attempt
+                logger.warning(
+                    f"[Batch] ⚠️ Saving job {job['id']} failed ({type(e).__name__}), "
+                    f"retry {attempt + 1} in {delay:.2f}s"
+                )
+                time.sleep(delay)
+
+    def claim(self, file_id):
+        """Delete the job's file; False when another advancer got there first"""
+        try:
+            self.client.files.delete(file_id)
+            return True
+        except Exception as e:
+            if getattr(e, "status_code", None) == 404:
+                return False
+            raise
+
+
+def _start_stage(job, runner, index, submitted=None):
+    """
+    Submit the first stage from index that has requests; complete the job after the last.
+
+    submitted maps stage names to the batch ids already created for them;
+    new ids are recorded there as they are created (see BatchRunner.submit).
+    """
+    submitted = {} if submitted is None else submitted
+    while index < len(BATCH_STAGES):
+        stage, endpoint = BATCH_STAGES[index]
+        requests, meta = _batch_requests(stage, job["states"])
+        if requests:
+            batch_ids = runner.submit(
+                endpoint,
+                requests,
+                stage,
+                metadata={"agent_batch_job": job["id"]},
+                submitted=submitted.setdefault(stage, []),
+            )
+            job.update(
+                stage=stage,
+                meta=meta,
+                custom_ids=[custom_id for custom_id, _ in requests],
+                batch_ids=list(batch_ids),
+                submitted_at=time.time(),
+            )
+            return
+        _apply_batch_outputs(stage, job["states"], {}, meta)
+        index += 1
+
+    results = [
+        {"original_topic": state["topic"], "posts": state["posts"], "topic_count": len(state["posts"])}
+        for state in job["states"]
+    ]
+    persisted = {}
+    if job["persist"]:
+        persisted = _persist.persist_posts(
+            [
+                (job["persist"][entry["original_topic"]], entry["posts"])
+                for entry in results
+                if entry["original_topic"] in job["persist"]
+            ]
+        )
+    job.update(
+        status="completed",
+        stage=None,
+        meta={},
+        custom_ids=[],
+        batch_ids=[],
+        states=[],
+        results=results,
+        completed_at=time.time(),
+        **persisted,
+    )
+    logger.info(
+        f"[Batch] 🏁 Job {job['id']} completed: {sum(r['topic_count'] for r in results)} posts "
+        f"for {len(results)} movies"
+    )
+
+
+def submit_batch_job(topics, persist=None, edit_fast_path=None, runner=None, store=None):
+    """
+    Research and select synchronously, then submit the first batch stage.
+
+    Returns the job without waiting for the Batch API; advance_batch_job
+    moves it through the remaining stages. persist maps movie titles to the
+    persist option of the movies whose posts are saved on completion.
+    """
+    runner = runner or BatchRunner(batch_client())
+    store = store or BatchJobStore(runner.client)
+    job = {
+        "id": uuid.uuid4().hex[:16],
+        "status": "running",
+        "created_at": time.time(),
+        "persist": persist or {},
+        "states": _batch_research(topics, edit_fast_path),
+    }
+    logger.info(f"[Batch] 🚀 Job {job['id']} starting for {len(topics)} movies")
+    _start_stage(job, runner, 0)
+    # Later stages only need what the drafts are built from
+    job["states"] = [
+        {key: state[key] for key in BATCH_JOB_STATE_KEYS if key in state} for state in job["states"]
+    ]
+    store.save_with_retries(job)
+    return job
+
+
+def _advance(file_id, runner, store, job=None):
+    job = job or store.load(file_id)
+    if job["status"] != "running":
+        return job
+    statuses = runner.statuses(job["batch_ids"])
+    done = all(status in BATCH_TERMINAL_STATES for status in statuses.values())
+    expired = time.time() - job["submitted_at"] > runner.timeout
+    if not done and not expired:
+        return {**job, "batch_statuses": statuses}
+    if not store.claim(file_id):
+        logger.info(f"[Batch] ⏭️ Job {job['id']} is being advanced elsewhere")
+        return {**job, "batch_statuses": statuses}
+
+    # The job file is gone until a save succeeds. If anything below fails the
+    # job goes back as it was, plus the ids of any next-stage batches already
+    # created, so the retry collects this stage again and resumes the submit
+    before = json.loads(json.dumps(job))
+    submitted = before.setdefault("submitted", {})
+    job.pop("submitted", None)
+    try:
+        if done:
+            stage = job["stage"]
+            outputs = runner.collect(job["batch_ids"], job["custom_ids"], stage)
+            _apply_batch_outputs(stage, job["states"], outputs, job["meta"])
+            _start_stage(
+                job, runner, [name for name, _ in BATCH_STAGES].index(stage) + 1, submitted
+            )
+        else:
+            logger.error(f"[Batch] ⏰ Job {job['id']} stage '{job['stage']}' timed out, cancelling")
+            runner.cancel(job["batch_ids"])
+            job.update(
+                status="failed",
+                error=f"Batch stage '{job['stage']}' did not finish in {runner.timeout:.0f}s",
+                states=[],
+                completed_at=time.time(),
+            )
+        store.save_with_retries(job)
+    except Exception:
+        try:
+            store.save_with_retries(before)
+        except Exception:
+            logger.error(
+                f"[Batch] 💥 Job {job['id']} could not be saved back; "
+                f"batches {job['batch_ids']} {submitted} are orphaned"
+            )
+        raise
+    return job
+
+
+def advance_batch_job(job_id, runner=None, store=None):
+    """
+    Move a job on if its current batches have finished.
+
+    Collects the finished stage and submits the next one; after the last
+    stage the posts are persisted and kept on the job as "results". Returns
+    the job (with "batch_statuses" while it waits), or None when unknown.
+    """
+    runner = runner or BatchRunner(batch_client())
+    store = store or BatchJobStore(runner.client)
+    file_id = store.find(job_id)
+    if file_id is None:
+        return None
+    return _advance(file_id, runner, store)
+
+
+def advance_batch_jobs(runner=None, store=None):
+    """Advance every stored job and drop finished ones past BATCH_RESULT_TTL_S"""
+    runner = runner or BatchRunner(batch_client())
+    store = store or BatchJobStore(runner.client)
+    jobs = []
+    for file_id, job_id in store.list():
+        try:
+            job = store.load(file_id)
+            if job["status"] != "running" and time.time() - job["completed_at"] > BATCH_RESULT_TTL_S:
+                store.claim(file_id)
+                logger.info(f"[Batch] 🧹 Dropped finished job {job_id}")
+                continue
+            jobs.append(_advance(file_id, runner, store, job))
+        except Exception as e:
+            logger.error(f"[Batch] 💥 Could not advance job {job_id}: {e}")
+    return jobs
+
+
+def batch_job_summary(job):
+    """Client-facing view of a job (results only once completed)"""
+    summary = {
+        "batch_job": job["id"],
+        "job_status": job["status"],
+        "stage": job.get("stage"),
+        "topic_count": len(job.get("results") or job.get("states") or []),
+    }
+    if job["status"] == "running":
+        summary["batches"] = job.get("batch_statuses") or {b: "submitted" for b in job["batch_ids"]}
+    elif job["status"] == "failed":
+        summary["error"] = job.get("error", "")
+    else:
+        summary["results"] = job["results"]
+        for key in ("persisted", "persist_error"):
+            if key in job:
+                summary[key] = job[key]
+    return summary
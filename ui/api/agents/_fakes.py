@@ -0,0 +1,615 @@
+"""
+Offline stand-ins for the research agent's external services.
+
+FakeOpenAI answers every pipeline prompt with plausible canned output after a
+simulated latency; BatchStub and PostgrestStub serve the slices of the Batch
+and PostgREST APIs the agent uses. Benchmarks (_tools.py) and tests inject
+them into research; the deployed function never imports this module.
+"""
+
+import email.parser
+import email.policy
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import research
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Fake OpenAI Client
+# ──────────────────────────────────────────────────────────────────────────────
+
+FAKE_LATENCY_MS = {
+    "research": 2500,
+    "research_batch": 4000,
+    "research_delta": 2000,
+    "research_facet": 900,
+    "research_since": 1500,
+    "select_topics": 900,
+    "draft": 3500,
+    "shared_search": 1500,
+    "edit": 4000,
+    "edit_title": 700,
+    "seo_generator": 1200,
+}
+FAKE_WEB_SEARCH_MS = 5500  # added when a call enables the web search tool
+
+
+# Pipeline prompt templates by the kind of call they make
+PROMPT_KINDS = {
+    "research": ("RESEARCH_PROMPT",),
+    "research_batch": ("RESEARCH_BATCH_PROMPT",),
+    "research_delta": ("RESEARCH_DELTA_PROMPT",),
+    "research_facet": ("RESEARCH_FACET_PROMPT",),
+    "research_since": ("RESEARCH_SINCE_PROMPT",),
+    "select_topics": ("TOPIC_SELECTOR_SYSTEM",),
+    "shared_search": ("SHARED_SEARCH_PROMPT",),
+    "draft": ("DRAFT_PROMPT", "DRAFT_PROMPT_GROUNDED"),
+    "edit": ("EDITOR_PROMPT",),
+    "edit_title": ("TITLE_PROMPT",),
+    "seo_generator": ("SEO_PROMPT", "SEO_WITH_TITLE_PROMPT"),
+    "research_tags": ("RESEARCH_TAGS_INSTRUCTION",),  # appended to research prompts
+}
+
+
+def _template_lines(name):
+    """Fixed lines of a template: no placeholders, so formatting leaves them intact"""
+    return {
+        line.strip()
+        for line in getattr(research, name).splitlines()
+        if line.strip() and "{" not in line
+    }
+
+
+def prompt_markers():
+    """
+    One marker line per call kind, read from research's own templates.
+
+    A marker is the longest fixed line of a kind's template that no other
+    kind's template contains, so rewording a prompt moves the marker with it.
+    """
+    lines = {kind: set().union(*map(_template_lines, names)) for kind, names in PROMPT_KINDS.items()}
+    markers = {}
+    for kind, names in PROMPT_KINDS.items():
+        others = set().union(*(v for k, v in lines.items() if k != kind))
+        for name in names:
+            unique = _template_lines(name) - others
+            if not unique:
+                raise ValueError(f"{name} has no line that tells it apart from other prompts")
+            markers.setdefault(kind, []).append(max(unique, key=len))
+    return markers
+
+
+class FakeOpenAI:
+    def __init__(self, latency_scale=1.0, seed=0):
+        self.latency_scale = latency_scale
+        self.seed = seed
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._markers = prompt_markers()
+        self.responses = SimpleNamespace(create=self._create_response)
+        self.chat = SimpleNamespace(
+            completions=SimpleNamespace(create=self._create_chat_completion)
+        )
+        # Legacy completions endpoint; wrap_openai patches it alongside chat
+        self.completions = SimpleNamespace(create=self._create_completion)
+
+    def _matches(self, kind, text):
+        return any(marker in text for marker in self._markers[kind])
+
+    def _classify(self, text):
+        for kind in PROMPT_KINDS:
+            if kind != "research_tags" and self._matches(kind, text):
+                return kind
+        raise ValueError(f"FakeOpenAI cannot place this prompt: {text[:120]!r}")
+
+    def _sleep(self, kind, rng, web_search=False):
+        base = FAKE_LATENCY_MS[kind]
+        if web_search:
+            base += FAKE_WEB_SEARCH_MS
+        time.sleep(base * rng.uniform(0.8, 1.2) * self.latency_scale / 1000)
+
+    def _article(self, rng, topic):
+        words = (
+            "studio fans sequel box office cast director trailer release streaming "
+            "premiere critics franchise audiences record weekend opening buzz"
+        ).split()
+
+        def paragraph():
+            return " ".join(
+                " ".join(rng.choices(words, k=rng.randint(9, 15))).capitalize() + "."
+                for _ in range(3)
+            )
+
+        parts = [f"Big news for fans of {topic}! " + paragraph()]
+        for heading in ("What Happened", "Why It Matters", "What's Next"):
+            parts += [f"## {heading}", paragraph(), paragraph()]
+        parts.append("Will this change the franchise forever?")
+        return "\n\n".join(parts)
+
+    def _answer(self, kind, text, rng, web_search=False):
+        topic_match = re.search(r"'([^']{1,80})'", text)
+        topic = topic_match.group(1) if topic_match else "the movie"
+
+        if kind == "research":
+            entries = [
+                {
+                    "title": f"{topic} news item {n}",
+                    "details": f"Details about development {n} connected to {topic}. "
+                    + self._article(rng, topic)[:400],
+                    "source": f"https://news{n}.example.com/{rng.randint(1000, 9999)}",
+                }
+                for n in range(1, 6)
+            ]
+            if self._matches("research_tags", text):
+                for entry in entries:
+                    entry["sentiment"] = rng.choice(("positive", "positive", "controversial"))
+                    entry["engagement"] = rng.randint(3, 10)
+            return json.dumps(entries)
+        if kind == "research_delta":
+            count = int(re.search(r"exactly (\d+) topics", text).group(1))
+            return json.dumps(
+                [
+                    {
+                        "title": f"{topic} fresh angle {n}",
+                        "details": f"New development {n} specific to {topic}. "
+                        + self._article(rng, topic)[:300],
+                        "source": f"https://fresh{n}.example.com/{rng.randint(1000, 9999)}",
+                    }
+                    for n in range(1, count + 1)
+                ]
+            )
+        if kind == "research_facet":
+            count = int(re.search(r"at most (\d+) topics", text).group(1))
+            facet = re.search(r"^Facet: (.+)$", text, re.MULTILINE).group(1).split(" (")[0]
+            return json.dumps(
+                [
+                    {
+                        "title": f"{topic} {facet} update {n}",
+                        "details": f"Development {n} on the {facet} of {topic}. "
+                        + self._article(rng, topic)[:300],
+                        # Facets sometimes surface the same story
+                        "source": f"https://news{n}.example.com/{topic.replace(' ', '-').lower()}"
+                        if rng.random() < 0.25
+                        else f"https://{facet.split()[0].lower()}.example.com/{rng.randint(1000, 9999)}",
+                    }
+                    for n in range(1, rng.randint(1, count) + 1)
+                ]
+            )
+        if kind == "research_since":
+            # Mostly the same stories come back; occasionally something new
+            seen = re.findall(r"^- (https?://\S+)$", text, re.MULTILINE)
+            fresh = rng.random() < 0.3
+            count = rng.randint(1, 3) if fresh else min(len(seen), 3)
+            return json.dumps(
+                [
+                    {
+                        "title": f"{topic} {'new development' if fresh else 'story'} {n}",
+                        "details": f"Development {n} connected to {topic}. "
+                        + self._article(rng, topic)[:300],
+                        "source": f"https://latest{n}.example.com/{rng.randint(1000, 9999)}"
+                        if fresh
+                        else seen[n - 1],
+                    }
+                    for n in range(1, count + 1)
+                ]
+            )
+        if kind == "research_batch":
+            movies = re.findall(r"^\d+\. '(.+)'$", text, re.MULTILINE)
+            return json.dumps(
+                {
+                    movie: [
+                        {
+                            "title": f"{movie} news item {n}",
+                            "details": f"Details about development {n} connected to {movie}. "
+                            + self._article(rng, movie)[:400],
+                            "source": f"https://news{n}.example.com/{rng.randint(1000, 9999)}",
+                        }
+                        # Occasionally come back short so re-queries get exercised
+                        for n in range(1, 6 if rng.random() > 0.1 else 4)
+                    ]
+                    for movie in movies
+                }
+            )
+        if kind == "select_topics":
+            return ", ".join(str(n) for n in sorted(rng.sample(range(1, 6), 3)))
+        if kind == "shared_search":
+            return "\n".join(
+                f"- Story {n}: critics and fans react (https://buzz{n}.example.com/{rng.randint(1000, 9999)})"
+                for n in range(1, 4)
+            )
+        if kind == "draft":
+            sources = list(dict.fromkeys(re.findall(r"https?://[^\s)]+", text)))[:4]
+            if web_search:
+                sources.append(f"https://extra.example.com/{rng.randint(1000, 9999)}")
+            return json.dumps({"draft": self._article(rng, topic), "sources": sources})
+        if kind == "edit":
+            return json.dumps(
+                {"title": f"{topic}: The Twist Nobody Saw Coming", "content": self._article(rng, topic)}
+            )
+        if kind == "edit_title":
+            return json.dumps({"title": f"{topic}: The Twist Nobody Saw Coming"})
+        if kind == "seo_generator":
+            seo = {
+                "seo_title": f"{topic[:40]}: Everything We Know",
+                "seo_description": f"The latest on {topic[:60]}, from casting to box office.",
+            }
+            if '"title":' in text:
+                seo["title"] = f"{topic}: The Twist Nobody Saw Coming"
+            return json.dumps(seo)
+        return "{}"
+
+    def _run(self, text, web_search=False):
+        with self._lock:
+            self.calls += 1
+            rng = random.Random(f"{self.seed}:{self.calls}:{text[:200]}")
+        kind = self._classify(text)
+        self._sleep(kind, rng, web_search)
+        answer = self._answer(kind, text, rng, web_search)
+        return answer, len(text) // 4, len(answer) // 4
+
+    def _create_response(self, model=None, input="", tools=None, **kwargs):
+        text = input if isinstance(input, str) else json.dumps(input)
+        web_search = any("web_search" in tool.get("type", "") for tool in tools or [])
+        answer, input_tokens, output_tokens = self._run(text, web_search)
+        return SimpleNamespace(
+            model=model,
+            output_text=answer,
+            output_items=[],
+            usage=SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens),
+        )
+
+    def _create_completion(self, model=None, prompt="", **kwargs):
+        answer, input_tokens, output_tokens = self._run(prompt)
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(text=answer)],
+            usage=SimpleNamespace(prompt_tokens=input_tokens, completion_tokens=output_tokens),
+        )
+
+    def _create_chat_completion(self, model=None, messages=(), **kwargs):
+        text = "\n".join(m.get("content", "") for m in messages)
+        answer, input_tokens, output_tokens = self._run(text)
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(content=answer))],
+            usage=SimpleNamespace(prompt_tokens=input_tokens, completion_tokens=output_tokens),
+        )
+
+
+def enable_fake_backend(latency_scale=1.0, seed=0):
+    """Route research's LLM calls to a fresh FakeOpenAI; returns the client research uses"""
+    client = research.use_openai_client(FakeOpenAI(latency_scale=latency_scale, seed=seed))
+    # Fake sources are not real URLs; benchmarks re-enable validation explicitly
+    research.VALIDATE_SOURCES = False
+    research.logger.warning(
+        f"[OpenAI] 🧪 Using offline fake backend (latency scale {latency_scale})"
+    )
+    return client
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Local Batch API Stand-in
+# ──────────────────────────────────────────────────────────────────────────────
+# Implements the slice of the Files and Batches API that _batch.BatchRunner and
+# _batch.BatchJobStore use, answering each batched request with FakeOpenAI.
+
+
+class BatchStub:
+    def __init__(self, latency_scale=0.001):
+        self.fake = FakeOpenAI(latency_scale=latency_scale)
+        self.files = {}  # id -> content
+        self.file_info = {}  # id -> file object
+        self.batches = {}
+        self.lock = threading.Lock()
+        # Cleared, batches stay in progress until it is set again
+        self.running = threading.Event()
+        self.running.set()
+
+    def add_file(self, data, filename, purpose):
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        info = {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(data),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+        }
+        with self.lock:
+            self.files[file_id] = data
+            self.file_info[file_id] = info
+        return info
+
+    def list_files(self, purpose=None):
+        with self.lock:
+            return [
+                info for info in self.file_info.values() if purpose in (None, info["purpose"])
+            ]
+
+    def delete_file(self, file_id):
+        """False when there is no such file"""
+        with self.lock:
+            self.file_info.pop(file_id, None)
+            return self.files.pop(file_id, None) is not None
+
+    def create_batch(self, request):
+        batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+        batch = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": request["endpoint"],
+            "input_file_id": request["input_file_id"],
+            "completion_window": request.get("completion_window", "24h"),
+            "metadata": request.get("metadata"),
+            "status": "in_progress",
+            "created_at": int(time.time()),
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        }
+        with self.lock:
+            self.batches[batch_id] = batch
+        threading.Thread(target=self._process, args=(batch_id,), daemon=True).start()
+        return batch
+
+    def _answer(self, url, body):
+        body = dict(body)
+        model = body.pop("model", "gpt-4o-mini")
+        if url == "/v1/chat/completions":
+            resp = self.fake.chat.completions.create(model=model, **body)
+            return {
+                "id": f"chatcmpl-{uuid.uuid4().hex[:8]}",
+                "object": "chat.completion",
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": resp.choices[0].message.content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": resp.usage.prompt_tokens,
+                    "completion_tokens": resp.usage.completion_tokens,
+                },
+            }
+        resp = self.fake.responses.create(model=model, **body)
+        return {
+            "id": f"resp_{uuid.uuid4().hex[:8]}",
+            "object": "response",
+            "model": model,
+            "output": [
+                {
+                    "type": "message",
+                    "role": "assistant",
+                    "content": [{"type": "output_text", "text": resp.output_text, "annotations": []}],
+                }
+            ],
+            "usage": {
+                "input_tokens": resp.usage.input_tokens,
+                "output_tokens": resp.usage.output_tokens,
+            },
+        }
+
+    def _process(self, batch_id):
+        self.running.wait()
+        batch = self.batches[batch_id]
+        lines = self.files[batch["input_file_id"]].decode("utf-8").splitlines()
+        output = []
+        for line in lines:
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            answer = self._answer(request["url"], request["body"])
+            output.append(
+                json.dumps(
+                    {
+                        "id": f"batch_req_{uuid.uuid4().hex[:8]}",
+                        "custom_id": request["custom_id"],
+                        "response": {"status_code": 200, "body": answer},
+                        "error": None,
+                    }
+                )
+            )
+        output_file = self.add_file("\n".join(output).encode("utf-8"), "output.jsonl", "batch_output")
+        with self.lock:
+            batch.update(
+                status="completed",
+                output_file_id=output_file["id"],
+                request_counts={"total": len(output), "completed": len(output), "failed": 0},
+            )
+
+
+def make_batch_stub_handler(stub):
+    class BatchStubHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _json(self, data, status=200):
+            body = json.dumps(data).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            raw = self.rfile.read(length)
+            path = self.path.split("?")[0].rstrip("/")
+
+            if path.endswith("/files"):
+                message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+                    f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + raw
+                )
+                parts = {
+                    part.get_param("name", header="content-disposition"): part
+                    for part in message.iter_parts()
+                }
+                file_part = parts["file"]
+                purpose = parts["purpose"].get_payload(decode=True).decode()
+                data = file_part.get_payload(decode=True)
+                self._json(stub.add_file(data, file_part.get_filename() or "upload", purpose))
+            elif path.endswith("/batches"):
+                self._json(stub.create_batch(json.loads(raw)))
+            elif path.endswith("/cancel"):
+                batch = stub.batches.get(path.split("/")[-2])
+                if batch:
+                    batch["status"] = "cancelled"
+                self._json(batch or {"error": "not found"}, 200 if batch else 404)
+            else:
+                self._json({"error": {"message": f"Unknown path {path}"}}, 404)
+
+        def do_GET(self):
+            url = urllib.parse.urlsplit(self.path)
+            parts = url.path.rstrip("/").split("/")
+            if parts[-1] == "files":
+                purpose = urllib.parse.parse_qs(url.query).get("purpose", [None])[0]
+                self._json({"object": "list", "data": stub.list_files(purpose), "has_more": False})
+            elif parts[-1] == "content" and parts[-2] in stub.files:
+                body = stub.files[parts[-2]]
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            elif parts[-1] in stub.batches:
+                self._json(stub.batches[parts[-1]])
+            else:
+                self._json({"error": {"message": "not found"}}, 404)
+
+        def do_DELETE(self):
+            file_id = self.path.split("?")[0].rstrip("/").split("/")[-1]
+            if stub.delete_file(file_id):
+                self._json({"id": file_id, "object": "file", "deleted": True})
+            else:
+                self._json({"error": {"message": f"No such File object: {file_id}"}}, 404)
+
+    return BatchStubHandler
+
+
+def start_batch_stub(port=0, latency_scale=0.001):
+    """Start the stand-in in a background thread; returns (server, stub, base_url)"""
+    stub = BatchStub(latency_scale)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_batch_stub_handler(stub))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stub, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Local PostgREST Stand-in
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+class PostgrestStub:
+    """In-memory stand-in for a PostgREST table: upsert on slug, PATCH by id filter"""
+
+    def __init__(self, latency_ms=0, fail_every=0, fail_patches=0):
+        self.latency_ms = latency_ms
+        self.fail_every = fail_every  # every Nth request answers 503
+        self.fail_patches = fail_patches  # the first N PATCH requests answer 503
+        self.rows = {}  # id -> row
+        self.requests = 0
+        self.lock = threading.Lock()
+        self._next_id = 1_000_000
+
+    def seed(self, rows):
+        with self.lock:
+            for row in rows:
+                self.rows[row["id"]] = dict(row)
+
+    def upsert(self, rows, conflict, merge=True):
+        """Insert rows, merging into existing ones on conflict; False on a conflict without merge"""
+        with self.lock:
+            by_key = {row.get(conflict): row_id for row_id, row in self.rows.items()}
+            if not merge and any(row.get(conflict) in by_key for row in rows):
+                return False
+            for row in rows:
+                row_id = by_key.get(row.get(conflict))
+                if row_id is None:
+                    row_id = row.get("id") or self._next_id
+                    self._next_id += 1
+                    self.rows[row_id] = {"id": row_id}
+                self.rows[row_id].update(row)
+                by_key[row.get(conflict)] = row_id
+        return True
+
+    def patch(self, id_filter, values):
+        op, _, value = id_filter.partition(".")
+        ids = value.strip("()").split(",") if op == "in" else [value]
+        with self.lock:
+            matched = [row for row_id, row in self.rows.items() if str(row_id) in ids]
+            for row in matched:
+                row.update(values)
+        return len(matched)
+
+
+def make_postgrest_stub_handler(stub):
+    class PostgrestStubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, data, status=200):
+            body = json.dumps(data).encode("utf-8") if data is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _begin(self):
+            """Read the body; False when this request is chosen to fail"""
+            length = int(self.headers.get("Content-Length", 0))
+            self.body = json.loads(self.rfile.read(length) or b"null")
+            self.query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+            time.sleep(stub.latency_ms / 1000)
+            with stub.lock:
+                stub.requests += 1
+                failing = stub.fail_every and stub.requests % stub.fail_every == 0
+                if self.command == "PATCH" and stub.fail_patches:
+                    stub.fail_patches -= 1
+                    failing = True
+            if failing:
+                self._json({"message": "stub: service unavailable"}, 503)
+            return not failing
+
+        def do_POST(self):
+            if self._begin():
+                rows = self.body if isinstance(self.body, list) else [self.body]
+                merge = "resolution=merge-duplicates" in self.headers.get("Prefer", "")
+                if stub.upsert(rows, self.query.get("on_conflict", ["id"])[0], merge):
+                    self._json(None, 201)
+                else:
+                    self._json({"code": "23505", "message": "stub: duplicate key"}, 409)
+
+        def do_PATCH(self):
+            if self._begin():
+                stub.patch(self.query["id"][0], self.body)
+                self._json(None, 204)
+
+        def do_GET(self):
+            with stub.lock:
+                rows = list(stub.rows.values())
+            self._json(rows)
+
+    return PostgrestStubHandler
+
+
+def start_postgrest_stub(port=0, latency_ms=0, fail_every=0, fail_patches=0):
+    """Start a local PostgREST stand-in; returns (server, stub, base_url)"""
+    stub = PostgrestStub(latency_ms, fail_every, fail_patches)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_postgrest_stub_handler(stub))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stub, f"http://127.0.0.1:{server.server_address[1]}"
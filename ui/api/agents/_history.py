@@ -0,0 +1,213 @@
+"""
+Run history: one compact SQLite row per handled request.
+
+Rows go to a local SQLite store at AGENT_RUN_HISTORY_DB: per-node wall time,
+LLM calls, tokens and fallbacks, plus hashes of the model routes and prompt
+templates in effect so runs can be compared across a prompt or model change
+(see `_tools.py history-*`).
+
+Local-only and off by default: set AGENT_RUN_HISTORY_DB for local runs or a
+single long-lived host. On serverless instances (Vercel) the file would be
+per-instance and lost on cold starts.
+
+Retention: rows younger than AGENT_RUN_HISTORY_RAW_DAYS are kept as-is; older
+ones are thinned to one in AGENT_RUN_HISTORY_DOWNSAMPLE per (day, model hash,
+prompt hash), with the survivors' weight raised to keep totals; rows older
+than AGENT_RUN_HISTORY_MAX_DAYS are dropped. Pruning runs every
+RUN_HISTORY_PRUNE_EVERY records.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+import research
+
+logger = logging.getLogger("research-agent")
+
+RUN_HISTORY_DB = os.getenv("AGENT_RUN_HISTORY_DB", "")
+RUN_HISTORY_RAW_DAYS = float(os.getenv("AGENT_RUN_HISTORY_RAW_DAYS", "7"))
+RUN_HISTORY_DOWNSAMPLE = int(os.getenv("AGENT_RUN_HISTORY_DOWNSAMPLE", "10"))
+RUN_HISTORY_MAX_DAYS = float(os.getenv("AGENT_RUN_HISTORY_MAX_DAYS", "90"))
+RUN_HISTORY_PRUNE_EVERY = 500
+
+
+def _fingerprint(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()[:10]
+
+
+@lru_cache(maxsize=1)
+def config_fingerprints():
+    """(model_hash, prompt_hash) of the model routes and PROMPT_TEMPLATES in effect"""
+    prompts = dict(research.PROMPT_TEMPLATES, RESEARCH_FACETS=list(research.RESEARCH_FACETS))
+    return _fingerprint(research.model_router.routes), _fingerprint(prompts)
+
+
+class RunHistory:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # Appends are frequent and losing the last few on a crash is acceptable
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._db:
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS runs (
+                    id INTEGER PRIMARY KEY,
+                    recorded_at REAL NOT NULL,
+                    run_id TEXT,
+                    kind TEXT,
+                    start_node TEXT,
+                    priority TEXT,
+                    status TEXT,
+                    elapsed_ms INTEGER,
+                    llm_calls INTEGER,
+                    input_tokens INTEGER,
+                    output_tokens INTEGER,
+                    fallbacks INTEGER,
+                    model_hash TEXT,
+                    prompt_hash TEXT,
+                    nodes TEXT,
+                    weight INTEGER NOT NULL DEFAULT 1
+                )
+                """
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS runs_recorded_at ON runs (recorded_at)")
+
+    @staticmethod
+    def row(run, kind="run", start_node="research", status="ok"):
+        """History row for a finished run"""
+        summary = run.summary()
+        nodes = {}
+        for name, ms in summary["node_ms"].items():
+            nodes[name] = {"ms": ms}
+        for name, stats in summary["nodes"].items():
+            entry = nodes.setdefault(name, {})
+            entry["calls"] = stats["calls"]
+            if stats["fallbacks"]:
+                entry["fallbacks"] = stats["fallbacks"]
+        for name, amount in summary["counters"].items():
+            if name.startswith("fallback."):
+                entry = nodes.setdefault(name[len("fallback.") :], {})
+                entry["fallbacks"] = entry.get("fallbacks", 0) + amount
+        model_hash, prompt_hash = config_fingerprints()
+        return {
+            "recorded_at": time.time(),
+            "run_id": run.run_id,
+            "kind": kind,
+            "start_node": start_node,
+            "priority": run.priority,
+            "status": status,
+            "elapsed_ms": summary["elapsed_ms"],
+            "llm_calls": summary["llm_calls"],
+            "input_tokens": summary["input_tokens"],
+            "output_tokens": summary["output_tokens"],
+            "fallbacks": sum(entry.get("fallbacks", 0) for entry in nodes.values()),
+            "model_hash": model_hash,
+            "prompt_hash": prompt_hash,
+            "nodes": nodes,
+        }
+
+    def insert(self, row):
+        columns = list(row)
+        values = [json.dumps(row[c], separators=(",", ":")) if c == "nodes" else row[c] for c in columns]
+        with self._lock, self._db:
+            self._db.execute(
+                f"INSERT INTO runs ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                values,
+            )
+            self._inserts += 1
+            due = self._inserts % RUN_HISTORY_PRUNE_EVERY == 0
+        if due:
+            self.prune()
+
+    def rows(self, since=None, until=None):
+        """Rows recorded in [since, until), oldest first, with nodes decoded"""
+        query, params = "SELECT * FROM runs WHERE recorded_at >= ?", [since or 0]
+        if until is not None:
+            query += " AND recorded_at < ?"
+            params.append(until)
+        with self._lock:
+            cursor = self._db.execute(query + " ORDER BY recorded_at", params)
+            columns = [d[0] for d in cursor.description]
+            rows = [dict(zip(columns, values)) for values in cursor.fetchall()]
+        for row in rows:
+            row["nodes"] = json.loads(row["nodes"] or "{}")
+        return rows
+
+    def prune(self, now=None, raw_days=None, downsample=None, max_days=None):
+        """Apply retention; returns (deleted, thinned) row counts"""
+        now = now or time.time()
+        raw_days = RUN_HISTORY_RAW_DAYS if raw_days is None else raw_days
+        downsample = downsample or RUN_HISTORY_DOWNSAMPLE
+        max_days = RUN_HISTORY_MAX_DAYS if max_days is None else max_days
+        raw_cutoff = now - raw_days * 86400
+        with self._lock, self._db:
+            deleted = self._db.execute(
+                "DELETE FROM runs WHERE recorded_at < ?", (now - max_days * 86400,)
+            ).rowcount
+            groups = {}
+            for row_id, recorded_at, model_hash, prompt_hash, weight in self._db.execute(
+                "SELECT id, recorded_at, model_hash, prompt_hash, weight FROM runs "
+                "WHERE recorded_at < ? ORDER BY id",
+                (raw_cutoff,),
+            ):
+                day = int(recorded_at // 86400)
+                groups.setdefault((day, model_hash, prompt_hash), []).append((row_id, weight))
+
+            thinned = 0
+            for members in groups.values():
+                target = -(-sum(weight for _, weight in members) // downsample)  # ceil
+                if len(members) <= target:
+                    continue  # already thinned
+                # Evenly spaced survivors; weights keep the group's total
+                total = sum(weight for _, weight in members)
+                keep = {members[i * len(members) // target][0] for i in range(target)}
+                drop = [row_id for row_id, _ in members if row_id not in keep]
+                self._db.executemany("DELETE FROM runs WHERE id = ?", [(i,) for i in drop])
+                kept = sorted(keep)
+                for n, row_id in enumerate(kept):
+                    share = total // target + (1 if n < total % target else 0)
+                    self._db.execute("UPDATE runs SET weight = ? WHERE id = ?", (share, row_id))
+                thinned += len(drop)
+        if deleted or thinned:
+            logger.info(f"[History] 🧹 Pruned run history: {deleted} expired, {thinned} thinned")
+        return deleted, thinned
+
+
+run_history = None
+if RUN_HISTORY_DB:
+    try:
+        run_history = RunHistory(RUN_HISTORY_DB)
+    except sqlite3.Error as e:
+        logger.warning(f"[History] ⚠️ Run history unavailable ({e})")
+
+
+class recorded_run:
+    """Context manager that appends the run to run_history when it finishes"""
+
+    def __init__(self, run, kind="run", start_node="research"):
+        self.run = run
+        self.kind = kind
+        self.start_node = start_node
+
+    def __enter__(self):
+        return self.run
+
+    def __exit__(self, exc_type, exc, tb):
+        if run_history is None:
+            return False
+        status = "ok" if exc_type is None else type(exc).__name__
+        try:
+            run_history.insert(RunHistory.row(self.run, self.kind, self.start_node, status))
+        except sqlite3.Error as e:
+            logger.warning(f"[History] ⚠️ Could not record run {self.run.run_id}: {e}")
+        return False
@@ -0,0 +1,322 @@
+"""
+Persistence sink: write generated posts straight to the posts table.
+
+Requests opt in with a "persist" option naming the parent movie row ({"id",
+"title", "tags", "images"}) instead of getting the posts back for the caller
+to save one by one; its posts are upserted on slug in bulk batches and the
+movie is marked processed alongside them. The response then reports
+"persisted" and the caller skips its own writes; on "persist_error" it saves
+the posts itself, upserting on the same slugs (slugify matches
+ingestMovies.js).
+
+AGENT_PERSIST_SINK: "off" (default), "supabase" (PostgREST at
+AGENT_PERSIST_URL, default PUBLIC_SUPABASE_URL) or "sqlite"
+(AGENT_PERSIST_SQLITE, for local runs). The supabase sink writes with
+SUPABASE_SERVICE_ROLE_KEY and stays disabled without it. Over PostgREST a
+batch is one bulk upsert plus one PATCH for its movies, retried together:
+both are idempotent, so retrying a batch whose PATCH failed rewrites the same
+rows instead of adding posts. In SQLite a batch is a single transaction; the
+local table holds only the generated posts (the movies stay in the caller's
+database), so the SQLite sink does not mark movies processed.
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import research
+
+logger = logging.getLogger("research-agent")
+
+PERSIST_SINKS = ("off", "supabase", "sqlite")
+PERSIST_SINK = os.getenv("AGENT_PERSIST_SINK", "off")
+if PERSIST_SINK not in PERSIST_SINKS:
+    logger.warning(f"[Persist] ⚠️ Unknown AGENT_PERSIST_SINK '{PERSIST_SINK}', using 'off'")
+    PERSIST_SINK = "off"
+PERSIST_URL = os.getenv("AGENT_PERSIST_URL") or os.getenv("PUBLIC_SUPABASE_URL", "")
+PERSIST_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
+PERSIST_SQLITE = os.getenv(
+    "AGENT_PERSIST_SQLITE", os.path.join(tempfile.gettempdir(), "posts.sqlite3")
+)
+PERSIST_TABLE = os.getenv("AGENT_PERSIST_TABLE", "posts")
+PERSIST_BATCH_SIZE = int(os.getenv("AGENT_PERSIST_BATCH_SIZE", "100"))
+PERSIST_RETRIES = int(os.getenv("AGENT_PERSIST_RETRIES", "3"))
+PERSIST_BACKOFF_S = float(os.getenv("AGENT_PERSIST_BACKOFF_S", "0.5"))
+PERSIST_TIMEOUT_S = float(os.getenv("AGENT_PERSIST_TIMEOUT_S", "10"))
+
+# Columns of a generated post row, as ingestMovies.js writes them
+POST_ROW_COLUMNS = (
+    "title",
+    "slug",
+    "content",
+    "draft",
+    "sources",
+    "tags",
+    "published_at",
+    "images",
+    "parent_id",
+    "is_movie",
+    "processed",
+    "topic_ref",
+    "seo_title",
+    "seo_desc",
+)
+
+
+class PersistError(Exception):
+    pass
+
+
+def slugify(text):
+    """URL-friendly slug, matching slugify() in ingestMovies.js"""
+    text = re.sub(r"\s+", "-", str(text).lower().strip())
+    text = re.sub(r"[^\w\-]+", "", text, flags=re.ASCII)
+    text = re.sub(r"\-\-+", "-", text)
+    return text.strip("-")
+
+
+def _utc_timestamp():
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def post_rows(movie, posts, published_at=None):
+    """Rows for a movie's generated posts (upsert key: slug, as ingestMovies.js writes it)"""
+    published_at = published_at or _utc_timestamp()
+    return [
+        {
+            "title": post["title"],
+            "slug": slugify(post["title"]),
+            "content": post.get("final", ""),
+            "draft": post.get("draft", ""),
+            "sources": post.get("sources", []),
+            "tags": [*(movie.get("tags") or []), "generated"],
+            "published_at": published_at,
+            "images": movie.get("images") or [],
+            "parent_id": movie["id"],
+            "is_movie": False,
+            "processed": True,
+            "topic_ref": movie["title"],
+            "seo_title": post.get("seo_title", ""),
+            "seo_desc": post.get("seo_description", ""),
+        }
+        for post in posts
+        if post.get("title")
+    ]
+
+
+class PostSink(ABC):
+    """Bulk, retried, idempotent writes of generated posts; see subclasses"""
+
+    def __init__(self, batch_size=None, retries=None, backoff_s=None):
+        self.batch_size = batch_size or PERSIST_BATCH_SIZE
+        self.retries = PERSIST_RETRIES if retries is None else retries
+        self.backoff_s = PERSIST_BACKOFF_S if backoff_s is None else backoff_s
+
+    def _transient(self, exc):
+        return False
+
+    @abstractmethod
+    def _write_batch(self, rows, movie_ids):
+        """Write one batch of post rows and mark movie_ids processed; safe to repeat"""
+
+    def _with_retries(self, fn, *args):
+        for attempt in range(self.retries + 1):
+            try:
+                return fn(*args)
+            except Exception as e:
+                if attempt == self.retries or not self._transient(e):
+                    raise PersistError(f"{type(e).__name__}: {e}") from e
+                delay = self.backoff_s * 2**attempt * random.uniform(0.5, 1.0)
+                logger.warning(
+                    f"[Persist] ⚠️ Write failed ({type(e).__name__}), retry {attempt + 1} in {delay:.2f}s"
+                )
+                time.sleep(delay)
+
+    def persist(self, entries):
+        """
+        Write [(movie, posts), ...]. Returns {"posts", "dropped", "movies",
+        "batches"}, "dropped" counting posts replaced by a later post with the
+        same slug; raises PersistError once a batch has exhausted its retries.
+        """
+        published_at = _utc_timestamp()
+        rows, movie_ids, dropped = {}, [], 0
+        for movie, posts in entries:
+            # Last write wins for a repeated slug (one upsert cannot touch a row twice)
+            for row in post_rows(movie, posts, published_at):
+                previous = rows.get(row["slug"])
+                if previous:
+                    dropped += 1
+                    logger.warning(
+                        f"[Persist] ⚠️ Slug '{row['slug']}' repeated (movies {previous['parent_id']} "
+                        f"and {row['parent_id']}), dropping the earlier post"
+                    )
+                rows[row["slug"]] = row
+            movie_ids.append(movie["id"])
+        rows = list(rows.values())
+        movie_ids = list(dict.fromkeys(movie_ids))
+
+        batches = 0
+        started = time.perf_counter()
+        for i in range(0, max(len(rows), 1), self.batch_size):
+            batch = rows[i : i + self.batch_size]
+            # Movies are marked processed with the last batch of their posts
+            batch_ids = movie_ids if i + self.batch_size >= len(rows) else []
+            self._with_retries(self._write_batch, batch, batch_ids)
+            batches += 1
+        logger.info(
+            f"[Persist] 💾 Wrote {len(rows)} posts for {len(movie_ids)} movies in {batches} "
+            f"batches ({(time.perf_counter() - started) * 1000:.0f}ms)"
+        )
+        run = research.current_run()
+        if run:
+            run.count("persist.posts", len(rows))
+            run.count("persist.slug_collisions", dropped)
+            run.count("persist.batches", batches)
+        return {"posts": len(rows), "dropped": dropped, "movies": movie_ids, "batches": batches}
+
+
+class PostgrestSink(PostSink):
+    """Supabase (or any PostgREST) table: bulk upsert on slug + one PATCH per batch"""
+
+    def __init__(self, base_url, api_key="", table=None, timeout=None, **kwargs):
+        super().__init__(**kwargs)
+        self.endpoint = f"{base_url.rstrip('/')}/rest/v1/{table or PERSIST_TABLE}"
+        self.timeout = timeout or PERSIST_TIMEOUT_S
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        if api_key:
+            self.session.headers.update({"apikey": api_key, "Authorization": f"Bearer {api_key}"})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _transient(self, exc):
+        if isinstance(exc, requests.HTTPError):
+            return exc.response.status_code in (408, 429) or exc.response.status_code >= 500
+        return isinstance(exc, requests.RequestException)
+
+    def _write_batch(self, rows, movie_ids):
+        if rows:
+            response = self.session.post(
+                self.endpoint,
+                params={"on_conflict": "slug"},
+                headers={"Prefer": "resolution=merge-duplicates,return=minimal"},
+                data=json.dumps(rows),
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+        if movie_ids:
+            response = self.session.patch(
+                self.endpoint,
+                params={"id": f"in.({','.join(str(i) for i in movie_ids)})"},
+                headers={"Prefer": "return=minimal"},
+                data=json.dumps({"processed": True}),
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+
+
+class SqliteSink(PostSink):
+    """Local table of generated posts; each batch is one transaction"""
+
+    JSON_COLUMNS = ("sources", "tags", "images")
+
+    def __init__(self, path, table=None, **kwargs):
+        super().__init__(**kwargs)
+        self.table = table or PERSIST_TABLE
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=PERSIST_TIMEOUT_S)
+        with self._lock, self._db:
+            self._db.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    id INTEGER PRIMARY KEY,
+                    title TEXT, slug TEXT UNIQUE, content TEXT, draft TEXT,
+                    sources TEXT, tags TEXT, published_at TEXT, images TEXT,
+                    parent_id INTEGER, is_movie INTEGER, processed INTEGER,
+                    topic_ref TEXT, seo_title TEXT, seo_desc TEXT
+                )
+                """
+            )
+
+    def _transient(self, exc):
+        return isinstance(exc, sqlite3.OperationalError)  # database is locked
+
+    def _write_batch(self, rows, movie_ids):
+        # No movie rows here: their ids would only match unrelated post ids
+        columns = ", ".join(POST_ROW_COLUMNS)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in POST_ROW_COLUMNS if c != "slug")
+        values = [
+            tuple(
+                json.dumps(row[c]) if c in self.JSON_COLUMNS else row[c]
+                for c in POST_ROW_COLUMNS
+            )
+            for row in rows
+        ]
+        with self._lock, self._db:
+            self._db.executemany(
+                f"INSERT INTO {self.table} ({columns}) "
+                f"VALUES ({', '.join('?' for _ in POST_ROW_COLUMNS)}) "
+                f"ON CONFLICT(slug) DO UPDATE SET {updates}",
+                values,
+            )
+
+
+def build_post_sink(mode=None):
+    mode = mode or PERSIST_SINK
+    if mode == "supabase":
+        if not PERSIST_URL:
+            logger.warning("[Persist] ⚠️ AGENT_PERSIST_SINK=supabase without a URL, sink disabled")
+            return None
+        if not PERSIST_KEY:
+            logger.warning(
+                "[Persist] ⚠️ AGENT_PERSIST_SINK=supabase without SUPABASE_SERVICE_ROLE_KEY, sink disabled"
+            )
+            return None
+        return PostgrestSink(PERSIST_URL, PERSIST_KEY)
+    if mode == "sqlite":
+        try:
+            return SqliteSink(PERSIST_SQLITE)
+        except sqlite3.Error as e:
+            logger.warning(f"[Persist] ⚠️ SQLite sink unavailable ({e}), sink disabled")
+            return None
+    return None
+
+
+post_sink = build_post_sink()
+if post_sink:
+    logger.info(f"[Persist] 💾 Persisting posts via {type(post_sink).__name__}")
+
+
+def parse_persist_option(movie):
+    """Validate a "persist" movie ({"id", "title", ...}); returns (movie, error_message)"""
+    if not isinstance(movie, dict) or movie.get("id") is None:
+        return None, "persist must be an object with the parent movie's id"
+    if not isinstance(movie.get("title"), str) or not movie["title"].strip():
+        return None, "persist.title must be a non-empty string"
+    for key in ("tags", "images"):
+        if not isinstance(movie.get(key) or [], list):
+            return None, f"persist.{key} must be a list"
+    return movie, None
+
+
+def persist_posts(entries):
+    """Persist [(movie, posts), ...]; returns response fields ("persisted" or "persist_error")"""
+    if post_sink is None:
+        return {}
+    try:
+        return {"persisted": post_sink.persist(entries)}
+    except PersistError as e:
+        logger.error(f"[Persist] 💥 Giving up on {len(entries)} movies: {e}")
+        return {"persist_error": str(e)}
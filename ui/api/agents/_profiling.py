@@ -0,0 +1,303 @@
+"""
+Opt-in per-run profiling for the research agent.
+
+Enabled by an X-Profile-Token header matching AGENT_PROFILE_TOKEN or by
+AGENT_PROFILE=1. A sampler thread walks the stacks of every thread working
+for the run (node threads plus pool workers submitted via
+research.submit_with_context) and attributes wall time to the node in
+progress, so network waits show up alongside parsing and logging.
+tracemalloc snapshots around each node attribute allocations. Each run writes
+a speedscope profile (one sampled profile per node) and a summary JSON to
+PROFILE_DIR.
+
+cProfile is not used: from Python 3.12 only one instance can be active per
+process, so it cannot follow a node's work into pool threads.
+"""
+
+import hmac
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from functools import wraps
+
+logger = logging.getLogger("research-agent")
+
+PROFILE_TOKEN = os.getenv("AGENT_PROFILE_TOKEN", "")
+PROFILE_ALWAYS = os.getenv("AGENT_PROFILE", "0") == "1"
+PROFILE_DIR = os.getenv("AGENT_PROFILE_DIR", "/tmp/agent-profiles")
+PROFILE_MAX_FILES = int(os.getenv("AGENT_PROFILE_MAX_FILES", "40"))
+# Env-enabled profiling takes at most one run per interval; header requests are exempt
+PROFILE_MIN_INTERVAL_S = float(os.getenv("AGENT_PROFILE_MIN_INTERVAL_S", "60"))
+PROFILE_INTERVAL_MS = float(os.getenv("AGENT_PROFILE_INTERVAL_MS", "5"))
+# Sampling backs off and allocation snapshots are skipped once profiling cost
+# exceeds this share of wall time
+PROFILE_MAX_OVERHEAD = float(os.getenv("AGENT_PROFILE_MAX_OVERHEAD", "0.05"))
+PROFILE_MEMORY = os.getenv("AGENT_PROFILE_MEMORY", "1") == "1"
+PROFILE_MAX_DEPTH = 64
+PROFILE_TOP_N = 10
+
+_profile_slot = threading.Lock()  # one profiled run at a time
+_last_env_profile = 0.0
+
+
+def profile_requested(header_token=""):
+    """Whether a run should be profiled (header token must match AGENT_PROFILE_TOKEN)"""
+    global _last_env_profile
+    if header_token:
+        if PROFILE_TOKEN and hmac.compare_digest(header_token, PROFILE_TOKEN):
+            return True
+        logger.warning("[Profile] ⚠️ Ignoring profile request with an invalid token")
+        return False
+    if not PROFILE_ALWAYS:
+        return False
+    now = time.time()
+    if now - _last_env_profile < PROFILE_MIN_INTERVAL_S:
+        return False
+    _last_env_profile = now
+    return True
+
+
+class RunProfile:
+    """Samples stacks and allocations of one run, attributed per pipeline node"""
+
+    def __init__(self, run_id):
+        self.run_id = run_id
+        self.started = time.perf_counter()
+        self.interval = PROFILE_INTERVAL_MS / 1000
+        self.frames = []  # speedscope shared frame table
+        self.frame_index = {}
+        self.samples = {}  # node -> ([stack, ...], [weight_ms, ...])
+        self.nodes = {}  # node -> wall/allocation summary
+        self.current_node = None
+        self.sampler_ms = 0.0
+        self.memory_ms = 0.0
+        self._threads = {}  # thread ident -> node
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+        self._started_tracemalloc = False
+
+    def start(self):
+        if PROFILE_MEMORY and not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+            self._started_tracemalloc = True
+        self._sampler = threading.Thread(
+            target=self._sample_loop, name=f"profile-{self.run_id}", daemon=True
+        )
+        self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+    def _frame_id(self, code, line):
+        key = (code.co_name, code.co_filename, line)
+        index = self.frame_index.get(key)
+        if index is None:
+            index = self.frame_index[key] = len(self.frames)
+            self.frames.append({"name": code.co_name, "file": code.co_filename, "line": line})
+        return index
+
+    def _sample_loop(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            tick = time.perf_counter()
+            weight_ms = (tick - last) * 1000
+            last = tick
+            with self._lock:
+                threads = dict(self._threads)
+            frames = sys._current_frames()
+            for ident, node in threads.items():
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None and len(stack) < PROFILE_MAX_DEPTH:
+                    stack.append(self._frame_id(frame.f_code, frame.f_lineno))
+                    frame = frame.f_back
+                if stack:
+                    stacks, weights = self.samples.setdefault(node, ([], []))
+                    stacks.append(stack[::-1])
+                    weights.append(weight_ms)
+            del frames
+            cost = time.perf_counter() - tick
+            self.sampler_ms += cost * 1000
+            # Hard overhead cap: stretch the interval until cost/interval fits
+            if cost > self.interval * PROFILE_MAX_OVERHEAD:
+                self.interval = min(self.interval * 2, 1.0)
+
+    def _within_budget(self):
+        """Whether profiling cost so far is under PROFILE_MAX_OVERHEAD of elapsed time"""
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        return self.sampler_ms + self.memory_ms <= PROFILE_MAX_OVERHEAD * elapsed_ms or not self.nodes
+
+    def _attach(self, node):
+        with self._lock:
+            self._threads[threading.get_ident()] = node
+
+    def _detach(self):
+        with self._lock:
+            self._threads.pop(threading.get_ident(), None)
+
+    def run_node(self, name, fn, state):
+        """Run one node with its thread sampled and its allocations measured"""
+        self.current_node = name
+        before = None
+        if tracemalloc.is_tracing() and self._within_budget():
+            t0 = time.perf_counter()
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+            self.memory_ms += (time.perf_counter() - t0) * 1000
+        self._attach(name)
+        started = time.perf_counter()
+        try:
+            return fn(state)
+        finally:
+            wall_ms = (time.perf_counter() - started) * 1000
+            self._detach()
+            summary = {"wall_ms": round(wall_ms, 1)}
+            if before is not None:
+                t0 = time.perf_counter()
+                after = tracemalloc.take_snapshot()
+                diff = after.compare_to(before, "lineno")
+                summary["alloc_kb"] = round(sum(d.size_diff for d in diff) / 1024, 1)
+                summary["peak_kb"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+                summary["top_allocations"] = [
+                    {"site": str(d.traceback[0]), "kb": round(d.size_diff / 1024, 1), "count": d.count_diff}
+                    for d in diff[:PROFILE_TOP_N]
+                ]
+                self.memory_ms += (time.perf_counter() - t0) * 1000
+            self.nodes[name] = summary
+
+    def worker(self, fn):
+        """Wrap a pool task so its thread is sampled under the submitting node"""
+        node = self.current_node
+
+        @wraps(fn)
+        def sampled(*args, **kwargs):
+            self._attach(node)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._detach()
+
+        return sampled
+
+    def _top_self(self, node):
+        stacks, weights = self.samples.get(node, ([], []))
+        totals = {}
+        for stack, weight in zip(stacks, weights):
+            totals[stack[-1]] = totals.get(stack[-1], 0) + weight
+        top = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:PROFILE_TOP_N]
+        return [
+            {
+                "frame": f"{self.frames[i]['name']} ({os.path.basename(self.frames[i]['file'])}:{self.frames[i]['line']})",
+                "ms": round(ms, 1),
+            }
+            for i, ms in top
+        ]
+
+    def write(self):
+        """Write <stamp>-<run_id>.speedscope.json and .summary.json; returns the summary"""
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        profiles = []
+        for node, (stacks, weights) in self.samples.items():
+            profiles.append(
+                {
+                    "type": "sampled",
+                    "name": node,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": round(sum(weights), 3),
+                    "samples": stacks,
+                    "weights": [round(w, 3) for w in weights],
+                }
+            )
+        summary = {
+            "run_id": self.run_id,
+            "elapsed_ms": round(elapsed_ms, 1),
+            "sampler_ms": round(self.sampler_ms, 1),
+            "memory_ms": round(self.memory_ms, 1),
+            "overhead_pct": round((self.sampler_ms + self.memory_ms) / max(elapsed_ms, 1) * 100, 2),
+            "final_interval_ms": round(self.interval * 1000, 1),
+            "nodes": {
+                node: dict(self.nodes.get(node, {}), top_self=self._top_self(node))
+                for node in dict.fromkeys(list(self.nodes) + list(self.samples))
+            },
+        }
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{self.run_id}")
+        with open(f"{base}.speedscope.json", "w") as f:
+            json.dump(
+                {
+                    "$schema": "https://www.speedscope.app/file-format-schema.json",
+                    "name": f"research run {self.run_id}",
+                    "exporter": "research-agent",
+                    "shared": {"frames": self.frames},
+                    "profiles": profiles,
+                },
+                f,
+            )
+        with open(f"{base}.summary.json", "w") as f:
+            json.dump(summary, f, indent=2)
+        summary["path"] = f"{base}.speedscope.json"
+        prune_profiles()
+        return summary
+
+
+def prune_profiles(max_files=None):
+    """Delete the oldest profile files beyond max_files"""
+    max_files = PROFILE_MAX_FILES if max_files is None else max_files
+    try:
+        names = [n for n in os.listdir(PROFILE_DIR) if n.endswith(".json")]
+    except OSError:
+        return
+    paths = sorted((os.path.join(PROFILE_DIR, n) for n in names), key=os.path.getmtime)
+    for path in paths[: max(0, len(paths) - max_files)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class profile_run:
+    """Context manager that profiles the current run when requested and a slot is free"""
+
+    def __init__(self, run, requested):
+        self.run = run
+        self.requested = requested
+        self.summary = None
+
+    def __enter__(self):
+        if self.requested:
+            if _profile_slot.acquire(blocking=False):
+                self.run.profile = RunProfile(self.run.run_id)
+                self.run.profile.start()
+                logger.info(f"[Profile] 🔬 Profiling run {self.run.run_id}")
+            else:
+                logger.info("[Profile] ⏭️ Another run is being profiled, skipping")
+        return self
+
+    def __exit__(self, *exc):
+        profile = self.run.profile
+        if profile is None:
+            return False
+        try:
+            profile.stop()
+            self.summary = profile.write()
+            logger.info(
+                f"[Profile] 💾 Wrote {self.summary['path']} "
+                f"(overhead {self.summary['overhead_pct']}%)"
+            )
+        except Exception as e:
+            logger.warning(f"[Profile] ⚠️ Failed to write profile: {e}")
+        finally:
+            self.run.profile = None
+            _profile_slot.release()
+        return False
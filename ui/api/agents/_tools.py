@@ -0,0 +1,1663 @@
+"""
+Developer tooling for the research agent: benchmarks and diagnostics.
+
+Underscore-prefixed files under api/ are not deployed as Vercel functions,
+so this module only runs locally. From this directory:
+
+    python _tools.py bench-encoding
+    python _tools.py bench-speculative --runs 5 --scale 0.01
+    python _tools.py bench-draft-modes --runs 5 --scale 0.01
+    python _tools.py serve-batch-stub --port 8765
+    python _tools.py bench-batch --movies 10 --scale 0.001
+    python _tools.py bench-sources --urls 60 --delay-ms 150
+    python _tools.py bench-transport --connect-ms 120 --idle-s 6
+    python _tools.py bench-tracing --runs 20 --calls 10
+    python _tools.py bench-edit-fast-path --runs 5 --scale 0.01
+    python _tools.py bench-research-cache --entries 50000
+    python _tools.py bench-locales --locales en,es,pt --runs 5 --scale 0.01
+    python _tools.py bench-research-modes --runs 20 --scale 0.01
+    python _tools.py bench-selection-modes --runs 20 --scale 0.01
+    python _tools.py bench-incremental --movies 20 --scale 0.01
+    python _tools.py serve-postgrest-stub --port 8766
+    python _tools.py bench-persist --movies 20 --latency-ms 40 --fail-every 7
+    python _tools.py history-report --days 7 --bucket-hours 24
+    python _tools.py history-regressions --days 14 --alpha 0.01
+    python _tools.py history-prune --raw-days 7 --downsample 10 --max-days 90
+    python _tools.py bench-history --runs 30 --scale 0.01
+    python _tools.py bench-priority --batch-workers 24 --slots 8 --scale 0.01
+    python _tools.py bench-prefetch --movies 10 --scale 0.01
+    python _tools.py load-test --concurrency 16 --duration 30 --scale 0.001
+    python _tools.py bench-breaker --requests 6 --timeout-s 2
+    python _tools.py bench-breaker --requests 3 --timeout-s 120
+
+Pipeline benchmarks use the offline fake backend (_fakes.FakeOpenAI), whose
+simulated latencies are scaled by --scale and reported back at full scale.
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import math
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+# Keep the agent's import-time and HTTP client DEBUG chatter out of benchmark output
+for name in ("research-agent", "urllib3", "openai", "httpx", "httpcore", "httpx2", "httpcore2", "langsmith"):
+    logging.getLogger(name).setLevel(logging.WARNING)
+
+import _batch  # noqa: E402
+import _fakes  # noqa: E402
+import _history  # noqa: E402
+import _persist  # noqa: E402
+import research  # noqa: E402
+from _fakes import enable_fake_backend, start_batch_stub, start_postgrest_stub  # noqa: E402
+
+# Pipeline benchmarks reuse topic names across modes; measure them uncached
+research.research_cache = None
+# and keep benchmark and load-test runs out of the run history
+_history.run_history = None
+
+logger = logging.getLogger("research-agent.tools")
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def _timed(fn, repeat):
+    """Run fn repeat times; returns (last_result, median_ms)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(timings)
+
+
+_SAMPLE_WORDS = (
+    "the a sequel studio director cast trailer fans box office streaming release "
+    "franchise premiere audiences critics reboot festival award actor actress "
+    "season weekend opening record global domestic rumor confirmed insider "
+    "producer writer script delay budget marketing reviews rating score audience "
+    "theater digital platform exclusive finale villain hero origin story casting "
+    "shoot production wrapped announced revealed teased poster first look debut "
+    "anniversary legacy remake spinoff prequel universe crossover cameo soundtrack "
+    "composer effects visual epic drama comedy horror thriller animated blockbuster "
+    "indie summer holiday billion million dollars tickets sold fans online social "
+    "media buzz viral reaction trending interview podcast panel convention comic"
+).split()
+
+
+def _sample_paragraphs(seed, count, sentences=3):
+    rng = random.Random(seed)
+    return [
+        " ".join(
+            " ".join(rng.choices(_SAMPLE_WORDS, k=rng.randint(10, 18))).capitalize() + "."
+            for _ in range(sentences)
+        )
+        for _ in range(count)
+    ]
+
+
+def sample_post(seed=0):
+    """A post with realistic field sizes (~450 word draft and final)"""
+    body = _sample_paragraphs(seed, 8)
+    article = "\n\n".join(
+        [body[0], "## What Happened"] + body[1:4] + ["## Why It Matters"] + body[4:]
+    )
+    return {
+        "topic": f"Movie news topic {seed} - " + " ".join(_sample_paragraphs(seed, 2)),
+        "title": f"Sequel {seed} Just Changed Everything",
+        "draft": article,
+        "final": article.replace("the", "a"),
+        "sources": [f"https://news.example.com/story/{seed}/{n}" for n in range(4)],
+        "seo_title": f"Sequel {seed}: Cast, Release Date and Box Office",
+        "seo_description": "Everything we know about the sequel so far. " * 3,
+    }
+
+
+# USD per 1M tokens (input, output) for rough cost estimates
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+
+
+def estimate_cost(calls):
+    """Estimated USD cost of a list of RunContext call records"""
+    total = 0.0
+    for call in calls:
+        price_in, price_out = MODEL_PRICES.get(call["model"], MODEL_PRICES["gpt-4o-mini"])
+        total += call.get("input_tokens", 0) * price_in / 1e6
+        total += call.get("output_tokens", 0) * price_out / 1e6
+    return total
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _wait_for_threads(prefix, timeout=60):
+    """Join background threads (e.g. discarded speculative drafts) by name prefix"""
+    deadline = time.time() + timeout
+    for thread in threading.enumerate():
+        if thread.name.startswith(prefix):
+            thread.join(max(0.0, deadline - time.time()))
+
+
+def run_pipeline(initial_state, wait_prefix=None):
+    """Invoke the compiled graph in a fresh run; returns (result, elapsed_ms, run)"""
+    with research.run_context() as run:
+        started = time.perf_counter()
+        result = research.compiled_graph.invoke(initial_state)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    if wait_prefix:
+        _wait_for_threads(wait_prefix)
+    return result, elapsed_ms, run
+
+
+def _sources_per_post(result):
+    posts = result.get("posts", [])
+    return sum(len(p.get("sources", [])) for p in posts) / len(posts) if posts else 0.0
+
+
+def print_mode_table(rows, scale):
+    """rows: [(label, [(elapsed_ms, run, result), ...])]; latencies shown at full scale"""
+    print(
+        f"{'mode':<24} {'p50 s':>8} {'p95 s':>8} {'calls':>6} {'in tok':>8} "
+        f"{'out tok':>8} {'$/run':>9} {'src/post':>9}"
+    )
+    for label, samples in rows:
+        elapsed = [ms / scale / 1000 for ms, _, _ in samples]
+        summaries = [run.summary() for _, run, _ in samples]
+        calls = statistics.mean(s["llm_calls"] for s in summaries)
+        tokens_in = statistics.mean(s["input_tokens"] for s in summaries)
+        tokens_out = statistics.mean(s["output_tokens"] for s in summaries)
+        cost = statistics.mean(estimate_cost(run.calls) for _, run, _ in samples)
+        sources = statistics.mean(_sources_per_post(result) for _, _, result in samples)
+        print(
+            f"{label:<24} {_percentile(elapsed, 50):>8.1f} {_percentile(elapsed, 95):>8.1f} "
+            f"{calls:>6.1f} {tokens_in:>8.0f} {tokens_out:>8.0f} {cost:>9.5f} {sources:>9.1f}"
+        )
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Local Stand-ins
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+LINK_STUB_PATHS = {
+    # path: (HEAD status, GET status, expected verdict)
+    "ok": (200, 200, "ok"),
+    "gone": (410, 410, "dead"),
+    "missing": (404, 404, "dead"),
+    "nohead": (405, 200, "ok"),
+    "forbidden": (403, 403, "unknown"),
+    "broken": (500, 500, "unknown"),
+}
+
+
+def make_link_stub_handler(delay_ms=0):
+    class LinkStubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _respond(self, head):
+            time.sleep(delay_ms / 1000)
+            kind = self.path.strip("/").split("/")[0]
+            head_status, get_status, _ = LINK_STUB_PATHS.get(kind, (404, 404, "dead"))
+            body = b"<html>stub</html>"
+            self.send_response(head_status if head else get_status)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if not head:
+                self.wfile.write(body)
+
+        def do_HEAD(self):
+            self._respond(head=True)
+
+        def do_GET(self):
+            self._respond(head=False)
+
+    return LinkStubHandler
+
+
+def start_link_stub(port=0, delay_ms=0):
+    """Start a local link-checking target; returns (server, base_url)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_link_stub_handler(delay_ms))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def make_openai_stub_handler(connect_ms=0, latency_ms=0):
+    class OpenAIStubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def setup(self):
+            # Once per connection: stands in for DNS + TCP + TLS setup
+            time.sleep(connect_ms / 1000)
+            super().setup()
+
+        def _json(self, data):
+            body = json.dumps(data).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._json({"object": "list", "data": []})
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency_ms / 1000)
+            self._json(
+                {
+                    "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": "gpt-4o-mini",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "ok"},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6},
+                }
+            )
+
+    return OpenAIStubHandler
+
+
+def start_openai_stub(port=0, connect_ms=0, latency_ms=0):
+    """Start a minimal chat-completions endpoint; returns (server, base_url)"""
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", port), make_openai_stub_handler(connect_ms, latency_ms)
+    )
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def start_langsmith_stub(port=0, latency_ms=0):
+    """Accept-everything LangSmith endpoint; returns (server, base_url, counter)"""
+    received = {"requests": 0, "bytes": 0}
+
+    class LangSmithStubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, status=202):
+            body = b"{}"
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._reply(200)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+            time.sleep(latency_ms / 1000)
+            received["requests"] += 1
+            received["bytes"] += length
+            self._reply()
+
+        do_PATCH = do_POST
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), LangSmithStubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", received
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Benchmarks
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def bench_encoding(args):
+    """Bytes on the wire and encode time for typical agent responses"""
+    single = {
+        "status": "success",
+        "message": "Research completed successfully",
+        "posts": [sample_post(i) for i in range(3)],
+        "topic_count": 3,
+        "original_topic": "Dune",
+    }
+    batch = {
+        "status": "success",
+        "results": [
+            {
+                "original_topic": f"Movie {t}",
+                "posts": [sample_post(t * 3 + i) for i in range(3)],
+                "topic_count": 3,
+            }
+            for t in range(50)
+        ],
+    }
+    ingest_fields = [f for f in research.POST_FIELDS if f not in ("draft", "topic")]
+
+    def shaped(payload):
+        if "posts" in payload:
+            return {**payload, "posts": research.shape_posts(payload["posts"], ingest_fields)}
+        return {
+            **payload,
+            "results": [
+                {**r, "posts": research.shape_posts(r["posts"], ingest_fields)}
+                for r in payload["results"]
+            ],
+        }
+
+    variants = [
+        ("indent=2 (old)", False, True, ""),
+        ("compact", False, False, ""),
+        ("compact + fields", True, False, ""),
+        ("compact + gzip", False, False, "gzip"),
+        ("compact + fields + gzip", True, False, "gzip"),
+    ]
+    if research.brotli is not None:
+        variants.append(("compact + fields + br", True, False, "br"))
+
+    print(f"{'payload':<16} {'variant':<26} {'bytes':>9} {'encode ms':>10}")
+    for name, payload in (("3-post single", single), ("50-topic batch", batch)):
+        for label, use_fields, pretty, accept in variants:
+            data = shaped(payload) if use_fields else payload
+            (body, _), ms = _timed(
+                lambda: research.encode_json_response(data, accept, pretty=pretty),
+                args.repeat,
+            )
+            print(f"{name:<16} {label:<26} {len(body):>9} {ms:>10.2f}")
+
+
+def bench_speculative(args):
+    """Latency and cost of sequential vs speculative drafting (fake backend)"""
+    enable_fake_backend(latency_scale=args.scale)
+    rows = []
+    for label, speculative in (("sequential", False), ("speculative", True)):
+        samples = []
+        for n in range(args.runs):
+            result, elapsed_ms, run = run_pipeline(
+                {"topic": f"Dune {n}", "speculative": speculative},
+                wait_prefix="speculative-draft",
+            )
+            samples.append((elapsed_ms, run, result))
+        rows.append((label, samples))
+    print_mode_table(rows, args.scale)
+
+
+def bench_draft_modes(args):
+    """Latency, tokens and sources per draft search mode (fake backend)"""
+    enable_fake_backend(latency_scale=args.scale)
+    rows = []
+    for mode in research.DRAFT_SEARCH_MODES:
+        samples = []
+        for n in range(args.runs):
+            result, elapsed_ms, run = run_pipeline({"topic": f"Dune {n}", "draft_search": mode})
+            samples.append((elapsed_ms, run, result))
+        rows.append((mode, samples))
+    print_mode_table(rows, args.scale)
+
+
+def bench_edit_fast_path(args):
+    """Latency, cost and gate pass rate per edit fast-path mode (fake backend)"""
+    enable_fake_backend(latency_scale=args.scale)
+    rows, gate = [], {}
+    # "off" first so the fast paths have full-edit latencies to compare against
+    for mode in sorted(research.EDIT_FAST_PATH_MODES, key=lambda m: m != "off"):
+        samples = []
+        for n in range(args.runs):
+            result, elapsed_ms, run = run_pipeline({"topic": f"Dune {n}", "edit_fast_path": mode})
+            samples.append((elapsed_ms, run, result))
+        counters = [run.summary()["counters"] for _, run, _ in samples]
+        checked = sum(c.get("edit.gate_checked", 0) for c in counters)
+        passed = sum(c.get("edit.gate_passed", 0) for c in counters)
+        saved = sum(c.get("edit.latency_saved_ms", 0) for c in counters) / args.scale / 1000
+        gate[mode] = (passed, checked, saved / args.runs)
+        rows.append((mode, samples))
+    print_mode_table(rows, args.scale)
+    for mode, (passed, checked, saved) in gate.items():
+        if checked:
+            print(f"{mode}: gate passed {passed}/{checked}, ~{saved:.1f}s edit latency saved per run")
+
+
+def bench_research_cache(args):
+    """Similarity decisions for related titles and lookup latency at scale"""
+    import numpy as np
+
+    cache = research.SemanticResearchCache(max_entries=args.entries)
+    item = {"title": "t", "details": "d", "url": "https://example.com"}
+    cache.store("Dune", ["t"] * 5, [item] * 5)
+    print(f"{'query':<28} {'similarity':>10}  decision (reuse >= {research.RESEARCH_CACHE_REUSE}, delta >= {research.RESEARCH_CACHE_DELTA})")
+    for query in (
+        "Dune",
+        "Dune (Re-release)",
+        "DUNE - IMAX 70mm",
+        "Dune: Part Two",
+        "Dune 2",
+        "Dune Messiah",
+        "Dunkirk",
+        "Alien",
+    ):
+        research.research_cache = cache
+        try:
+            decision, _, score = research.research_cache_lookup(query)
+        finally:
+            research.research_cache = None
+        print(f"{query:<28} {score:>10.2f}  {'reuse' if decision == 'hit' else decision}")
+
+    rng = random.Random(0)
+    words = _SAMPLE_WORDS
+    started = time.perf_counter()
+    while len(cache) < args.entries:
+        title = " ".join(rng.choices(words, k=rng.randint(1, 4))).title() + f" {len(cache)}"
+        cache.store(title, ["t"] * 5, [item] * 5)
+    fill_s = time.perf_counter() - started
+
+    queries = [" ".join(rng.choices(words, k=3)) for _ in range(args.queries)]
+    for query in queries:
+        research.topic_vector(query, cache.dims)  # vectors are lru-cached per title
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        cache.lookup(query)
+        samples.append((time.perf_counter() - started) * 1e6)
+    print(
+        f"\n{len(cache)} entries ({cache.dims} dims, {cache._matrix.nbytes / 1e6:.1f} MB matrix, "
+        f"filled in {fill_s:.1f}s, numpy {np.__version__})"
+    )
+    print(
+        f"lookup: p50 {_percentile(samples, 50):.0f}us  p99 {_percentile(samples, 99):.0f}us  "
+        f"max {max(samples):.0f}us"
+    )
+
+
+def bench_locales(args):
+    """Locale editions: one full run per locale vs shared stages + per-locale edit/SEO"""
+    enable_fake_backend(latency_scale=args.scale)
+    locales = args.locales.split(",")
+
+    def per_locale_runs(topic):
+        def one(locale):
+            return research.compiled_graph.invoke({"topic": topic, "locale": locale})
+
+        with ThreadPoolExecutor(max_workers=len(locales)) as pool:
+            futures = [research.submit_with_context(pool, one, locale) for locale in locales]
+            for future in futures:
+                future.result()
+
+    def fan_out(topic):
+        research.run_localized({"topic": topic}, "research", locales)
+
+    print(
+        f"{args.runs} topics, locales {','.join(locales)}, fake LLM latency scale {args.scale} "
+        f"(latency at full scale)"
+    )
+    print(f"{'mode':<16} {'p50':>8} {'calls':>6} {'in tokens':>10} {'out tokens':>11}")
+    for label, fn in (("full run/locale", per_locale_runs), ("shared + fan-out", fan_out)):
+        samples, calls, input_tokens, output_tokens = [], 0, 0, 0
+        for i in range(args.runs):
+            with research.run_context() as run:
+                started = time.perf_counter()
+                fn(f"Locale Movie {label[0]}{i}")
+                samples.append((time.perf_counter() - started) * 1000 / args.scale)
+            summary = run.summary()
+            calls += summary["llm_calls"]
+            input_tokens += summary["input_tokens"]
+            output_tokens += summary["output_tokens"]
+        print(
+            f"{label:<16} {_percentile(samples, 50) / 1000:>7.1f}s {calls / args.runs:>6.1f} "
+            f"{input_tokens / args.runs:>10.0f} {output_tokens / args.runs:>11.0f}"
+        )
+
+
+def bench_research_modes(args):
+    """Research node latency and output: one combined call vs concurrent facet queries"""
+    enable_fake_backend(latency_scale=args.scale)
+    print(f"{args.runs} topics per mode, fake LLM latency scale {args.scale} (latency at full scale)")
+    print(f"{'mode':<8} {'p50':>8} {'p95':>8} {'calls':>6} {'out tokens':>11} {'entries':>8} {'dupes':>6}")
+    for mode in research.RESEARCH_MODES:
+        samples, calls, output_tokens, entries, dupes = [], 0, 0, 0, 0
+        for i in range(args.runs):
+            with research.run_context() as run:
+                started = time.perf_counter()
+                result = research.research_node({"topic": f"Research Movie {i}", "research_mode": mode})
+                samples.append((time.perf_counter() - started) * 1000 / args.scale)
+            summary = run.summary()
+            calls += summary["llm_calls"]
+            output_tokens += summary["output_tokens"]
+            entries += len(result["research_context"])
+            dupes += summary["counters"].get("research.facet_duplicates", 0)
+        print(
+            f"{mode:<8} {_percentile(samples, 50) / 1000:>7.1f}s {_percentile(samples, 95) / 1000:>7.1f}s "
+            f"{calls / args.runs:>6.1f} {output_tokens / args.runs:>11.0f} {entries / args.runs:>8.1f} "
+            f"{dupes / args.runs:>6.1f}"
+        )
+
+
+def bench_selection_modes(args):
+    """Pipeline latency and calls: LLM topic selection vs selection fused into research"""
+    enable_fake_backend(latency_scale=args.scale)
+    print(f"{args.runs} runs per mode, fake LLM latency scale {args.scale} (latency at full scale)")
+    print(
+        f"{'mode':<6} {'p50':>8} {'p95':>8} {'research+select p50':>20} {'calls':>6} "
+        f"{'in tokens':>10} {'out tokens':>11} {'local picks':>12}"
+    )
+    for mode in research.SELECTION_MODES:
+        samples, front, calls, input_tokens, output_tokens, local = [], [], 0, 0, 0, 0
+        for i in range(args.runs):
+            with research.run_context() as run:
+                started = time.perf_counter()
+                research.compiled_graph.invoke({"topic": f"Selection Movie {i}", "selection_mode": mode})
+                samples.append((time.perf_counter() - started) * 1000 / args.scale)
+            summary = run.summary()
+            front.append(
+                (summary["node_ms"].get("research", 0) + summary["node_ms"].get("select_topics", 0))
+                / args.scale
+            )
+            calls += summary["llm_calls"]
+            input_tokens += summary["input_tokens"]
+            output_tokens += summary["output_tokens"]
+            local += summary["counters"].get("select_topics.fused", 0)
+        print(
+            f"{mode:<6} {_percentile(samples, 50) / 1000:>7.1f}s {_percentile(samples, 95) / 1000:>7.1f}s "
+            f"{_percentile(front, 50) / 1000:>19.1f}s {calls / args.runs:>6.1f} "
+            f"{input_tokens / args.runs:>10.0f} {output_tokens / args.runs:>11.0f} {local:>7}/{args.runs}"
+        )
+
+
+def bench_incremental(args):
+    """Daily back-catalogue refresh: full re-research vs incremental research from watermarks"""
+    enable_fake_backend(latency_scale=args.scale)
+    movies = [f"Catalogue Movie {i}" for i in range(args.movies)]
+    print(f"{args.movies} movies, fake LLM latency scale {args.scale} (latency at full scale)")
+    print(f"{'day':<18} {'total':>8} {'calls':>6} {'in tokens':>10} {'out tokens':>11} {'posts':>6} {'skipped':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        research.research_watermarks = research.WatermarkStore(os.path.join(tmp, "watermarks.sqlite3"))
+        for label, incremental in (
+            ("day 1 (full)", False),
+            ("day 2 (full)", False),
+            ("day 2 incremental", True),
+        ):
+            calls = input_tokens = output_tokens = posts = skipped = 0
+            elapsed = 0.0
+            for topic in movies:
+                with research.run_context() as run:
+                    started = time.perf_counter()
+                    result = research.compiled_graph.invoke({"topic": topic, "incremental": incremental})
+                    elapsed += (time.perf_counter() - started) / args.scale
+                summary = run.summary()
+                calls += summary["llm_calls"]
+                input_tokens += summary["input_tokens"]
+                output_tokens += summary["output_tokens"]
+                posts += len(result.get("posts") or [])
+                skipped += bool(result.get("nothing_new"))
+            print(
+                f"{label:<18} {elapsed:>7.0f}s {calls:>6} {input_tokens:>10} {output_tokens:>11} "
+                f"{posts:>6} {skipped:>8}"
+            )
+
+
+def serve_postgrest_stub(args):
+    """Serve the local PostgREST stand-in until interrupted"""
+    server, _, base_url = start_postgrest_stub(args.port, args.latency_ms, args.fail_every)
+    print(f"PostgREST stand-in listening; set AGENT_PERSIST_SINK=supabase AGENT_PERSIST_URL={base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+def bench_persist(args):
+    """Saving generated posts: per-row writes (ingestMovies.js) vs the bulk persistence sink"""
+    import requests
+
+    movies = [
+        {"id": 500 + i, "title": f"Persist Movie {i}", "tags": ["drama"], "images": [f"/img{i}.jpg"]}
+        for i in range(args.movies)
+    ]
+    posts = {
+        movie["id"]: [
+            {
+                "title": f"{movie['title']}: Story {n}",
+                "final": "Final text. " * 200,
+                "draft": "Draft text. " * 200,
+                "sources": [f"https://news{n}.example.com/{movie['id']}"],
+                "seo_title": f"Story {n}",
+                "seo_description": "Description",
+            }
+            for n in range(args.posts)
+        ]
+        for movie in movies
+    }
+
+    def per_row(base_url):
+        # One upsert per post, then one update per movie, as ingestMovies.js does
+        session = requests.Session()
+        endpoint = f"{base_url}/rest/v1/posts"
+        for movie in movies:
+            for row in _persist.post_rows(movie, posts[movie["id"]]):
+                for attempt in range(args.retries + 1):
+                    response = session.post(
+                        endpoint,
+                        params={"on_conflict": "slug"},
+                        headers={"Prefer": "resolution=merge-duplicates"},
+                        json=row,
+                    )
+                    if response.ok:
+                        break
+            for attempt in range(args.retries + 1):
+                response = session.patch(endpoint, params={"id": f"eq.{movie['id']}"}, json={"processed": True})
+                if response.ok:
+                    break
+
+    def sink_per_movie(base_url):
+        sink = _persist.PostgrestSink(base_url, retries=args.retries, backoff_s=0.01)
+        for movie in movies:
+            sink.persist([(movie, posts[movie["id"]])])
+
+    def sink_batched(base_url):
+        sink = _persist.PostgrestSink(base_url, retries=args.retries, backoff_s=0.01)
+        sink.persist([(movie, posts[movie["id"]]) for movie in movies])
+
+    print(
+        f"{args.movies} movies x {args.posts} posts, {args.latency_ms}ms per request, "
+        f"every {args.fail_every or 'no'}th request fails (503)"
+    )
+    print(f"{'mode':<22} {'total':>8} {'requests':>9} {'posts saved':>12} {'movies processed':>17}")
+    for label, fn in (
+        ("per-row (ingest)", per_row),
+        ("sink, per movie", sink_per_movie),
+        ("sink, one batch", sink_batched),
+    ):
+        server, stub, base_url = start_postgrest_stub(0, args.latency_ms, args.fail_every)
+        stub.seed([{"id": m["id"], "title": m["title"], "is_movie": True, "processed": False} for m in movies])
+        started = time.perf_counter()
+        fn(base_url)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        saved = sum(1 for row in stub.rows.values() if row.get("parent_id") is not None)
+        processed = sum(1 for row in stub.rows.values() if row.get("is_movie") and row.get("processed"))
+        print(f"{label:<22} {elapsed_ms:>6.0f}ms {stub.requests:>9} {saved:>12} {processed:>17}")
+        server.shutdown()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sink = _persist.SqliteSink(os.path.join(tmp, "posts.sqlite3"))
+        started = time.perf_counter()
+        sink.persist([(movie, posts[movie["id"]]) for movie in movies])
+        sink.persist([(movie, posts[movie["id"]]) for movie in movies])  # idempotent re-run
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        saved = sink._db.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+        print(f"{'sqlite sink, twice':<22} {elapsed_ms:>6.0f}ms {'-':>9} {saved:>12} {'-':>17}")
+
+
+def bench_priority(args):
+    """Interactive run latency while batch runs saturate the LLM call slots, FIFO vs priority"""
+    enable_fake_backend(latency_scale=args.scale)
+    print(
+        f"{args.batch_workers} concurrent batch pipelines, {args.interactive} interactive runs, "
+        f"{args.slots} call slots, fake LLM latency scale {args.scale}"
+    )
+    print(f"{'scheduler':<10} {'interactive p50':>16} {'interactive p95':>16} {'batch runs/s':>13}")
+
+    for label, batch_workers, prioritize in (
+        ("idle", 0, True),
+        ("fifo", args.batch_workers, False),
+        ("priority", args.batch_workers, True),
+    ):
+        research.call_scheduler = research.CallScheduler(
+            slots=args.slots, aging_s=args.aging_s, prioritize=prioritize
+        )
+        stop = threading.Event()
+        counter = iter(range(10**9))
+        batch_done = []
+
+        def batch_worker():
+            while not stop.is_set():
+                with research.run_context(research.RunContext(priority="batch")):
+                    research.compiled_graph.invoke({"topic": f"Batch Movie {next(counter)}"})
+                batch_done.append(time.perf_counter())
+
+        workers = [threading.Thread(target=batch_worker) for _ in range(batch_workers)]
+        for worker in workers:
+            worker.start()
+        if workers:
+            time.sleep(args.warmup_s)  # let the batch fill the queue
+
+        started_all = time.perf_counter()
+        samples = []
+        for i in range(args.interactive):
+            with research.run_context(research.RunContext(priority="interactive")):
+                started = time.perf_counter()
+                research.compiled_graph.invoke({"topic": f"Interactive Movie {i}"})
+                samples.append((time.perf_counter() - started) * 1000)
+        window_s = time.perf_counter() - started_all
+        batch_rate = sum(1 for t in batch_done if t >= started_all) / window_s
+
+        stop.set()
+        for worker in workers:
+            worker.join()
+        print(
+            f"{label:<10} {_percentile(samples, 50):>14.0f}ms "
+            f"{_percentile(samples, 95):>14.0f}ms {batch_rate:>13.2f}"
+        )
+
+
+def bench_prefetch(args):
+    """Nightly ingest critical path: serial full runs vs prefetch + select_topics re-entry"""
+    enable_fake_backend(latency_scale=args.scale)
+    topics = [f"Prefetch Movie {i}" for i in range(args.movies)]
+
+    full_ms = 0.0
+    for topic in topics:
+        _, elapsed_ms, _ = run_pipeline({"topic": topic})
+        full_ms += elapsed_ms
+
+    with research.run_context():
+        started = time.perf_counter()
+        prefetched = research.prefetch_research(topics)
+        prefetch_ms = (time.perf_counter() - started) * 1000
+    reentry_ms = 0.0
+    graph = research.pipeline_graph("select_topics")
+    for topic in topics:
+        state, error = research.prepare_reentry_state(
+            "select_topics", {"topic": topic, **prefetched[topic]}
+        )
+        assert error is None, error
+        with research.run_context():
+            started = time.perf_counter()
+            graph.invoke(state)
+            reentry_ms += (time.perf_counter() - started) * 1000
+
+    def full_scale_s(ms):
+        return ms / args.scale / 1000
+
+    print(f"{args.movies} movies, fake LLM latency scale {args.scale} (times reported at full scale)")
+    print(f"serial full runs:                 {full_scale_s(full_ms):>7.1f}s")
+    print(
+        f"prefetch (overlaps ingest):       {full_scale_s(prefetch_ms):>7.1f}s "
+        f"({len(prefetched)}/{len(topics)} movies ready)"
+    )
+    print(f"serial runs from select_topics:   {full_scale_s(reentry_ms):>7.1f}s")
+    print(f"saved on the critical path:       {full_scale_s(full_ms - reentry_ms):>7.1f}s")
+
+
+def serve_batch_stub(args):
+    """Serve the local Batch API stand-in until interrupted"""
+    server, _, base_url = start_batch_stub(args.port, args.scale)
+    print(f"Batch stand-in listening; set AGENT_BATCH_BASE_URL={base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+def bench_batch(args):
+    """Submit a batch job for N fake movies to the local stand-in and poll it to completion"""
+    from openai import OpenAI
+
+    enable_fake_backend(latency_scale=args.scale)
+    server, _, base_url = start_batch_stub(latency_scale=args.scale)
+    runner = _batch.BatchRunner(OpenAI(api_key="stub", base_url=base_url), timeout=600)
+    topics = [f"Movie {n}" for n in range(args.movies)]
+
+    with research.run_context() as run:
+        started = time.perf_counter()
+        job = _batch.submit_batch_job(topics, runner=runner)
+        submitted = time.perf_counter() - started
+        polls = 0
+        while job["status"] == "running":
+            time.sleep(args.poll_s)
+            job = _batch.advance_batch_job(job["id"], runner=runner)
+            polls += 1
+        elapsed = time.perf_counter() - started
+    server.shutdown()
+    results = job.get("results", [])
+
+    summary = run.summary()
+    batched = [c for c in run.calls if c.get("batch")]
+    synchronous = [c for c in run.calls if not c.get("batch")]
+    cost = estimate_cost(synchronous) + estimate_cost(batched) * 0.5  # Batch API: 50% off
+    print(f"movies: {len(results)}, posts: {sum(r['topic_count'] for r in results)}")
+    print(f"submit returned after {submitted:.2f}s; job {job['status']} after {polls} polls")
+    print(f"wall time: {elapsed:.2f}s (fake latency scale {args.scale})")
+    print(f"calls: {len(synchronous)} synchronous + {len(batched)} batched")
+    print(f"estimated cost: ${cost:.5f} (vs ${estimate_cost(run.calls):.5f} all synchronous)")
+    for name, value in sorted(summary["counters"].items()):
+        if name.startswith("batch."):
+            print(f"  {name}: {value}")
+
+
+def bench_sources(args):
+    """Naive sequential link checks vs the pooled, cached SourceValidator"""
+    import requests
+
+    servers = [start_link_stub(delay_ms=args.delay_ms) for _ in range(args.hosts)]
+    kinds = list(LINK_STUB_PATHS)
+    urls, expected = [], {}
+    for n in range(args.urls):
+        kind = kinds[n % len(kinds)]
+        url = f"{servers[n % len(servers)][1]}/{kind}/{n}"
+        urls.append(url)
+        expected[url] = LINK_STUB_PATHS[kind][2]
+    urls.append("http://no-such-host.invalid/article")
+    expected[urls[-1]] = "dead"
+
+    def naive(url):
+        try:
+            status = requests.head(url, timeout=5, allow_redirects=True).status_code
+            if status >= 400:
+                status = requests.get(url, timeout=5).status_code
+        except requests.RequestException:
+            return "unknown"
+        return "ok" if status < 400 else "dead" if status in (404, 410) else "unknown"
+
+    started = time.perf_counter()
+    naive_verdicts = {url: naive(url) for url in urls}
+    naive_ms = (time.perf_counter() - started) * 1000
+
+    # The link stubs listen on loopback, which production validation refuses
+    validator = research.SourceValidator(per_host=args.per_host, allow_private=True)
+    with research.run_context() as run:
+        started = time.perf_counter()
+        cold = validator.validate(urls)
+        cold_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        validator.validate(urls)
+        warm_ms = (time.perf_counter() - started) * 1000
+    for server, _ in servers:
+        server.shutdown()
+
+    def accuracy(verdicts):
+        return sum(verdicts[url] == expected[url] for url in urls) / len(urls)
+
+    print(f"{len(urls)} URLs over {args.hosts} hosts, {args.delay_ms}ms server delay")
+    print(f"naive sequential:    {naive_ms:8.0f} ms  accuracy {accuracy(naive_verdicts):.0%}")
+    print(f"validator (cold):    {cold_ms:8.0f} ms  accuracy {accuracy(cold):.0%}")
+    print(f"validator (cached):  {warm_ms:8.0f} ms")
+    print(f"counters: {run.summary()['counters']}")
+
+
+def bench_transport(args):
+    """First-call and concurrent latency: SDK default vs shared transport (+ pre-warm)"""
+    from openai import OpenAI
+
+    server, base_url = start_openai_stub(connect_ms=args.connect_ms, latency_ms=args.latency_ms)
+    burst = args.burst or 2 * research.MAX_CONCURRENCY
+
+    def call(client):
+        started = time.perf_counter()
+        client.chat.completions.create(
+            model="gpt-4o-mini", messages=[{"role": "user", "content": "ping"}]
+        )
+        return (time.perf_counter() - started) * 1000
+
+    def concurrent(client):
+        with ThreadPoolExecutor(max_workers=burst) as pool:
+            return list(pool.map(lambda _: call(client), range(burst)))
+
+    configs = (
+        ("sdk default", lambda: OpenAI(api_key="stub", base_url=base_url), False),
+        ("shared transport", lambda: research.build_openai_client("stub", base_url), False),
+        ("shared + prewarm", lambda: research.build_openai_client("stub", base_url), True),
+    )
+    print(
+        f"stub: {args.connect_ms}ms connection setup, {args.latency_ms}ms per call, "
+        f"burst of {burst}, {args.idle_s}s idle between bursts"
+    )
+    print(f"{'transport':<18} {'prewarm':>8} {'first':>8} {'burst p50':>10} {'burst max':>10} {'after idle max':>15}")
+    for label, factory, prewarm in configs:
+        client = factory()
+        prewarm_ms = 0.0
+        if prewarm:
+            started = time.perf_counter()
+            research.prewarm_openai(client, burst)
+            prewarm_ms = (time.perf_counter() - started) * 1000
+        first = call(client)
+        samples = concurrent(client)
+        time.sleep(args.idle_s)
+        after_idle = concurrent(client)
+        print(
+            f"{label:<18} {prewarm_ms:>6.0f}ms {first:>6.0f}ms {_percentile(samples, 50):>8.0f}ms "
+            f"{max(samples):>8.0f}ms {max(after_idle):>13.0f}ms"
+        )
+    server.shutdown()
+
+
+def bench_tracing(args):
+    """Per-call overhead of tracing off / sampled / on (fake backend, stub LangSmith)"""
+    import langsmith
+
+    server, base_url, received = start_langsmith_stub(latency_ms=args.upload_ms)
+    research.tracing_client = langsmith.Client(
+        api_url=base_url, api_key="stub", auto_batch_tracing=True
+    )
+    messages = [{"role": "user", "content": research.EDITOR_PROMPT + sample_post()["draft"]}]
+
+    print(
+        f"{args.runs} runs x {args.calls} calls per mode, fake LLM latency scale {args.scale}, "
+        f"{args.upload_ms}ms trace upload latency"
+    )
+    print(f"{'mode':<8} {'traced runs':>11} {'per call p50':>13} {'per call p95':>13} {'flush':>8} {'uploads':>8}")
+    with langsmith.tracing_context(enabled=True):
+        for mode in research.TRACING_MODES:
+            research.TRACING = mode
+            enable_fake_backend(latency_scale=args.scale)
+            before = dict(received)
+            samples, traced_runs, flush_ms = [], 0, 0.0
+            for _ in range(args.runs):
+                with research.run_context() as run:
+                    for _ in range(args.calls):
+                        started = time.perf_counter()
+                        research.llm_call("edit", "chat", messages=messages)
+                        samples.append((time.perf_counter() - started) * 1000)
+                traced_runs += run.traced
+                if run.traced:
+                    started = time.perf_counter()
+                    research.flush_traces()
+                    flush_ms += (time.perf_counter() - started) * 1000
+            print(
+                f"{mode:<8} {traced_runs:>5}/{args.runs:<5} {_percentile(samples, 50):>11.2f}ms "
+                f"{_percentile(samples, 95):>11.2f}ms {flush_ms / max(traced_runs, 1):>6.1f}ms "
+                f"{received['requests'] - before['requests']:>8}"
+            )
+    server.shutdown()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Load Testing
+# ──────────────────────────────────────────────────────────────────────────────
+# Drives research.handler over a local socket (ThreadingHTTPServer, one thread
+# per connection) with the fake LLM backend and a weighted request mix. Each
+# kind has an expected status; anything else, or a transport error, counts as
+# an error.
+
+LOAD_TEST_KEY = "load-test-key"
+LOAD_MIX_DEFAULT = "valid=70,oversize=10,bad_key=5,invalid_json=5,large_body=5,slow_client=5"
+LOAD_EXPECTED_STATUS = {
+    "valid": 200,
+    "oversize": 400,
+    "bad_key": 403,
+    "invalid_json": 400,
+    "large_body": 400,
+    "slow_client": 200,
+}
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in LOAD_EXPECTED_STATUS:
+            raise SystemExit(f"unknown request kind '{kind}' (known: {', '.join(LOAD_EXPECTED_STATUS)})")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def rss_mb():
+    """Current resident set size in MB (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _load_request(kind, n):
+    """(headers, body, trickle) for one request of the given kind"""
+    headers = {"Content-Type": "application/json", "X-API-KEY": LOAD_TEST_KEY}
+    trickle = False
+    if kind in ("valid", "slow_client"):
+        body = json.dumps({"topic": f"Load Movie {n}"}).encode()
+        trickle = kind == "slow_client"
+    elif kind == "oversize":
+        body = json.dumps({"topic": "x" * 500}).encode()
+    elif kind == "bad_key":
+        headers["X-API-KEY"] = "wrong"
+        body = json.dumps({"topic": f"Load Movie {n}"}).encode()
+    elif kind == "invalid_json":
+        body = b'{"topic": "Load Movie'
+    else:  # large_body: ~1 MB of fields the handler has to parse and reject
+        body = json.dumps({"topic": f"Load Movie {n}", "fields": ["x" * 1000] * 1000}).encode()
+    headers["Content-Length"] = str(len(body))
+    return headers, body, trickle
+
+
+def _send_load_request(port, kind, n, timeout):
+    headers, body, trickle = _load_request(kind, n)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        conn.putrequest("POST", "/")
+        for name, value in headers.items():
+            conn.putheader(name, value)
+        conn.endheaders()
+        if trickle:
+            # Slow client: the body arrives in small pieces over ~1s
+            for i in range(0, len(body), 8):
+                conn.send(body[i : i + 8])
+                time.sleep(1.0 / max(1, len(body) // 8))
+        else:
+            conn.send(body)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def start_agent_server():
+    """Serve research.handler on a free local port; returns (server, port)"""
+    os.environ["MY_DAILY_API_KEY"] = LOAD_TEST_KEY
+    research.pipeline_flights.ttl = 0  # every valid request runs the pipeline
+    # Rejected requests are expected here; the handler logs each one at ERROR
+    research.logger.setLevel(logging.CRITICAL)
+
+    class QuietHandler(research.handler):
+        def log_message(self, *a):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), QuietHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
+
+
+def load_test(args):
+    """Drive the HTTP handler with concurrent mixed requests (fake backend)"""
+    enable_fake_backend(latency_scale=args.scale)
+    server, port = start_agent_server()
+
+    mix = parse_mix(args.mix)
+    kinds, weights = list(mix), list(mix.values())
+    rng = random.Random(args.seed)
+    rng_lock = threading.Lock()
+    results = []  # (kind, latency_ms, ok, finished_at)
+    results_lock = threading.Lock()
+    counter = iter(range(10**9))
+    started = time.perf_counter()
+    deadline = started + args.duration
+    rss_samples = [(0.0, rss_mb())]
+    stop = threading.Event()
+
+    def sample_rss():
+        while not stop.wait(args.rss_interval):
+            rss_samples.append((time.perf_counter() - started, rss_mb()))
+
+    def worker():
+        while time.perf_counter() < deadline:
+            with rng_lock:
+                kind = rng.choices(kinds, weights)[0]
+                n = next(counter)
+            t0 = time.perf_counter()
+            try:
+                status = _send_load_request(port, kind, n, args.timeout)
+                ok = status == LOAD_EXPECTED_STATUS[kind]
+            except Exception:
+                ok = False
+            with results_lock:
+                results.append((kind, (time.perf_counter() - t0) * 1000, ok, time.perf_counter()))
+
+    threading.Thread(target=sample_rss, daemon=True).start()
+    workers = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    rss_samples.append((elapsed, rss_mb()))
+    server.shutdown()
+
+    print(
+        f"{len(results)} requests in {elapsed:.1f}s at concurrency {args.concurrency} "
+        f"({len(results) / elapsed:.1f} req/s), fake latency scale {args.scale}"
+    )
+    print(f"{'kind':<14} {'count':>6} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for kind in ["all"] + kinds:
+        rows = [r for r in results if kind == "all" or r[0] == kind]
+        if not rows:
+            continue
+        latencies = [r[1] for r in rows]
+        errors = sum(1 for r in rows if not r[2])
+        print(
+            f"{kind:<14} {len(rows):>6} {errors / len(rows):>6.1%} {_percentile(latencies, 50):>8.0f} "
+            f"{_percentile(latencies, 95):>8.0f} {_percentile(latencies, 99):>8.0f}"
+        )
+    print("RSS over time: " + "  ".join(f"{t:.0f}s={mb:.0f}MB" for t, mb in rss_samples))
+    print(f"RSS growth: {rss_samples[-1][1] - rss_samples[0][1]:+.1f} MB")
+
+
+class OutageClient:
+    """OpenAI client stand-in for an incident: every call hangs, then times out"""
+
+    def __init__(self, timeout_s):
+        self.timeout_s = timeout_s
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.responses = SimpleNamespace(create=self._create)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.timeout_s)
+        raise TimeoutError("simulated OpenAI timeout")
+
+
+def bench_breaker(args):
+    """Request latency during a simulated OpenAI outage, breaker off vs on, then recovery"""
+    fake = enable_fake_backend(latency_scale=args.scale)
+    server, port = start_agent_server()
+    outage = OutageClient(args.timeout_s)
+
+    def request(n):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=600)
+        body = json.dumps({"topic": f"Outage Movie {n}"})
+        started = time.perf_counter()
+        conn.request("POST", "/", body, {"Content-Type": "application/json", "X-API-KEY": LOAD_TEST_KEY})
+        response = conn.getresponse()
+        response.read()
+        conn.close()
+        return response.status, (time.perf_counter() - started) * 1000, response.getheader("Retry-After")
+
+    print(
+        f"{args.requests} sequential requests per mode during an outage where every call "
+        f"times out after {args.timeout_s}s"
+    )
+    print(
+        f"llm_call retries {research.LLM_CALL_RETRIES}, breaker window {research.BREAKER_WINDOW_S:.0f}s, "
+        f"opens after {research.BREAKER_CONSECUTIVE_FAILURES} consecutive failures"
+    )
+    print(f"{'breaker':<8} {'statuses':<24} {'200 p50':>9} {'503 p50':>9} {'calls':>6}")
+    for enabled in (False, True):
+        research.BREAKER_ENABLED = enabled
+        research.circuit_breakers = research.CircuitBreakers(open_s=args.open_s)
+        research.openai_client = research.openai_raw_client = outage
+        outage.calls = 0
+        results = [request(n) for n in range(args.requests)]
+        statuses = ",".join(str(status) for status, _, _ in results)
+        served = [ms for status, ms, _ in results if status == 200] or [0]
+        rejected = [ms for status, ms, _ in results if status == 503] or [0]
+        print(
+            f"{'on' if enabled else 'off':<8} {statuses:<24} {_percentile(served, 50):>7.0f}ms "
+            f"{_percentile(rejected, 50):>7.0f}ms {outage.calls:>6}"
+        )
+    retry_after = results[-1][2]
+    print(f"Retry-After on rejected requests: {retry_after}s")
+
+    # Recovery: once open_s passes, a half-open probe against a healthy backend closes the breaker
+    research.openai_client = research.openai_raw_client = fake
+    time.sleep(args.open_s)
+    status, ms, _ = request(args.requests)
+    states = {key: b["state"] for key, b in research.circuit_breakers.snapshot().items()}
+    print(f"after {args.open_s}s with a healthy backend: {status} in {ms:.0f}ms, breakers {states}")
+    transitions = {key: b["transitions"] for key, b in research.circuit_breakers.snapshot().items()}
+    print(f"transitions: {json.dumps(transitions)}")
+    server.shutdown()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Run History
+# ──────────────────────────────────────────────────────────────────────────────
+# Reports over _history.RunHistory (AGENT_RUN_HISTORY_DB). Rows carry a weight
+# once old data is downsampled; percentiles honour it, significance tests use
+# the surviving rows as samples.
+
+HISTORY_METRICS = ("elapsed_ms", "llm_calls", "input_tokens", "output_tokens", "fallbacks")
+
+
+def _open_history(args):
+    path = args.db or _history.RUN_HISTORY_DB
+    if not path or not os.path.exists(path):
+        print(f"No run history at {path or '(disabled)'}")
+        return None
+    return _history.RunHistory(path)
+
+
+def _history_rows(history, args):
+    """Completed full runs in the --days window (other kinds are not comparable)"""
+    rows = history.rows(since=time.time() - args.days * 86400)
+    return [
+        row
+        for row in rows
+        if row["kind"] == args.kind and row["status"] == "ok" and row["start_node"] == "research"
+    ]
+
+
+def _metric(row, name):
+    """A top-level metric, or "<node>.ms" / "<node>.fallbacks" from the node breakdown"""
+    if name in row:
+        return row[name] or 0
+    node, _, field = name.rpartition(".")
+    return row["nodes"].get(node, {}).get(field, 0)
+
+
+def _weighted_percentile(pairs, pct):
+    """Percentile of (value, weight) pairs"""
+    ordered = sorted(pairs)
+    total = sum(weight for _, weight in ordered)
+    if not total:
+        return 0.0
+    threshold = pct / 100 * total
+    seen = 0
+    for value, weight in ordered:
+        seen += weight
+        if seen >= threshold:
+            return value
+    return ordered[-1][0]
+
+
+def mann_whitney_u(a, b):
+    """Two-sided Mann-Whitney U test (normal approximation, tie-corrected); returns (u, p)"""
+    n1, n2 = len(a), len(b)
+    combined = sorted([(v, 0) for v in a] + [(v, 1) for v in b])
+    ranks = [0.0] * len(combined)
+    ties = 0.0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        t = j - i + 1
+        ties += t**3 - t
+        i = j + 1
+    r1 = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 0)
+    u = r1 - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return u, 1.0
+    mean = n1 * n2 / 2
+    z = (abs(u - mean) - 0.5) / math.sqrt(variance)
+    return u, min(1.0, math.erfc(max(z, 0) / math.sqrt(2)))
+
+
+def _configs(rows):
+    """(model_hash, prompt_hash) configs in order of first appearance"""
+    return list(dict.fromkeys((row["model_hash"], row["prompt_hash"]) for row in rows))
+
+
+def history_report(args):
+    """Rolling percentiles from the run history, per time bucket and config"""
+    history = _open_history(args)
+    if history is None:
+        return 1
+    rows = _history_rows(history, args)
+    if not rows:
+        print(f"No completed '{args.kind}' runs in the last {args.days} days")
+        return 0
+
+    bucket_s = args.bucket_hours * 3600
+    buckets = {}
+    for row in rows:
+        key = (int(row["recorded_at"] // bucket_s), row["model_hash"], row["prompt_hash"])
+        buckets.setdefault(key, []).append(row)
+
+    print(f"{len(rows)} rows, '{args.kind}' runs, {args.bucket_hours}h buckets")
+    print(
+        f"{'bucket':<17} {'models':<11} {'prompts':<11} {'runs':>5} {'p50':>8} {'p95':>8} "
+        f"{'in tok':>7} {'out tok':>8} {'fallbacks':>10}"
+    )
+    for (bucket, model_hash, prompt_hash), members in sorted(buckets.items()):
+        weights = [row["weight"] for row in members]
+        runs = sum(weights)
+        elapsed = [(row["elapsed_ms"], row["weight"]) for row in members]
+
+        def mean(name):
+            return sum(_metric(row, name) * row["weight"] for row in members) / runs
+
+        started = time.strftime("%Y-%m-%d %H:%M", time.localtime(bucket * bucket_s))
+        print(
+            f"{started:<17} {model_hash:<11} {prompt_hash:<11} {runs:>5} "
+            f"{_weighted_percentile(elapsed, 50):>6.0f}ms {_weighted_percentile(elapsed, 95):>6.0f}ms "
+            f"{mean('input_tokens'):>7.0f} {mean('output_tokens'):>8.0f} {mean('fallbacks'):>10.2f}"
+        )
+
+    config = _configs(rows)[-1]
+    latest = [row for row in rows if (row["model_hash"], row["prompt_hash"]) == config]
+    nodes = list(dict.fromkeys(node for row in latest for node in row["nodes"]))
+    print(f"\nper node, current config (models {config[0]}, prompts {config[1]}):")
+    print(f"{'node':<18} {'p50':>8} {'p95':>8} {'calls/run':>10} {'fallbacks/run':>14}")
+    runs = sum(row["weight"] for row in latest)
+    for node in nodes:
+        timings = [(_metric(row, f"{node}.ms"), row["weight"]) for row in latest]
+        calls = sum(_metric(row, f"{node}.calls") * row["weight"] for row in latest) / runs
+        fallbacks = sum(_metric(row, f"{node}.fallbacks") * row["weight"] for row in latest) / runs
+        print(
+            f"{node:<18} {_weighted_percentile(timings, 50):>6.0f}ms "
+            f"{_weighted_percentile(timings, 95):>6.0f}ms {calls:>10.2f} {fallbacks:>14.2f}"
+        )
+    return 0
+
+
+def history_regressions(args):
+    """Flag significant regressions of the latest config against the one before it"""
+    history = _open_history(args)
+    if history is None:
+        return 1
+    rows = _history_rows(history, args)
+    configs = _configs(rows)
+    if len(configs) < 2:
+        print("Only one model/prompt config in the window; nothing to compare")
+        return 0
+    baseline, current = configs[-2], configs[-1]
+    before = [row for row in rows if (row["model_hash"], row["prompt_hash"]) == baseline]
+    after = [row for row in rows if (row["model_hash"], row["prompt_hash"]) == current]
+    changed = [
+        name for name, old, new in zip(("models", "prompts"), baseline, current) if old != new
+    ]
+    print(
+        f"baseline models {baseline[0]} prompts {baseline[1]} ({len(before)} runs) -> "
+        f"current models {current[0]} prompts {current[1]} ({len(after)} runs); "
+        f"changed: {', '.join(changed)}"
+    )
+    if min(len(before), len(after)) < args.min_runs:
+        print(f"Need at least {args.min_runs} runs on each side")
+        return 0
+
+    nodes = list(dict.fromkeys(node for row in before + after for node in row["nodes"]))
+    metrics = list(HISTORY_METRICS) + [f"{node}.ms" for node in nodes]
+    print(f"{'metric':<22} {'before p50':>11} {'after p50':>10} {'change':>8} {'p-value':>9}")
+    regressions = []
+    for name in metrics:
+        a = [_metric(row, name) for row in before]
+        b = [_metric(row, name) for row in after]
+        median_a, median_b = statistics.median(a), statistics.median(b)
+        _, p = mann_whitney_u(a, b)
+        change = (median_b - median_a) / median_a if median_a else (1.0 if median_b else 0.0)
+        flagged = p < args.alpha and change > args.min_change
+        if flagged:
+            regressions.append(name)
+        print(
+            f"{name:<22} {median_a:>11.0f} {median_b:>10.0f} {change * 100:>+7.1f}% {p:>9.4f}"
+            f"{'  REGRESSION' if flagged else ''}"
+        )
+    if regressions:
+        print(f"\n{len(regressions)} regressions (p < {args.alpha}, median up > {args.min_change:.0%})")
+        return 1
+    print("\nNo significant regressions")
+    return 0
+
+
+def history_prune(args):
+    """Apply run-history retention now (downsample old rows, drop expired ones)"""
+    history = _open_history(args)
+    if history is None:
+        return 1
+    before = history._db.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+    deleted, thinned = history.prune(
+        raw_days=args.raw_days, downsample=args.downsample, max_days=args.max_days
+    )
+    history._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    history._db.execute("VACUUM")
+    print(
+        f"{before} rows -> {before - deleted - thinned} ({deleted} expired, {thinned} thinned); "
+        f"{os.path.getsize(history.path) / 1024:.0f} KiB on disk"
+    )
+    return 0
+
+
+def bench_history(args):
+    """Run-history recording cost and regression detection on fake-backend runs"""
+    enable_fake_backend(latency_scale=args.scale)
+    draft_latency = _fakes.FAKE_LATENCY_MS["draft"]
+    with tempfile.TemporaryDirectory() as tmp:
+        history = _history.RunHistory(os.path.join(tmp, "history.sqlite3"))
+        insert_ms = []
+
+        def record(label, runs):
+            for i in range(runs):
+                with research.run_context() as run:
+                    research.compiled_graph.invoke({"topic": f"History Movie {label}{i}"})
+                row = _history.RunHistory.row(run)
+                started = time.perf_counter()
+                history.insert(row)
+                insert_ms.append((time.perf_counter() - started) * 1000)
+
+        def detect(phase):
+            result = history_regressions(
+                SimpleNamespace(
+                    db=history.path, days=1, kind="run", min_runs=8, alpha=args.alpha, min_change=0.05
+                )
+            )
+            return f"{phase}: {'regression flagged' if result else 'no regression'}"
+
+        outcomes = []
+        original = research.EDITOR_PROMPT
+        try:
+            record("a", args.runs)
+            # New prompt text, unchanged behaviour: should not be flagged
+            research.EDITOR_PROMPT = original + "\n"
+            _history.config_fingerprints.cache_clear()
+            record("b", args.runs)
+            outcomes.append(detect("prompt change, same latency"))
+            # Another prompt change that makes drafting slower: should be flagged
+            research.EDITOR_PROMPT = original + "\n\n"
+            _history.config_fingerprints.cache_clear()
+            _fakes.FAKE_LATENCY_MS["draft"] = draft_latency * (1 + args.slowdown)
+            record("c", args.runs)
+            outcomes.append(detect(f"prompt change, draft +{args.slowdown:.0%}"))
+        finally:
+            research.EDITOR_PROMPT = original
+            _fakes.FAKE_LATENCY_MS["draft"] = draft_latency
+            _history.config_fingerprints.cache_clear()
+
+        rows = history._db.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+        history._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        history._db.execute("VACUUM")
+        size = os.path.getsize(history.path)
+        print(
+            f"\n{rows} runs recorded, insert p50 {_percentile(insert_ms, 50):.2f}ms "
+            f"p95 {_percentile(insert_ms, 95):.2f}ms, {size / rows:.0f} bytes/run on disk"
+        )
+        for outcome in outcomes:
+            print(outcome)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# CLI
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    encoding = subparsers.add_parser("bench-encoding", help=bench_encoding.__doc__)
+    encoding.add_argument("--repeat", type=int, default=20)
+    encoding.set_defaults(func=bench_encoding)
+
+    speculative = subparsers.add_parser("bench-speculative", help=bench_speculative.__doc__)
+    speculative.add_argument("--runs", type=int, default=5)
+    speculative.add_argument("--scale", type=float, default=0.01)
+    speculative.set_defaults(func=bench_speculative)
+
+    draft_modes = subparsers.add_parser("bench-draft-modes", help=bench_draft_modes.__doc__)
+    draft_modes.add_argument("--runs", type=int, default=5)
+    draft_modes.add_argument("--scale", type=float, default=0.01)
+    draft_modes.set_defaults(func=bench_draft_modes)
+
+    fast_path = subparsers.add_parser("bench-edit-fast-path", help=bench_edit_fast_path.__doc__)
+    fast_path.add_argument("--runs", type=int, default=5)
+    fast_path.add_argument("--scale", type=float, default=0.01)
+    fast_path.set_defaults(func=bench_edit_fast_path)
+
+    research_cache = subparsers.add_parser("bench-research-cache", help=bench_research_cache.__doc__)
+    research_cache.add_argument("--entries", type=int, default=50000)
+    research_cache.add_argument("--queries", type=int, default=2000)
+    research_cache.set_defaults(func=bench_research_cache)
+
+    locales = subparsers.add_parser("bench-locales", help=bench_locales.__doc__)
+    locales.add_argument("--locales", default="en,es,pt")
+    locales.add_argument("--runs", type=int, default=5)
+    locales.add_argument("--scale", type=float, default=0.01)
+    locales.set_defaults(func=bench_locales)
+
+    research_modes = subparsers.add_parser("bench-research-modes", help=bench_research_modes.__doc__)
+    research_modes.add_argument("--runs", type=int, default=20)
+    research_modes.add_argument("--scale", type=float, default=0.01)
+    research_modes.set_defaults(func=bench_research_modes)
+
+    selection_modes = subparsers.add_parser("bench-selection-modes", help=bench_selection_modes.__doc__)
+    selection_modes.add_argument("--runs", type=int, default=20)
+    selection_modes.add_argument("--scale", type=float, default=0.01)
+    selection_modes.set_defaults(func=bench_selection_modes)
+
+    incremental = subparsers.add_parser("bench-incremental", help=bench_incremental.__doc__)
+    incremental.add_argument("--movies", type=int, default=20)
+    incremental.add_argument("--scale", type=float, default=0.01)
+    incremental.set_defaults(func=bench_incremental)
+
+    postgrest_stub = subparsers.add_parser("serve-postgrest-stub", help=serve_postgrest_stub.__doc__)
+    postgrest_stub.add_argument("--port", type=int, default=8766)
+    postgrest_stub.add_argument("--latency-ms", type=float, default=0)
+    postgrest_stub.add_argument("--fail-every", type=int, default=0)
+    postgrest_stub.set_defaults(func=serve_postgrest_stub)
+
+    persist = subparsers.add_parser("bench-persist", help=bench_persist.__doc__)
+    persist.add_argument("--movies", type=int, default=20)
+    persist.add_argument("--posts", type=int, default=3)
+    persist.add_argument("--latency-ms", type=float, default=40)
+    persist.add_argument("--fail-every", type=int, default=7)
+    persist.add_argument("--retries", type=int, default=3)
+    persist.set_defaults(func=bench_persist)
+
+    priority = subparsers.add_parser("bench-priority", help=bench_priority.__doc__)
+    priority.add_argument("--batch-workers", type=int, default=24)
+    priority.add_argument("--interactive", type=int, default=10)
+    priority.add_argument("--slots", type=int, default=8)
+    priority.add_argument("--aging-s", type=float, default=10)
+    priority.add_argument("--warmup-s", type=float, default=2)
+    priority.add_argument("--scale", type=float, default=0.01)
+    priority.set_defaults(func=bench_priority)
+
+    prefetch = subparsers.add_parser("bench-prefetch", help=bench_prefetch.__doc__)
+    prefetch.add_argument("--movies", type=int, default=10)
+    prefetch.add_argument("--scale", type=float, default=0.01)
+    prefetch.set_defaults(func=bench_prefetch)
+
+    load = subparsers.add_parser("load-test", help=load_test.__doc__)
+    load.add_argument("--concurrency", type=int, default=16)
+    load.add_argument("--duration", type=float, default=30)
+    load.add_argument("--scale", type=float, default=0.001)
+    load.add_argument("--mix", default=LOAD_MIX_DEFAULT)
+    load.add_argument("--timeout", type=float, default=60)
+    load.add_argument("--rss-interval", type=float, default=5)
+    load.add_argument("--seed", type=int, default=0)
+    load.set_defaults(func=load_test)
+
+    breaker = subparsers.add_parser("bench-breaker", help=bench_breaker.__doc__)
+    breaker.add_argument("--requests", type=int, default=6)
+    breaker.add_argument("--timeout-s", type=float, default=2)
+    breaker.add_argument("--open-s", type=float, default=3)
+    breaker.add_argument("--scale", type=float, default=0.01)
+    breaker.set_defaults(func=bench_breaker)
+
+    stub = subparsers.add_parser("serve-batch-stub", help=serve_batch_stub.__doc__)
+    stub.add_argument("--port", type=int, default=8765)
+    stub.add_argument("--scale", type=float, default=0.001)
+    stub.set_defaults(func=serve_batch_stub)
+
+    batch = subparsers.add_parser("bench-batch", help=bench_batch.__doc__)
+    batch.add_argument("--movies", type=int, default=10)
+    batch.add_argument("--scale", type=float, default=0.001)
+    batch.add_argument("--poll-s", type=float, default=0.05)
+    batch.set_defaults(func=bench_batch)
+
+    sources = subparsers.add_parser("bench-sources", help=bench_sources.__doc__)
+    sources.add_argument("--urls", type=int, default=60)
+    sources.add_argument("--hosts", type=int, default=6)
+    sources.add_argument("--per-host", type=int, default=2)
+    sources.add_argument("--delay-ms", type=int, default=150)
+    sources.set_defaults(func=bench_sources)
+
+    transport = subparsers.add_parser("bench-transport", help=bench_transport.__doc__)
+    transport.add_argument("--connect-ms", type=int, default=120)
+    transport.add_argument("--latency-ms", type=int, default=50)
+    transport.add_argument("--burst", type=int, default=0)
+    transport.add_argument("--idle-s", type=float, default=6)
+    transport.set_defaults(func=bench_transport)
+
+    tracing = subparsers.add_parser("bench-tracing", help=bench_tracing.__doc__)
+    tracing.add_argument("--runs", type=int, default=20)
+    tracing.add_argument("--calls", type=int, default=10)
+    tracing.add_argument("--scale", type=float, default=0.0)
+    tracing.add_argument("--upload-ms", type=int, default=50)
+    tracing.set_defaults(func=bench_tracing)
+
+    for name, fn in (
+        ("history-report", history_report),
+        ("history-regressions", history_regressions),
+        ("history-prune", history_prune),
+    ):
+        command = subparsers.add_parser(name, help=fn.__doc__)
+        command.add_argument("--db", default="", help="defaults to AGENT_RUN_HISTORY_DB")
+        command.set_defaults(func=fn)
+        if fn is history_prune:
+            command.add_argument("--raw-days", type=float, default=_history.RUN_HISTORY_RAW_DAYS)
+            command.add_argument("--downsample", type=int, default=_history.RUN_HISTORY_DOWNSAMPLE)
+            command.add_argument("--max-days", type=float, default=_history.RUN_HISTORY_MAX_DAYS)
+            continue
+        command.add_argument("--days", type=float, default=7 if fn is history_report else 14)
+        command.add_argument("--kind", default="run", help="run, locales, batch or prefetch")
+        if fn is history_report:
+            command.add_argument("--bucket-hours", type=float, default=24)
+        else:
+            command.add_argument("--alpha", type=float, default=0.01)
+            command.add_argument("--min-change", type=float, default=0.05)
+            command.add_argument("--min-runs", type=int, default=8)
+
+    history_bench = subparsers.add_parser("bench-history", help=bench_history.__doc__)
+    history_bench.add_argument("--runs", type=int, default=30)
+    history_bench.add_argument("--scale", type=float, default=0.01)
+    history_bench.add_argument("--slowdown", type=float, default=0.3)
+    history_bench.add_argument("--alpha", type=float, default=0.01)
+    history_bench.set_defaults(func=bench_history)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,44 @@
+import contextvars
+import difflib
+import gzip
+import hmac
+import ipaddress
 import json
 import logging
+import math
 import os
+import random
 import re
+import socket
+import sqlite3
+import sys
+import threading
 import time
+import urllib.parse
+import uuid
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from datetime import datetime
+from functools import lru_cache, wraps
 from http.server import BaseHTTPRequestHandler
 from typing import List, TypedDict
 
+import httpx
+import requests
 from langgraph.graph import END, StateGraph
+from langsmith import Client as LangSmithClient
 from langsmith.wrappers import wrap_openai
 from openai import OpenAI
+from requests.adapters import HTTPAdapter
+
+# Sibling modules (_batch.py, ...) import this one as "research": register it
+# under that name however the runtime loaded this file, and make the function's
+# directory importable
+sys.modules.setdefault("research", sys.modules[__name__])
+if os.path.dirname(os.path.abspath(__file__)) not in sys.path:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Enhanced Logging Configuration
@@ -84,21 +113,174 @@ logger.info("[System] 🚀 Research Agent starting up...")
 # ──────────────────────────────────────────────────────────────────────────────
 logger.info("[OpenAI] 🔑 Initializing OpenAI client...")
 
+# Upper bound on concurrent LLM calls a single run fans out to
+MAX_CONCURRENCY = int(os.getenv("AGENT_MAX_CONCURRENCY", "5"))
+
+# Transport: one shared keep-alive pool sized for the pipeline's fan-out
+# (speculative drafting can overlap the main draft pool, hence 2x). httpx's
+# default 5s keep-alive expiry drops connections between pipeline stages, so
+# every stage would pay DNS + TLS again; keep them for a minute instead.
+OPENAI_MAX_CONNECTIONS = int(
+    os.getenv("AGENT_OPENAI_MAX_CONNECTIONS", str(2 * MAX_CONCURRENCY))
+)
+OPENAI_KEEPALIVE_S = float(os.getenv("AGENT_OPENAI_KEEPALIVE_S", "60"))
+OPENAI_READ_TIMEOUT_S = float(os.getenv("AGENT_OPENAI_READ_TIMEOUT_S", "120"))
+OPENAI_TIMEOUT = httpx.Timeout(
+    OPENAI_READ_TIMEOUT_S,  # web search calls are slow
+    connect=float(os.getenv("AGENT_OPENAI_CONNECT_TIMEOUT_S", "5")),
+    write=30.0,
+    pool=30.0,
+)
+# SDK-level retries are invisible to the circuit breakers; llm_call retries
+# instead (AGENT_LLM_CALL_RETRIES) and records every attempt.
+OPENAI_MAX_RETRIES = int(os.getenv("AGENT_OPENAI_MAX_RETRIES", "0"))
+PREWARM = os.getenv("AGENT_PREWARM", "").lower() in ("1", "true", "yes")
+PREWARM_CONNECTIONS = int(os.getenv("AGENT_PREWARM_CONNECTIONS", str(MAX_CONCURRENCY)))
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def build_http_client():
+    return httpx.Client(
+        http2=HTTP2_AVAILABLE,
+        timeout=OPENAI_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+            keepalive_expiry=OPENAI_KEEPALIVE_S,
+        ),
+    )
+
+
+def build_openai_client(api_key, base_url=None, http_client=None):
+    """Raw OpenAI client on the shared transport (not LangSmith-wrapped)"""
+    return OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        timeout=OPENAI_TIMEOUT,
+        max_retries=OPENAI_MAX_RETRIES,
+        http_client=http_client or build_http_client(),
+    )
+
+
+def prewarm_openai(client=None, connections=None):
+    """
+    Open pooled connections ahead of the first real call.
+
+    Issues concurrent GET /models requests so DNS, TCP and TLS setup happen
+    now (over HTTP/2 they share one multiplexed connection). Returns the
+    number of successful warm-up requests.
+    """
+    client = client or openai_raw_client
+    if client is None:
+        return 0
+    connections = connections or PREWARM_CONNECTIONS
+    started = time.perf_counter()
+
+    def warm():
+        try:
+            client.with_options(max_retries=0).models.list()
+            return True
+        except Exception as e:
+            logger.debug(f"[OpenAI] ⚠️ Pre-warm request failed: {e}")
+            return False
+
+    with ThreadPoolExecutor(max_workers=connections, thread_name_prefix="openai-prewarm") as pool:
+        warmed = sum(pool.map(lambda _: warm(), range(connections)))
+    logger.info(
+        f"[OpenAI] 🔥 Pre-warmed {warmed}/{connections} connections in "
+        f"{(time.perf_counter() - started) * 1000:.0f}ms"
+    )
+    return warmed
+
+
+# Tracing: AGENT_TRACING=off|sampled|on decides per run whether its LLM calls
+# go through the LangSmith-wrapped client (sampled runs use
+# AGENT_TRACE_SAMPLE_RATE). LangSmith's own env (LANGSMITH_TRACING, API key)
+# still gates export. Runs are queued by the client's background batch thread
+# and flushed once the response has been sent, never inside a node.
+TRACING_MODES = ("off", "sampled", "on")
+TRACING = os.getenv("AGENT_TRACING", "on").lower()
+if TRACING not in TRACING_MODES:
+    logger.warning(f"[Tracing] ⚠️ Unknown AGENT_TRACING '{TRACING}', using 'on'")
+    TRACING = "on"
+TRACE_SAMPLE_RATE = float(os.getenv("AGENT_TRACE_SAMPLE_RATE", "0.1"))
+
+tracing_client = None
+if TRACING != "off":
+    try:
+        tracing_client = LangSmithClient(auto_batch_tracing=True)
+    except Exception as e:
+        logger.warning(f"[Tracing] ⚠️ LangSmith client unavailable, tracing disabled: {e}")
+        TRACING = "off"
+
+
+def should_trace():
+    """Per-run tracing decision"""
+    if TRACING == "on":
+        return True
+    if TRACING == "sampled":
+        return random.random() < TRACE_SAMPLE_RATE
+    return False
+
+
+def traced_client(client):
+    """LangSmith-wrapped view of client (client itself when tracing is off)"""
+    if TRACING == "off":
+        return client
+    return wrap_openai(client, tracing_extra={"client": tracing_client})
+
+
+def flush_traces():
+    """Push queued trace batches; call after the response has been written"""
+    if tracing_client is None:
+        return
+    started = time.perf_counter()
+    try:
+        tracing_client.flush()
+    except Exception as e:
+        logger.warning(f"[Tracing] ⚠️ Trace flush failed: {e}")
+        return
+    logger.debug(f"[Tracing] 📤 Traces flushed in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+
 openai_api_key = os.environ.get("OPENAI_API_KEY")
 if openai_api_key:
     logger.info(
         f"[OpenAI] ✅ API key found (length: {len(openai_api_key)} chars, starts with: {openai_api_key[:10]}...)"
     )
-    openai_client = wrap_openai(OpenAI(api_key=openai_api_key))
-    logger.info("[OpenAI] ✅ OpenAI client successfully initialized")
+    openai_raw_client = build_openai_client(openai_api_key)
+    openai_client = traced_client(openai_raw_client)
+    logger.info(
+        f"[OpenAI] ✅ OpenAI client successfully initialized "
+        f"(pool {OPENAI_MAX_CONNECTIONS}, http2={HTTP2_AVAILABLE})"
+    )
+    if PREWARM:
+        # Overlaps with the rest of the cold start instead of the first request
+        threading.Thread(target=prewarm_openai, name="openai-prewarm", daemon=True).start()
 else:
     logger.error("[OpenAI] ❌ OPENAI_API_KEY not found in environment variables")
     logger.debug("[OpenAI] 🔍 Available environment variables:")
     for key in sorted(os.environ.keys()):
         if any(keyword in key.upper() for keyword in ["API", "KEY", "OPENAI"]):
             logger.debug(f"[OpenAI]   - {key}")
+    openai_raw_client = None
     openai_client = None
 
+
+def use_openai_client(raw_client):
+    """Route every LLM call through raw_client (benchmarks and tests inject fakes)"""
+    global openai_client, openai_raw_client
+    openai_raw_client = raw_client
+    openai_client = traced_client(raw_client)
+    return openai_client
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Prompts and Configuration
 # ──────────────────────────────────────────────────────────────────────────────
@@ -141,6 +323,105 @@ Return JSON array with exactly 5 topics in this format:
 Make each entry substantial (75-120 words) with enough movie-specific context for content creation.
 """.strip()
 
+# Fused selection mode: research also tags each topic so selection can be
+# made locally (see select_tagged)
+TOPIC_SENTIMENTS = ("positive", "controversial")
+RESEARCH_TAGS_INSTRUCTION = """
+Also tag every topic with two extra fields:
+- "sentiment": "positive" for exciting news (sequels, casting news, box office success, streaming releases) or "controversial" for delays, flops, casting controversies and industry drama
+- "engagement": an integer from 1 to 10 estimating how many clicks and shares the topic would get from movie fans aged 18-35
+""".strip()
+
+RESEARCH_BATCH_PROMPT = """
+Find 5 current, newsworthy topics strictly related to movies and the film industry for EACH of these movies, from {current_year} onwards:
+
+{movies}
+
+For each movie, consider news about the movie itself (sequels, reboots, anniversaries, streaming releases), its actors and directors, similar movies in the same genre/franchise, its cultural impact, streaming platform news, box office data, reviews or awards, and remakes or films it inspired.
+
+Requirements:
+- Every topic MUST have a clear, direct connection to its movie or the broader film industry
+- Keep each movie's research separate; never reuse a topic across movies
+- Information must be from {current_year} onwards (or recent developments about older films)
+- Focus on news that movie fans aged 18-35 would find engaging
+
+Return a JSON object keyed by movie title (exactly as listed above), each value an array of exactly 5 topics in this format:
+{{
+  "Movie Title": [
+    {{
+      "title": "Movie-focused title/hook",
+      "details": "Key details: what happened, who is involved, how it connects to the movie, why it matters to movie fans (75-120 words)",
+      "source": "Source URL from your research"
+    }}
+  ]
+}}
+""".strip()
+
+RESEARCH_DELTA_PROMPT = """
+Find {count} current, newsworthy topics strictly related to movies and the film industry that connect to the movie '{topic}', from {current_year} onwards.
+
+These topics are already covered; do NOT repeat them or report the same news:
+{known}
+
+Focus on what is specific to '{topic}' itself: its release, cast and crew news, reviews, box office and streaming.
+
+Requirements:
+- Every topic MUST have a clear, direct connection to the movie '{topic}' or the broader film industry
+- Information must be from {current_year} onwards
+- Focus on news that movie fans aged 18-35 would find engaging
+
+Return JSON array with exactly {count} topics in this format:
+[
+  {{
+    "title": "Movie-focused title/hook",
+    "details": "Key details: what happened, who is involved, how it connects to '{topic}', why it matters to movie fans (75-120 words)",
+    "source": "Source URL from your research"
+  }}
+]
+""".strip()
+
+RESEARCH_SINCE_PROMPT = """
+Find up to {count} NEW movie and film industry developments connected to the movie '{topic}'.
+
+Only report developments published after {since}. These stories were already covered; do NOT report them again:
+{seen}
+
+If nothing new has happened since {since}, return an empty JSON array: []
+
+Requirements:
+- Every topic MUST have a clear, direct connection to the movie '{topic}' or the broader film industry
+- Focus on news that movie fans aged 18-35 would find engaging
+
+Return a JSON array in this format:
+[
+  {{
+    "title": "Movie-focused title/hook",
+    "details": "Key details: what happened, who is involved, how it connects to '{topic}', why it matters to movie fans (75-120 words)",
+    "source": "Source URL from your research"
+  }}
+]
+""".strip()
+
+RESEARCH_FACET_PROMPT = """
+Find current, newsworthy movie and film industry news about one facet of the movie '{topic}', from {current_year} onwards.
+
+Facet: {facet}
+
+Requirements:
+- Every topic MUST have a clear, direct connection to the movie '{topic}'
+- Information must be from {current_year} onwards (or recent developments about an older film)
+- Skip the facet rather than pad it: fewer strong topics beat filler
+
+Return a JSON array of at most {count} topics in this format:
+[
+  {{
+    "title": "Movie-focused title/hook",
+    "details": "Key details: what happened, who is involved, how it connects to '{topic}', why it matters to movie fans (75-120 words)",
+    "source": "Source URL from your research"
+  }}
+]
+""".strip()
+
 TOPIC_SELECTOR_SYSTEM = """You are an expert content curator for entertainment news targeting pop-culture fans aged 18-35.
 
 Your task: Analyze the provided movie news topics and select exactly 3 topics that will maximize engagement:
@@ -155,6 +436,12 @@ Consider:
 
 Respond with only the numbers of your selected topics (e.g., "1, 3, 5")."""
 
+TOPIC_SELECTOR_PROMPT = """Analyze these movie news topics and select the 3 most engaging ones:
+
+{topics}Select exactly 3 topics (2 positive + 1 controversial) that will generate the most clicks and engagement."""
+
+TOPIC_SELECTOR_ITEM = "{number}. {title}\n   Details: {details}\n\n"
+
 EDITOR_PROMPT = """
 You are an experienced entertainment news editor creating engaging articles for mainstream pop culture fans aged 18–35.
 
@@ -179,6 +466,8 @@ Make sure the title is:
 - Reflects the article's main hook
 """
 
+EDITOR_USER_PROMPT = "Polish this draft and create an engaging title:\n\n{draft}"
+
 TOPIC_ITEM_RE = re.compile(r'^(?:\d+\.\s*|\-\s*)(?:\*\*|["\']?)(.+?)(?:\*\*|["\']?)$')
 
 logger.debug(f"[Config] ✅ Research prompt length: {len(RESEARCH_PROMPT)} chars")
@@ -187,6 +476,8 @@ logger.debug(
 )
 logger.debug(f"[Config] ✅ Regex pattern compiled: {TOPIC_ITEM_RE.pattern}")
 
+SEO_SYSTEM = "You are an expert SEO copywriter."
+
 SEO_PROMPT = """
 You are an expert SEO copywriter specializing in entertainment news for pop-culture fans aged 18–35.
 Create:
@@ -208,6 +499,79 @@ Return JSON in this exact shape:
   "seo_description": "..."
 }}"""
 
+TITLE_SYSTEM = "You are an experienced entertainment news editor."
+
+TITLE_PROMPT = """
+You are an entertainment news editor. The article below is already edited; write only a headline for it.
+
+The headline must be:
+- Attention-grabbing and click-worthy
+- SEO-optimized with relevant keywords
+- Under 60 characters for social media
+- Engaging for 18-35 year olds
+- A reflection of the article's main hook
+
+Opening:
+{lead}
+
+Sections:
+{headings}
+
+Return JSON in this exact shape:
+{{
+  "title": "..."
+}}"""
+
+SEO_WITH_TITLE_PROMPT = """
+You are an expert SEO copywriter specializing in entertainment news for pop-culture fans aged 18–35.
+Create:
+- An attention-grabbing article headline under 60 characters that reflects the article's main hook.
+- An SEO-friendly, click-worthy title under 60 characters that clearly references the movie/topic.
+- A meta description under 155 characters that summarizes the article, highlights the hook, and includes the movie/topic plus one related keyword.
+
+The topic refers to the movie or subject that inspired the article.
+
+Input:
+Topic: {topic}
+Content: {content}
+
+Return JSON in this exact shape:
+{{
+  "title": "...",
+  "seo_title": "...",
+  "seo_description": "..."
+}}"""
+
+# Locale editions: research, selection and drafting run once (in English); the
+# edit and SEO passes are repeated per locale with these instructions appended
+LOCALE_NAMES = {
+    "en": "English",
+    "es": "Spanish",
+    "pt": "Portuguese",
+    "pt-BR": "Brazilian Portuguese",
+    "fr": "French",
+    "de": "German",
+    "it": "Italian",
+}
+DEFAULT_LOCALE = "en"
+MAX_LOCALES = int(os.getenv("AGENT_MAX_LOCALES", "4"))
+
+LOCALE_EDITOR_INSTRUCTION = """
+
+Write the finished article (title and content) in {language}. Translate naturally for native {language}-speaking movie fans rather than word for word, and keep movie titles, names and outlet names as they are."""
+
+LOCALE_SEO_INSTRUCTION = """
+
+Write every field in {language}, for {language}-speaking searchers; keep the movie title as it is."""
+
+
+def locale_instruction(template, locale):
+    """template filled for locale; empty for the default (source) locale"""
+    if not locale or locale == DEFAULT_LOCALE:
+        return ""
+    return template.format(language=LOCALE_NAMES.get(locale, locale))
+
+
 DRAFT_PROMPT = """
 You are an entertainment news writer creating engaging article drafts for pop culture fans aged 18-35.
 
@@ -261,228 +625,1834 @@ The "sources" array must include the primary research URL: {research_url} plus a
 RESPOND WITH JSON ONLY - NO OTHER TEXT OR FORMATTING.
 """.strip()
 
+# Research-grounded variant: no per-article web search; writes from the research
+# step's findings plus (optionally) one shared search made once per run.
+DRAFT_PROMPT_GROUNDED = """
+You are an entertainment news writer creating engaging article drafts for pop culture fans aged 18-35.
 
-# ──────────────────────────────────────────────────────────────────────────────
-# State Definitions
-# ──────────────────────────────────────────────────────────────────────────────
-logger.info("[State] 📋 Defining pipeline state structure...")
-
-
-class PipelineState(TypedDict):
-    topic: str
-    raw_topics: List[str]
-    selected_topics: List[str]
-    drafts: List[str]
-    finals: List[dict]
-    sources: List[str]
-    posts: List[dict]
-    research_context: List[dict]
-    selected_research: List[dict]
-
-
-logger.info("[State] ✅ PipelineState TypedDict defined successfully")
+Write a compelling, well-structured draft article based ONLY on the research provided below. Do not invent quotes, numbers or sources.
 
-# ──────────────────────────────────────────────────────────────────────────────
-# AGENT NODES
-# ──────────────────────────────────────────────────────────────────────────────
+ORIGINAL MOVIE REFERENCE: {original_topic}
 
+PRIMARY RESEARCH:
+Title: {research_title}
+Details: {research_details}
+Source: {research_url}
 
-def research_node(state: PipelineState) -> PipelineState:
-    logger.info("[Research] 🔍 === RESEARCH NODE STARTING ===")
+RELATED RESEARCH FROM THE SAME RUN (use for context, comparisons and background):
+{background}
 
-    topic = state["topic"]
-    logger.info(f"[Research] 🎯 Topic received: '{topic}' (length: {len(topic)} chars)")
+WRITING GUIDELINES:
+- Start with an attention-grabbing hook that connects to '{original_topic}'
+- Build the article around the primary research; weave in related research where it adds context
+- Write in a conversational, engaging tone with personality
+- Use short paragraphs (2-4 sentences each) for easy reading
+- Reference the connection to '{original_topic}' and why this matters to movie fans
+- Add subheadings (##) to break up the content
+- End with a forward-looking statement or question to engage readers
 
-    if not openai_client:
-        logger.error("[Research] ❌ OpenAI client not available - cannot proceed")
-        return {"raw_topics": [], "research_context": []}
+Keep the draft between 300-500 words. Write as if you're talking to a friend who loves movies.
 
-    current_year = datetime.now().year
-    logger.info(f"[Research] 📅 Current year determined: {current_year}")
+CRITICAL: You MUST respond ONLY with valid JSON. Do NOT include any text before or after the JSON. Do NOT use markdown code blocks. Do NOT add explanations.
 
-    prompt = RESEARCH_PROMPT.format(topic=topic, current_year=current_year)
-    logger.debug(
-        f"[Research] 📝 Formatted prompt ({len(prompt)} chars): {prompt[:200]}..."
-    )
+REQUIRED OUTPUT FORMAT - RETURN EXACTLY THIS STRUCTURE:
+{{
+  "draft": "Your complete article draft here as a single string with \\n for line breaks and ## for subheadings...",
+  "sources": ["url1", "url2"]
+}}
 
-    try:
-        logger.info("[Research] 📡 Making OpenAI API call with web search...")
-        logger.debug(
-            "[Research] 🔧 API parameters: model=gpt-4o-mini, tools=[web_search_preview]"
-        )
+The "sources" array must include the primary research URL: {research_url} plus any URLs from the related research you actually used.
 
-        resp = openai_client.responses.create(
-            model="gpt-4o-mini", input=prompt, tools=[{"type": "web_search_preview"}]
-        )
+RESPOND WITH JSON ONLY - NO OTHER TEXT OR FORMATTING.
+""".strip()
 
-        logger.info("[Research] ✅ OpenAI API call completed successfully")
-        raw_text = resp.output_text
-        logger.info(f"[Research] 📄 Raw response received ({len(raw_text)} chars)")
-        logger.debug(f"[Research] 📄 Response preview: {raw_text[:300]}...")
+SHARED_SEARCH_PROMPT = """
+Search the web once for complementary context on these movie news stories connected to '{original_topic}':
 
-        def extract_json_from_response(text):
-            """Extract JSON from response, handling various formats"""
-            text = text.strip()
+{stories}
 
-            # Method 1: Remove markdown code blocks completely
-            if text.startswith("```"):
-                # Find the actual JSON content between code fences
-                lines = text.split("\n")
-                start_idx = 0
-                end_idx = len(lines)
+Collect what the stories themselves lack: notable quotes or statements, industry or critic reactions, fan buzz, box office or market context. Write concise bullet-point notes (max 200 words) grouped by story number, each note followed by its source URL in parentheses.
+""".strip()
 
-                # Find start of JSON (skip ```json or just ```
-                for i, line in enumerate(lines):
-                    if line.strip().startswith("```"):
-                        start_idx = i + 1
-                        break
+DRAFT_SHARED_NOTES = "\nADDITIONAL WEB FINDINGS:\n{notes}"
+
+# Every prompt template sent to the models. _history.config_fingerprints hashes
+# these (and nothing else), so a new template must be added here.
+PROMPT_TEMPLATES = {
+    "RESEARCH_PROMPT": RESEARCH_PROMPT,
+    "RESEARCH_TAGS_INSTRUCTION": RESEARCH_TAGS_INSTRUCTION,
+    "RESEARCH_BATCH_PROMPT": RESEARCH_BATCH_PROMPT,
+    "RESEARCH_DELTA_PROMPT": RESEARCH_DELTA_PROMPT,
+    "RESEARCH_SINCE_PROMPT": RESEARCH_SINCE_PROMPT,
+    "RESEARCH_FACET_PROMPT": RESEARCH_FACET_PROMPT,
+    "TOPIC_SELECTOR_SYSTEM": TOPIC_SELECTOR_SYSTEM,
+    "TOPIC_SELECTOR_PROMPT": TOPIC_SELECTOR_PROMPT,
+    "TOPIC_SELECTOR_ITEM": TOPIC_SELECTOR_ITEM,
+    "DRAFT_PROMPT": DRAFT_PROMPT,
+    "DRAFT_PROMPT_GROUNDED": DRAFT_PROMPT_GROUNDED,
+    "DRAFT_SHARED_NOTES": DRAFT_SHARED_NOTES,
+    "SHARED_SEARCH_PROMPT": SHARED_SEARCH_PROMPT,
+    "EDITOR_PROMPT": EDITOR_PROMPT,
+    "EDITOR_USER_PROMPT": EDITOR_USER_PROMPT,
+    "TITLE_SYSTEM": TITLE_SYSTEM,
+    "TITLE_PROMPT": TITLE_PROMPT,
+    "SEO_SYSTEM": SEO_SYSTEM,
+    "SEO_PROMPT": SEO_PROMPT,
+    "SEO_WITH_TITLE_PROMPT": SEO_WITH_TITLE_PROMPT,
+    "LOCALE_EDITOR_INSTRUCTION": LOCALE_EDITOR_INSTRUCTION,
+    "LOCALE_SEO_INSTRUCTION": LOCALE_SEO_INSTRUCTION,
+}
 
-                # Find end of JSON (look for closing ```
-                for i in range(len(lines) - 1, -1, -1):
-                    if lines[i].strip() == "```":
-                        end_idx = i
-                        break
 
-                # Extract JSON content
-                json_lines = lines[start_idx:end_idx]
-                text = "\n".join(json_lines).strip()
-                logger.debug(
-                    f"[Research] 🔧 Extracted JSON from markdown: {len(text)} chars"
-                )
+# ──────────────────────────────────────────────────────────────────────────────
+# Token Budgeting
+# ──────────────────────────────────────────────────────────────────────────────
+logger.info("[Tokens] 🧮 Setting up token budgets...")
+
+# Per-node input ceilings (in tokens) for the variable part of each prompt.
+# Override with AGENT_TOKEN_BUDGET_<NODE>, e.g. AGENT_TOKEN_BUDGET_SEO_GENERATOR=200.
+# A budget of 0 disables trimming for that node.
+DEFAULT_TOKEN_BUDGETS = {
+    "select_topics": 40,  # per research item details
+    "edit": 1500,  # full draft; only bites on runaway drafts
+    "seo_generator": 250,  # SEO metadata only needs the gist
+    "draft_background": 500,  # related research + shared notes in grounded drafts
+}
 
-            # Method 2: Find JSON array boundaries
-            first_bracket = text.find("[")
-            last_bracket = text.rfind("]")
+TOKEN_BUDGETS = {
+    node: int(os.getenv(f"AGENT_TOKEN_BUDGET_{node.upper()}", default))
+    for node, default in DEFAULT_TOKEN_BUDGETS.items()
+}
+logger.debug(f"[Tokens] ✅ Token budgets: {TOKEN_BUDGETS}")
 
-            if (
-                first_bracket != -1
-                and last_bracket != -1
-                and first_bracket < last_bracket
-            ):
-                text = text[first_bracket : last_bracket + 1]
-                logger.debug(f"[Research] 🔧 Extracted JSON array: {len(text)} chars")
+_APPROX_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+_token_encoder = None
+_token_encoder_loaded = False
 
-            # Method 3: Clean up any remaining artifacts
-            text = re.sub(r"```[a-z]*\n?", "", text)  # Remove any remaining code fences
-            text = re.sub(r"\n```$", "", text)  # Remove trailing code fence
-            text = text.strip()
 
-            return text
+def _get_token_encoder():
+    """Lazily load tiktoken; fall back to a local approximation when unavailable"""
+    global _token_encoder, _token_encoder_loaded
 
+    if not _token_encoder_loaded:
+        _token_encoder_loaded = True
         try:
-            # Use robust JSON extraction
-            cleaned_text = extract_json_from_response(raw_text)
-            logger.debug(
-                f"[Research] 🧹 Cleaned text ({len(cleaned_text)} chars): {cleaned_text[:200]}..."
+            import tiktoken
+
+            _token_encoder = tiktoken.get_encoding("o200k_base")
+            logger.info("[Tokens] ✅ Using tiktoken o200k_base tokenizer")
+        except Exception as e:
+            logger.warning(
+                f"[Tokens] ⚠️ tiktoken unavailable ({type(e).__name__}), using approximate counts"
             )
+    return _token_encoder
 
-            # Parse JSON response
-            research_data = json.loads(cleaned_text)
-            logger.info(f"[Research] ✅ Parsed JSON with {len(research_data)} entries")
 
-            research_context = []
-            raw_topics = []
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    """Count tokens in text (memoised, since drafts are re-counted while trimming)"""
+    encoder = _get_token_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text))
 
-            for i, entry in enumerate(research_data[:5], 1):
-                title = entry.get("title", f"Untitled {i}")
-                details = entry.get("details", "")
-                source = entry.get("source", "")
+    # Approximation: one token per punctuation mark, ~4 chars per word piece
+    return sum(max(1, math.ceil(len(t) / 4)) for t in _APPROX_TOKEN_RE.findall(text))
 
-                # Clean up the source URL (extract from markdown if needed)
-                url_match = re.search(r"https?://[^\s)]+", source)
-                url = url_match.group(0) if url_match else source
 
-                research_context.append(
-                    {"title": title, "details": details, "url": url}
-                )
-                raw_topics.append(f"{title} - {details}")
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text at the last sentence (or word) boundary that fits max_tokens"""
+    sentences = _SENTENCE_END_RE.split(text.strip())
+    kept = []
+    for sentence in sentences:
+        candidate = " ".join(kept + [sentence])
+        if count_tokens(candidate) > max_tokens:
+            break
+        kept.append(sentence)
+
+    if kept:
+        return " ".join(kept)
+
+    # Not even one sentence fits: fall back to words
+    words = text.split()
+    low, high = 0, len(words)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(" ".join(words[:mid]) + "...") <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return " ".join(words[:low]) + "..." if low else ""
+
+
+def fit_to_token_budget(text: str, max_tokens: int) -> tuple:
+    """
+    Trim text to max_tokens while keeping its skeleton.
+
+    Headings (## lines) and the lead paragraph are always kept. Remaining
+    paragraphs are added in document order while they fit; a paragraph that
+    does not fit is summarised down to its first sentence when that fits.
+
+    Returns (trimmed_text, tokens_saved).
+    """
+    if not text or max_tokens <= 0:
+        return text, 0
+
+    original_tokens = count_tokens(text)
+    if original_tokens <= max_tokens:
+        return text, 0
+
+    # Split into blocks: heading lines stand alone, paragraphs split on blank lines
+    blocks = []
+    for paragraph in re.split(r"\n\s*\n", text.strip()):
+        body_lines = []
+        for line in paragraph.split("\n"):
+            if line.lstrip().startswith("#"):
+                if body_lines:
+                    blocks.append(("body", "\n".join(body_lines).strip()))
+                    body_lines = []
+                blocks.append(("heading", line.strip()))
+            elif line.strip():
+                body_lines.append(line)
+        if body_lines:
+            blocks.append(("body", "\n".join(body_lines).strip()))
+
+    lead_index = next((i for i, (kind, _) in enumerate(blocks) if kind == "body"), None)
+    kept = {i: block for i, (kind, block) in enumerate(blocks) if kind == "heading"}
+    if lead_index is not None:
+        kept[lead_index] = blocks[lead_index][1]
+
+    def used_tokens():
+        return sum(count_tokens(kept[i]) + 1 for i in kept)
+
+    # Mandatory parts alone may exceed the budget: shorten the lead first
+    if used_tokens() > max_tokens and lead_index is not None:
+        remaining = max_tokens - (used_tokens() - count_tokens(kept[lead_index]) - 1)
+        kept[lead_index] = _truncate_to_tokens(kept[lead_index], max(remaining - 1, 0))
+
+    for i, (kind, block) in enumerate(blocks):
+        if kind != "body" or i in kept:
+            continue
+        remaining = max_tokens - used_tokens()
+        if count_tokens(block) + 1 <= remaining:
+            kept[i] = block
+            continue
+        first_sentence = _SENTENCE_END_RE.split(block, maxsplit=1)[0]
+        if count_tokens(first_sentence) + 1 <= remaining:
+            kept[i] = first_sentence
+
+    trimmed = "\n\n".join(kept[i] for i in sorted(kept) if kept[i])
+    if count_tokens(trimmed) > max_tokens:
+        # Headings alone overflow (pathological input): hard cut
+        trimmed = _truncate_to_tokens(trimmed, max_tokens)
+
+    return trimmed, original_tokens - count_tokens(trimmed)
+
+
+def apply_token_budget(node: str, text: str, label: str = "input") -> str:
+    """Trim text to the configured budget for node and log the tokens saved"""
+    budget = TOKEN_BUDGETS.get(node, 0)
+    trimmed, saved = fit_to_token_budget(text, budget)
+    if saved:
+        logger.info(
+            f"[Tokens] ✂️ {node} {label}: trimmed to {budget} tokens (saved {saved} tokens)"
+        )
+    return trimmed
 
-                logger.info(f"[Research]   Parsed Topic {i}: '{title}'")
-                logger.debug(f"[Research]   Details {i}: {details[:100]}...")
-                logger.debug(f"[Research]   URL {i}: {url}")
 
-            logger.info(
-                f"[Research] ✅ Successfully parsed {len(research_context)} topics"
+# ──────────────────────────────────────────────────────────────────────────────
+# Run Context
+# ──────────────────────────────────────────────────────────────────────────────
+# Per-run bookkeeping (LLM call records, counters) carried in a ContextVar so
+# every node and helper can reach it without threading it through the state.
+
+
+class RunContext:
+    def __init__(self, run_id=None, traced=None, priority="interactive"):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.traced = should_trace() if traced is None else traced
+        self.priority = priority  # one of PRIORITY_CLASSES, applied to every LLM call
+        self.started = time.time()
+        self.calls = []
+        self.counters = {}
+        self.node_ms = {}  # graph node -> wall time
+        self.profile = None  # RunProfile while the run is being profiled
+        self.profile_summary = None
+        self._lock = threading.Lock()
+
+    def record_call(self, **record):
+        with self._lock:
+            self.calls.append(record)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_node(self, name, elapsed_ms):
+        with self._lock:
+            self.node_ms[name] = self.node_ms.get(name, 0) + round(elapsed_ms)
+
+    def summary(self):
+        with self._lock:
+            calls = list(self.calls)
+            counters = dict(self.counters)
+            node_ms = dict(self.node_ms)
+
+        by_node = {}
+        for call in calls:
+            node = by_node.setdefault(
+                call["node"],
+                {"calls": 0, "failures": 0, "fallbacks": 0, "latency_ms": 0, "models": []},
             )
-            return {"raw_topics": raw_topics, "research_context": research_context}
+            node["calls"] += 1
+            node["failures"] += 0 if call["ok"] else 1
+            # Answered by a model further down the chain than the first choice
+            node["fallbacks"] += 1 if call["ok"] and call.get("attempt", 1) > 1 else 0
+            node["latency_ms"] += call["latency_ms"]
+            if call["model"] not in node["models"]:
+                node["models"].append(call["model"])
 
-        except json.JSONDecodeError as json_error:
-            logger.error(f"[Research] 💥 JSON parse error: {json_error}")
-            logger.debug(f"[Research] 💥 Cleaned text was: {cleaned_text[:500]}...")
+        return {
+            "run_id": self.run_id,
+            "traced": self.traced,
+            "priority": self.priority,
+            "elapsed_ms": round((time.time() - self.started) * 1000),
+            "llm_calls": len(calls),
+            "input_tokens": sum(c.get("input_tokens", 0) for c in calls),
+            "output_tokens": sum(c.get("output_tokens", 0) for c in calls),
+            "nodes": by_node,
+            "node_ms": node_ms,
+            "counters": counters,
+        }
 
-            # Enhanced fallback parsing for numbered lists
-            logger.warning("[Research] 🔄 Falling back to enhanced text parsing...")
 
-            # Split by numbered entries and parse each one
-            entries = re.split(r"\n(?=\d+\.)", raw_text.strip())
-            entries = [
-                entry.strip()
-                for entry in entries
-                if entry.strip() and re.match(r"^\d+\.", entry)
-            ]
+_current_run = contextvars.ContextVar("current_run", default=None)
 
-            research_context = []
-            raw_topics = []
 
-            for i, entry in enumerate(entries[:5], 1):
-                # Extract title from quotes or first line
-                title_match = re.search(r'"([^"]+)"', entry) or re.search(
-                    r"\*\*([^*]+)\*\*", entry
-                )
-                if title_match:
-                    title = title_match.group(1).strip()
-                else:
-                    # Fallback: use first 50 chars after number
-                    first_line = entry.split("\n")[0]
-                    title = re.sub(r"^\d+\.\s*", "", first_line)[:50] + "..."
-
-                # Extract URL
-                url_match = re.search(r"https?://[^\s)]+", entry)
-                url = url_match.group(0) if url_match else ""
-
-                # Extract details (everything except title and URL)
-                details = entry
-                if title_match:
-                    details = details.replace(title_match.group(0), "")
-                if url_match:
-                    details = details.replace(url_match.group(0), "")
-
-                # Clean up details
-                details = re.sub(r"^\d+\.\s*", "", details)  # Remove number
-                details = re.sub(
-                    r"\([^)]*\)$", "", details
-                )  # Remove trailing citations
-                details = details.strip(" -.,")
-
-                research_context.append(
-                    {"title": title, "details": details, "url": url}
-                )
-                raw_topics.append(f"{title} - {details}")
+def current_run():
+    """The RunContext of the pipeline run in progress, if any"""
+    return _current_run.get()
 
-                logger.info(f"[Research]   Fallback Topic {i}: '{title}'")
 
-            return {"raw_topics": raw_topics, "research_context": research_context}
+def submit_with_context(pool, fn, *args, **kwargs):
+    """Submit fn to pool so it runs inside a copy of the caller's context (run, etc.)"""
+    run = current_run()
+    if run is not None and run.profile is not None:
+        fn = run.profile.worker(fn)
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
 
-    except Exception as e:
-        logger.error(f"[Research] 💥 Error during research: {e}")
-        logger.error(f"[Research] 💥 Error type: {type(e).__name__}")
-        import traceback
 
-        logger.error(f"[Research] 💥 Full traceback: {traceback.format_exc()}")
-        logger.error("[Research] 🏁 === RESEARCH NODE FAILED ===")
-        return {"raw_topics": [], "research_context": []}
+def note_fallback(node):
+    """Count a node falling back to degraded output (unparseable response, error)"""
+    run = current_run()
+    if run:
+        run.count(f"fallback.{node}")
 
 
-def select_topics_node(state: PipelineState) -> PipelineState:
-    logger.info("[TopicSelector] 🎯 === TOPIC SELECTOR NODE STARTING ===")
+class run_context:
+    """Context manager that makes a fresh RunContext current for a pipeline run"""
 
-    research_context = state.get("research_context", [])
-    raws = state.get("raw_topics", [])
+    def __init__(self, run=None):
+        self.run = run or RunContext()
+        self._token = None
 
-    logger.info(
-        f"[TopicSelector] 📥 Received {len(research_context)} research context items"
-    )
-    logger.info(f"[TopicSelector] 📥 Received {len(raws)} raw topics (fallback)")
+    def __enter__(self):
+        self._token = _current_run.set(self.run)
+        return self.run
+
+    def __exit__(self, *exc):
+        _current_run.reset(self._token)
+        return False
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Profiling
+# ──────────────────────────────────────────────────────────────────────────────
+# Opt-in per-run profiling (X-Profile-Token header or AGENT_PROFILE=1); see
+# _profiling.py. Every graph node is wrapped by profiled(), which times it and
+# hands it to the run's RunProfile when the run is being profiled.
+import _profiling  # noqa: E402
+
+
+def profiled(name, fn):
+    """Graph node wrapper: times the node, and profiles it when the run is profiled"""
+
+    @wraps(fn)
+    def node(state):
+        run = current_run()
+        if run is None:
+            return fn(state)
+        started = time.perf_counter()
+        try:
+            if run.profile is None:
+                return fn(state)
+            return run.profile.run_node(name, fn, state)
+        finally:
+            run.record_node(name, (time.perf_counter() - started) * 1000)
+
+    return node
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Circuit Breakers
+# ──────────────────────────────────────────────────────────────────────────────
+# One process-wide breaker per (api, model). A call fails when it times out,
+# cannot connect, gets a 429/5xx, or succeeds slower than BREAKER_SLOW_MS. A
+# breaker opens after BREAKER_CONSECUTIVE_FAILURES failures in a row, or when,
+# over the last BREAKER_WINDOW_S, at least BREAKER_MIN_CALLS calls were made and
+# the share that failed reaches BREAKER_FAILURE_RATE. While open, llm_call skips
+# the model without waiting; if every candidate is open it raises
+# CircuitOpenError, which nodes re-raise so the run stops and the handler
+# answers 503. After BREAKER_OPEN_S a single half-open probe decides whether to
+# close again.
+#
+# llm_call retries a failed call up to LLM_CALL_RETRIES times (the OpenAI SDK's
+# own retries are off, see OPENAI_MAX_RETRIES) and records each attempt, so a
+# hanging backend trips the breaker after a few read timeouts instead of after
+# several minutes of hidden SDK retries. The default window spans every
+# attempt of one call at the read timeout.
+
+LLM_CALL_RETRIES = int(os.getenv("AGENT_LLM_CALL_RETRIES", "2"))
+LLM_RETRY_BACKOFF_S = float(os.getenv("AGENT_LLM_RETRY_BACKOFF_S", "0.5"))
+BREAKER_ENABLED = os.getenv("AGENT_BREAKER", "1") == "1"
+BREAKER_WINDOW_S = float(
+    os.getenv("AGENT_BREAKER_WINDOW_S", str(OPENAI_READ_TIMEOUT_S * (LLM_CALL_RETRIES + 1)))
+)
+BREAKER_CONSECUTIVE_FAILURES = int(os.getenv("AGENT_BREAKER_CONSECUTIVE_FAILURES", "3"))
+BREAKER_MIN_CALLS = int(os.getenv("AGENT_BREAKER_MIN_CALLS", "4"))
+BREAKER_FAILURE_RATE = float(os.getenv("AGENT_BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_SLOW_MS = float(os.getenv("AGENT_BREAKER_SLOW_MS", "60000"))
+BREAKER_OPEN_S = float(os.getenv("AGENT_BREAKER_OPEN_S", "30"))
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling OpenAI when every model for a node is open"""
+
+    def __init__(self, node, retry_after):
+        super().__init__(f"OpenAI circuit open for {node}, retry after {retry_after}s")
+        self.node = node
+        self.retry_after = retry_after
+
+
+def breaker_failure(exc):
+    """Whether an OpenAI exception says the service (not the request) is unhealthy"""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        return True  # timeouts, connection errors
+    return status == 429 or status >= 500
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name,
+        window_s=BREAKER_WINDOW_S,
+        min_calls=BREAKER_MIN_CALLS,
+        failure_rate=BREAKER_FAILURE_RATE,
+        open_s=BREAKER_OPEN_S,
+        consecutive_failures=BREAKER_CONSECUTIVE_FAILURES,
+    ):
+        self.name = name
+        self.window_s = window_s
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_s = open_s
+        self.consecutive_failures = consecutive_failures
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.probing = False
+        self.rejected = 0
+        self.transitions = {}
+        self._outcomes = deque()  # (monotonic time, failed)
+        self._failure_streak = 0
+        self._lock = threading.Lock()
+
+    def _transition(self, state):
+        key = f"{self.state}->{state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        logger.warning(f"[Breaker] 🔌 {self.name}: {self.state} → {state}")
+        self.state = state
+        if state == "open":
+            self.opened_at = time.monotonic()
+        elif state == "closed":
+            self._outcomes.clear()
+        self._failure_streak = 0
+
+    def retry_after(self):
+        """Seconds until the breaker will let a probe through"""
+        with self._lock:
+            remaining = self.open_s - (time.monotonic() - self.opened_at)
+        return max(1, math.ceil(remaining))
+
+    def allow(self):
+        """Whether a call may go out now (claims the probe when half-open)"""
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.open_s:
+                    self.rejected += 1
+                    return False
+                self._transition("half_open")
+            if self.state == "half_open":
+                if self.probing:
+                    self.rejected += 1
+                    return False
+                self.probing = True
+            return True
+
+    def record(self, failed):
+        with self._lock:
+            if self.state == "half_open":
+                self.probing = False
+                self._transition("open" if failed else "closed")
+                return
+            if self.state == "open":
+                return  # a call that started before the breaker opened
+
+            now = time.monotonic()
+            self._outcomes.append((now, failed))
+            while self._outcomes and now - self._outcomes[0][0] > self.window_s:
+                self._outcomes.popleft()
+            self._failure_streak = self._failure_streak + 1 if failed else 0
+            calls = len(self._outcomes)
+            failures = sum(1 for _, f in self._outcomes if f)
+            if (
+                self.consecutive_failures and self._failure_streak >= self.consecutive_failures
+            ) or (calls >= self.min_calls and failures / calls >= self.failure_rate):
+                self._transition("open")
+
+    def snapshot(self):
+        with self._lock:
+            calls = len(self._outcomes)
+            failures = sum(1 for _, f in self._outcomes if f)
+            snapshot = {
+                "state": self.state,
+                "window_calls": calls,
+                "failure_rate": round(failures / calls, 3) if calls else 0.0,
+                "failure_streak": self._failure_streak,
+                "rejected": self.rejected,
+                "transitions": dict(self.transitions),
+            }
+        if snapshot["state"] == "open":
+            snapshot["retry_after_s"] = self.retry_after()
+        return snapshot
+
+
+class CircuitBreakers:
+    def __init__(self, **settings):
+        self.settings = settings  # CircuitBreaker overrides (window_s, open_s, ...)
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, api, model):
+        key = f"{api}:{model}"
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(key, **self.settings)
+            return breaker
+
+    def snapshot(self):
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {key: breaker.snapshot() for key, breaker in breakers.items()}
+
+
+circuit_breakers = CircuitBreakers()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Call Scheduling
+# ──────────────────────────────────────────────────────────────────────────────
+# Process-wide cap on in-flight OpenAI calls (sized to the HTTP pool, whose own
+# queue is plain FIFO). When all slots are busy, callers queue by their run's
+# priority class: interactive before batch before prefetch. A waiting call's
+# rank improves by one class every PRIORITY_AGING_S, so a prefetch call that has
+# waited two aging periods competes with fresh interactive calls (no starvation).
+
+PRIORITY_CLASSES = ("interactive", "batch", "prefetch")
+LLM_CALL_SLOTS = int(os.getenv("AGENT_LLM_CALL_SLOTS", str(OPENAI_MAX_CONNECTIONS)))
+PRIORITY_AGING_S = float(os.getenv("AGENT_PRIORITY_AGING_S", "10"))
+
+
+class _Ticket:
+    __slots__ = ("priority", "rank", "seq", "enqueued", "granted")
+
+    def __init__(self, priority, rank, seq):
+        self.priority = priority
+        self.rank = rank
+        self.seq = seq
+        self.enqueued = time.monotonic()
+        self.granted = threading.Event()
+
+
+class CallScheduler:
+    def __init__(self, slots=LLM_CALL_SLOTS, aging_s=PRIORITY_AGING_S, prioritize=True):
+        self.slots = max(1, slots)
+        self.aging_s = aging_s
+        self.prioritize = prioritize  # False: plain FIFO (for comparison)
+        self.active = 0
+        self._waiting = []
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def _effective_rank(self, ticket, now):
+        if not self.prioritize:
+            return (0, ticket.seq)
+        return (ticket.rank - (now - ticket.enqueued) / self.aging_s, ticket.seq)
+
+    def acquire(self, priority="interactive"):
+        """Block until a call slot is free for priority; returns seconds waited"""
+        rank = PRIORITY_CLASSES.index(priority) if priority in PRIORITY_CLASSES else 0
+        with self._lock:
+            if self.active < self.slots and not self._waiting:
+                self.active += 1
+                return 0.0
+            self._seq += 1
+            ticket = _Ticket(priority, rank, self._seq)
+            self._waiting.append(ticket)
+        ticket.granted.wait()
+        return time.monotonic() - ticket.enqueued
+
+    def release(self):
+        with self._lock:
+            if not self._waiting:
+                self.active -= 1
+                return
+            # Hand the slot straight to the best-ranked waiter
+            now = time.monotonic()
+            ticket = min(self._waiting, key=lambda t: self._effective_rank(t, now))
+            self._waiting.remove(ticket)
+        ticket.granted.set()
+
+    def snapshot(self):
+        with self._lock:
+            waiting = [t.priority for t in self._waiting]
+            active = self.active
+        return {
+            "slots": self.slots,
+            "active": active,
+            "waiting": {p: waiting.count(p) for p in PRIORITY_CLASSES},
+        }
+
+
+call_scheduler = CallScheduler()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Model Routing
+# ──────────────────────────────────────────────────────────────────────────────
+# Each node gets an ordered fallback chain of models. Configure through env:
+#   AGENT_MODEL_<NODE>=gpt-4.1-mini,gpt-4o-mini   (chain, first = preferred)
+#   AGENT_MODEL_STRATEGY_<NODE>=latency           (or AGENT_MODEL_STRATEGY)
+# or a JSON file referenced by AGENT_MODEL_CONFIG:
+#   {"draft": {"models": ["gpt-4.1", "gpt-4o-mini"], "strategy": "ordered"}}
+# "ordered" tries the chain in order; "latency" tries the model with the lowest
+# rolling p95 first (models without enough samples are tried first to learn).
+logger.info("[Router] 🧭 Setting up model routing...")
+
+DEFAULT_MODEL = os.getenv("AGENT_DEFAULT_MODEL", "gpt-4o-mini")
+MODEL_NODES = (
+    "research",
+    "select_topics",
+    "draft",
+    "draft_search",
+    "edit",
+    "edit_title",
+    "seo_generator",
+)
+ROUTER_WINDOW = int(os.getenv("AGENT_ROUTER_WINDOW", "50"))
+ROUTER_MIN_SAMPLES = int(os.getenv("AGENT_ROUTER_MIN_SAMPLES", "5"))
+
+
+def _load_model_routes():
+    routes = {
+        node: {"models": [DEFAULT_MODEL], "strategy": "ordered"} for node in MODEL_NODES
+    }
+
+    config_path = os.getenv("AGENT_MODEL_CONFIG", "")
+    if config_path:
+        try:
+            with open(config_path, "r", encoding="utf-8") as f:
+                file_routes = json.load(f)
+            for node, route in file_routes.items():
+                if isinstance(route, str):
+                    route = {"models": [m.strip() for m in route.split(",")]}
+                routes.setdefault(node, {"models": [DEFAULT_MODEL], "strategy": "ordered"})
+                routes[node].update(route)
+            logger.info(f"[Router] ✅ Loaded model routes from {config_path}")
+        except (OSError, ValueError) as e:
+            logger.error(f"[Router] 💥 Could not read {config_path}: {e}")
+
+    global_strategy = os.getenv("AGENT_MODEL_STRATEGY", "")
+    for node in routes:
+        models = os.getenv(f"AGENT_MODEL_{node.upper()}", "")
+        if models:
+            routes[node]["models"] = [m.strip() for m in models.split(",") if m.strip()]
+        strategy = os.getenv(f"AGENT_MODEL_STRATEGY_{node.upper()}", global_strategy)
+        if strategy:
+            routes[node]["strategy"] = strategy
+
+    return routes
+
+
+class ModelRouter:
+    def __init__(self, routes, window=ROUTER_WINDOW, min_samples=ROUTER_MIN_SAMPLES):
+        self.routes = routes
+        self.window = window
+        self.min_samples = min_samples
+        self._latencies = {}
+        self._lock = threading.Lock()
+
+    def record(self, model, latency_ms):
+        with self._lock:
+            samples = self._latencies.setdefault(model, deque(maxlen=self.window))
+            samples.append(latency_ms)
+
+    def p95(self, model):
+        with self._lock:
+            samples = sorted(self._latencies.get(model, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))]
+
+    def candidates(self, node):
+        """Models to try for node, in order"""
+        route = self.routes.get(node) or {"models": [DEFAULT_MODEL], "strategy": "ordered"}
+        models = list(route["models"]) or [DEFAULT_MODEL]
+        if route.get("strategy") != "latency":
+            return models
+
+        def sort_key(model):
+            p95 = self.p95(model)
+            # Unsampled models first (in config order) so we learn their latency
+            return (0, 0) if p95 is None else (1, p95)
+
+        return sorted(models, key=sort_key)
+
+    def snapshot(self):
+        return {
+            node: {
+                "models": route["models"],
+                "strategy": route.get("strategy", "ordered"),
+                "p95_ms": {m: self.p95(m) for m in route["models"]},
+            }
+            for node, route in self.routes.items()
+        }
+
+
+model_router = ModelRouter(_load_model_routes())
+logger.debug(f"[Router] ✅ Model routes: {model_router.routes}")
+
+
+def _usage_tokens(resp):
+    """(input_tokens, output_tokens) from a Responses or Chat Completions result"""
+    usage = getattr(resp, "usage", None)
+    if usage is None:
+        return 0, 0
+    input_tokens = getattr(usage, "input_tokens", None)
+    if input_tokens is None:
+        input_tokens = getattr(usage, "prompt_tokens", 0)
+    output_tokens = getattr(usage, "output_tokens", None)
+    if output_tokens is None:
+        output_tokens = getattr(usage, "completion_tokens", 0)
+    return input_tokens or 0, output_tokens or 0
+
+
+def llm_call(node, api, **kwargs):
+    """
+    Make an OpenAI call for node through its model fallback chain.
+
+    api is "responses" or "chat". Transient failures are retried on the same
+    model (LLM_CALL_RETRIES) before falling back to the next one, while its
+    breaker stays closed. Each attempt waits for a call_scheduler slot at the
+    run's priority. The chosen model, latency and token usage
+    are recorded on the router and on the current run.
+    """
+    run = current_run()
+    # Untraced runs bypass the LangSmith wrapper entirely
+    client = openai_client if run is None or run.traced else openai_raw_client
+    if api == "responses":
+        create = client.responses.create
+    else:
+        create = client.chat.completions.create
+
+    last_error = None
+    rejected = []  # retry-after of each candidate skipped by an open breaker
+
+    for attempt, model in enumerate(model_router.candidates(node), 1):
+        breaker = circuit_breakers.get(api, model) if BREAKER_ENABLED else None
+        for retry in range(LLM_CALL_RETRIES + 1):
+            if breaker is not None and not breaker.allow():
+                rejected.append(breaker.retry_after())
+                logger.warning(f"[Breaker] ⛔ Skipping {model} for {node}: circuit {breaker.state}")
+                if run:
+                    run.count("breaker.rejected")
+                break
+            if retry and run:
+                run.count("llm.retries")
+
+            scheduler = call_scheduler  # release on the instance we acquired from
+            waited_s = scheduler.acquire(run.priority if run else "interactive")
+            if run and waited_s:
+                run.count("scheduler.queued")
+                run.count("scheduler.wait_ms", round(waited_s * 1000))
+            started = time.perf_counter()
+            error = None
+            try:
+                resp = create(model=model, **kwargs)
+            except Exception as e:
+                error = e
+            finally:
+                scheduler.release()
+            latency_ms = (time.perf_counter() - started) * 1000
+
+            if error is not None:
+                last_error = error
+                transient = breaker_failure(error)
+                if breaker is not None:
+                    breaker.record(failed=transient)
+                logger.warning(
+                    f"[Router] ⚠️ {node} call to {model} failed after {latency_ms:.0f} ms: "
+                    f"{type(error).__name__}: {error}"
+                )
+                if run:
+                    run.record_call(
+                        node=node,
+                        model=model,
+                        latency_ms=round(latency_ms),
+                        ok=False,
+                        attempt=attempt,
+                        retry=retry,
+                    )
+                if not transient or retry == LLM_CALL_RETRIES:
+                    break
+                delay = LLM_RETRY_BACKOFF_S * 2**retry * random.uniform(0.5, 1.0)
+                logger.info(f"[Router] 🔁 Retrying {model} for {node} in {delay:.2f}s")
+                time.sleep(delay)
+                continue
+
+            if breaker is not None:
+                breaker.record(failed=latency_ms > BREAKER_SLOW_MS)
+            model_router.record(model, latency_ms)
+            input_tokens, output_tokens = _usage_tokens(resp)
+            logger.info(f"[Router] 🧭 {node} → {model} ({latency_ms:.0f} ms)")
+            if run:
+                run.record_call(
+                    node=node,
+                    model=model,
+                    latency_ms=round(latency_ms),
+                    ok=True,
+                    attempt=attempt,
+                    retry=retry,
+                    input_tokens=input_tokens,
+                    output_tokens=output_tokens,
+                )
+            return resp
+
+    if last_error is None and rejected:
+        raise CircuitOpenError(node, min(rejected))
+    raise last_error
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Run History
+# ──────────────────────────────────────────────────────────────────────────────
+# Optional per-request history rows in a local SQLite store
+# (AGENT_RUN_HISTORY_DB, off by default); see _history.py.
+import _history  # noqa: E402
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# State Definitions
+# ──────────────────────────────────────────────────────────────────────────────
+logger.info("[State] 📋 Defining pipeline state structure...")
+
+
+class PipelineState(TypedDict):
+    topic: str
+    raw_topics: List[str]
+    selected_topics: List[str]
+    drafts: List[str]
+    finals: List[dict]
+    sources: List[str]
+    posts: List[dict]
+    research_context: List[dict]
+    selected_research: List[dict]
+    speculative: bool
+    draft_search: str
+    shared_context: str
+    validate_sources: bool
+    edit_fast_path: str
+    research_mode: str
+    selection_mode: str
+    locale: str
+    incremental: bool
+    nothing_new: bool
+
+
+logger.info("[State] ✅ PipelineState TypedDict defined successfully")
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Research Cache
+# ──────────────────────────────────────────────────────────────────────────────
+# Titles of the same film or franchise ("Dune", "Dune (Re-release)",
+# "Dune: Part Two") share most of their research. Each researched topic is
+# stored as a hashed character n-gram vector in a float32 matrix kept one row
+# per dimension, so a lookup only reads the rows of the query's non-zero
+# dimensions (a title touches a few dozen of them). At or above AGENT_RESEARCH_CACHE_REUSE the cached
+# research is reused as-is; at or above AGENT_RESEARCH_CACHE_DELTA only a few
+# new topics are researched and merged with the cached ones.
+#
+# Similar titles are not always the same film: "Toy Story" and "Toy Story 4"
+# score above the reuse threshold. A different numeral (digits or roman) is
+# therefore always a miss, and any other word difference (a subtitle) at most
+# a delta. Off unless AGENT_RESEARCH_CACHE=1.
+logger.info("[ResearchCache] 🧠 Setting up semantic research cache...")
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+    logger.warning("[ResearchCache] ⚠️ numpy not installed, research cache disabled")
+
+RESEARCH_CACHE = np is not None and os.getenv("AGENT_RESEARCH_CACHE", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+RESEARCH_CACHE_DIMS = int(os.getenv("AGENT_RESEARCH_CACHE_DIMS", "256"))
+RESEARCH_CACHE_MAX = int(os.getenv("AGENT_RESEARCH_CACHE_MAX", "20000"))
+RESEARCH_CACHE_TTL_S = int(os.getenv("AGENT_RESEARCH_CACHE_TTL_S", str(6 * 3600)))
+RESEARCH_CACHE_REUSE = float(os.getenv("AGENT_RESEARCH_CACHE_REUSE", "0.9"))
+RESEARCH_CACHE_DELTA = float(os.getenv("AGENT_RESEARCH_CACHE_DELTA", "0.5"))
+RESEARCH_DELTA_COUNT = int(os.getenv("AGENT_RESEARCH_DELTA_COUNT", "2"))
+
+# Release qualifiers that do not change which film a title refers to
+_RELEASE_QUALIFIERS_RE = re.compile(
+    r"\b(re-?release|remaster(ed)?|restored|anniversary|edition|director'?s cut|"
+    r"extended|theatrical|imax|3d|4k|\d+ ?mm)\b"
+)
+
+
+def _topic_core(topic):
+    """Lowercased title without bracketed notes, release qualifiers or punctuation"""
+    text = topic.casefold()
+    text = re.sub(r"\([^)]*\)|\[[^\]]*\]", " ", text)
+    text = _RELEASE_QUALIFIERS_RE.sub(" ", text)
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+_ROMAN_NUMERAL_RE = re.compile(r"(?=[ivxlcdm])m*(c[md]|d?c{0,3})(x[cl]|l?x{0,3})(i[xv]|v?i{0,3})")
+_TITLE_STOPWORDS = frozenset({"the", "a", "an", "of", "and"})
+
+
+def _title_markers(topic):
+    """(numerals, other words) of a title's core; "i" counts as a word"""
+    words = set(_topic_core(topic).split()) - _TITLE_STOPWORDS
+    numerals = {
+        word
+        for word in words
+        if word.isdigit() or (word != "i" and _ROMAN_NUMERAL_RE.fullmatch(word))
+    }
+    return numerals, words - numerals
+
+
+@lru_cache(maxsize=4096)
+def topic_vector(topic, dims=RESEARCH_CACHE_DIMS):
+    """L2-normalised hashed vector of a title's character 3-grams and words"""
+    core = _topic_core(topic)
+    padded = f" {core} "
+    features = [padded[i : i + 3] for i in range(len(padded) - 2)] + core.split()
+    vector = np.zeros(dims, dtype=np.float32)
+    for feature in features:
+        vector[zlib.crc32(feature.encode("utf-8")) % dims] += 1.0
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    vector.setflags(write=False)
+    return vector
+
+
+class SemanticResearchCache:
+    def __init__(self, dims=None, max_entries=None, ttl=None):
+        self.dims = dims or RESEARCH_CACHE_DIMS
+        self.max_entries = max_entries or RESEARCH_CACHE_MAX
+        self.ttl = ttl or RESEARCH_CACHE_TTL_S
+        # dims x capacity: one row per dimension, one column per cached topic
+        self._matrix = np.zeros((self.dims, min(1024, self.max_entries)), dtype=np.float32)
+        self._expires = np.zeros(self._matrix.shape[1], dtype=np.float64)
+        self._entries = []
+        self._slots = {}  # normalised topic -> row
+        self._next = 0  # next row to overwrite once full
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _grow(self):
+        size = min(self._matrix.shape[1] * 2, self.max_entries)
+        matrix = np.zeros((self.dims, size), dtype=np.float32)
+        matrix[:, : self._matrix.shape[1]] = self._matrix
+        expires = np.zeros(size, dtype=np.float64)
+        expires[: len(self._expires)] = self._expires
+        self._matrix, self._expires = matrix, expires
+
+    def lookup(self, topic):
+        """Most similar live entry as (entry, similarity), or (None, 0.0)"""
+        vector = topic_vector(topic, self.dims)
+        dims = np.flatnonzero(vector)
+        with self._lock:
+            count = len(self._entries)
+            if not count or not len(dims):
+                return None, 0.0
+            scores = vector[dims] @ self._matrix[dims, :count]
+            scores[self._expires[:count] < time.time()] = -1.0
+            row = int(np.argmax(scores))
+            score = float(scores[row])
+            if score < 0:
+                return None, 0.0
+            return self._entries[row], score
+
+    def store(self, topic, raw_topics, research_context):
+        key = _topic_core(topic)
+        entry = {
+            "topic": topic,
+            "raw_topics": list(raw_topics),
+            "research_context": list(research_context),
+            "researched_at": time.time(),
+        }
+        with self._lock:
+            row = self._slots.get(key)
+            if row is None:
+                if len(self._entries) < self.max_entries:
+                    if len(self._entries) == self._matrix.shape[1]:
+                        self._grow()
+                    row = len(self._entries)
+                    self._entries.append(entry)
+                else:
+                    row = self._next
+                    self._next = (self._next + 1) % self.max_entries
+                    self._slots.pop(_topic_core(self._entries[row]["topic"]), None)
+                    self._entries[row] = entry
+                self._slots[key] = row
+            else:
+                self._entries[row] = entry
+            self._matrix[:, row] = topic_vector(topic, self.dims)
+            self._expires[row] = time.time() + self.ttl
+
+
+research_cache = SemanticResearchCache() if RESEARCH_CACHE else None
+
+
+def research_cache_lookup(topic):
+    """("hit" | "delta" | "miss", cached entry, similarity) for topic"""
+    if research_cache is None:
+        return "miss", None, 0.0
+    entry, score = research_cache.lookup(topic)
+    if entry is None or score < RESEARCH_CACHE_DELTA:
+        return "miss", None, score
+    numerals, words = _title_markers(topic)
+    cached_numerals, cached_words = _title_markers(entry["topic"])
+    if numerals != cached_numerals:
+        # A sequel or another instalment is a different film
+        return "miss", None, score
+    if score >= RESEARCH_CACHE_REUSE and words == cached_words:
+        return "hit", entry, score
+    return "delta", entry, score
+
+
+def research_cache_store(topic, raw_topics, research_context):
+    if research_cache is not None and len(research_context) >= RESEARCH_TOPICS_PER_MOVIE:
+        research_cache.store(topic, raw_topics, research_context)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Research Watermarks
+# ──────────────────────────────────────────────────────────────────────────────
+# Per-topic record of when a movie was last researched and which source URLs
+# it has already produced, in SQLite at AGENT_WATERMARK_DB. Every research
+# path records one (full, sharded, grouped, delta, and cache reuse with the
+# cached research's own time). Incremental research
+# (AGENT_INCREMENTAL_RESEARCH=1 or "incremental" per request) asks only for
+# developments since the watermark, drops seen URLs, and ends the run right
+# after research when nothing new turned up.
+#
+# Local-only and off by default: the store is a file on this host, so it is
+# for local runs and single long-lived hosts. On serverless instances (Vercel)
+# the filesystem is per-instance and wiped on cold starts, and watermarks
+# would silently come and go.
+WATERMARK_DB = os.getenv("AGENT_WATERMARK_DB", "")
+INCREMENTAL_RESEARCH = os.getenv("AGENT_INCREMENTAL_RESEARCH", "0") == "1"
+WATERMARK_MAX_URLS = int(os.getenv("AGENT_WATERMARK_MAX_URLS", "300"))
+WATERMARK_PROMPT_URLS = 20  # most recent seen URLs quoted in the prompt
+
+
+class WatermarkStore:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS watermarks (
+                    topic_key TEXT PRIMARY KEY,
+                    topic TEXT NOT NULL,
+                    researched_at REAL NOT NULL,
+                    seen_urls TEXT NOT NULL
+                )
+                """
+            )
+
+    def get(self, topic):
+        """{"researched_at", "seen_urls"} for topic (URLs oldest first), or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT researched_at, seen_urls FROM watermarks WHERE topic_key = ?",
+                (_research_key(topic),),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"researched_at": row[0], "seen_urls": json.loads(row[1])}
+
+    def record(self, topic, urls, researched_at=None):
+        """Advance topic's watermark (never backwards) and add urls to its seen set"""
+        key = _research_key(topic)
+        researched_at = researched_at or time.time()
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT seen_urls, researched_at FROM watermarks WHERE topic_key = ?", (key,)
+            ).fetchone()
+            seen = json.loads(row[0]) if row else []
+            if row:
+                researched_at = max(researched_at, row[1])
+            known = set(seen)
+            for url in urls:
+                try:
+                    url = normalize_url(url) if url else ""
+                except ValueError:
+                    continue  # not a URL we could ever match again
+                if url and url not in known:
+                    seen.append(url)
+                    known.add(url)
+            self._db.execute(
+                "INSERT OR REPLACE INTO watermarks (topic_key, topic, researched_at, seen_urls) "
+                "VALUES (?, ?, ?, ?)",
+                (key, topic, researched_at, json.dumps(seen[-WATERMARK_MAX_URLS:])),
+            )
+
+
+research_watermarks = None
+if WATERMARK_DB:
+    try:
+        research_watermarks = WatermarkStore(WATERMARK_DB)
+    except sqlite3.Error as e:
+        logger.warning(f"[Watermarks] ⚠️ Watermark store unavailable ({e}), incremental research disabled")
+
+
+def record_watermark(topic, research_context, researched_at=None):
+    if research_watermarks is None:
+        return
+    try:
+        research_watermarks.record(
+            topic, [item.get("url", "") for item in research_context], researched_at
+        )
+    except (sqlite3.Error, ValueError) as e:
+        logger.warning(f"[Watermarks] ⚠️ Could not record watermark for '{topic}': {e}")
+
+
+def _research_since(topic, watermark):
+    """
+    Research only what is new since topic's watermark.
+
+    Returns {"raw_topics", "research_context", "nothing_new"} with seen URLs
+    dropped, or None when the call fails (the caller runs full research).
+    """
+    since = datetime.fromtimestamp(watermark["researched_at"]).strftime("%B %d, %Y")
+    seen = watermark["seen_urls"]
+    prompt = RESEARCH_SINCE_PROMPT.format(
+        topic=topic,
+        count=RESEARCH_TOPICS_PER_MOVIE,
+        since=since,
+        seen="\n".join(f"- {url}" for url in seen[-WATERMARK_PROMPT_URLS:]) or "- (none)",
+    )
+    try:
+        resp = llm_call(
+            "research", "responses", input=prompt, tools=[{"type": "web_search_preview"}]
+        )
+        research_data = json.loads(_extract_json_block(resp.output_text))
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error(f"[Research] 💥 Incremental research failed: {e}")
+        return None
+
+    seen = set(seen)
+    entries = _research_entries(research_data if isinstance(research_data, list) else [])
+    raw_topics, research_context = [], []
+    for raw, item in zip(*entries):
+        try:
+            if item["url"] and normalize_url(item["url"]) in seen:
+                continue
+        except ValueError:
+            pass
+        raw_topics.append(raw)
+        research_context.append(item)
+
+    run = current_run()
+    if run:
+        run.count("research.incremental")
+        run.count("research.watermark_dropped", len(entries[1]) - len(research_context))
+    record_watermark(topic, research_context)
+    if not research_context:
+        logger.info(f"[Research] 💤 Nothing new for '{topic}' since {since}")
+        if run:
+            run.count("research.nothing_new")
+    else:
+        logger.info(f"[Research] 🆕 {len(research_context)} new developments for '{topic}' since {since}")
+    return {
+        "raw_topics": raw_topics,
+        "research_context": research_context,
+        "nothing_new": not research_context,
+    }
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# AGENT NODES
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def _extract_json_block(text, open_char="[", close_char="]"):
+    """Extract JSON from response, handling various formats"""
+    text = text.strip()
+
+    # Method 1: Remove markdown code blocks completely
+    if text.startswith("```"):
+        # Find the actual JSON content between code fences
+        lines = text.split("\n")
+        start_idx = 0
+        end_idx = len(lines)
+
+        # Find start of JSON (skip ```json or just ```
+        for i, line in enumerate(lines):
+            if line.strip().startswith("```"):
+                start_idx = i + 1
+                break
+
+        # Find end of JSON (look for closing ```
+        for i in range(len(lines) - 1, -1, -1):
+            if lines[i].strip() == "```":
+                end_idx = i
+                break
+
+        # Extract JSON content
+        json_lines = lines[start_idx:end_idx]
+        text = "\n".join(json_lines).strip()
+        logger.debug(f"[Research] 🔧 Extracted JSON from markdown: {len(text)} chars")
+
+    # Method 2: Find JSON array/object boundaries
+    first_bracket = text.find(open_char)
+    last_bracket = text.rfind(close_char)
+
+    if first_bracket != -1 and last_bracket != -1 and first_bracket < last_bracket:
+        text = text[first_bracket : last_bracket + 1]
+        logger.debug(f"[Research] 🔧 Extracted JSON block: {len(text)} chars")
+
+    # Method 3: Clean up any remaining artifacts
+    text = re.sub(r"```[a-z]*\n?", "", text)  # Remove any remaining code fences
+    text = re.sub(r"\n```$", "", text)  # Remove trailing code fence
+    text = text.strip()
+
+    return text
+
+
+def _research_entries(research_data):
+    """Convert parsed research JSON entries into (raw_topics, research_context)"""
+    research_context = []
+    raw_topics = []
+
+    for i, entry in enumerate(research_data[:5], 1):
+        if not isinstance(entry, dict):
+            continue
+        title = entry.get("title", f"Untitled {i}")
+        details = entry.get("details", "")
+        source = entry.get("source", "")
+
+        # Clean up the source URL (extract from markdown if needed)
+        url_match = re.search(r"https?://[^\s)]+", source)
+        url = url_match.group(0) if url_match else source
+
+        item = {"title": title, "details": details, "url": url}
+        # Fused selection tags, kept only when well-formed
+        sentiment = str(entry.get("sentiment", "")).strip().lower()
+        engagement = entry.get("engagement")
+        if sentiment in TOPIC_SENTIMENTS:
+            item["sentiment"] = sentiment
+        if isinstance(engagement, (int, float)) and not isinstance(engagement, bool):
+            item["engagement"] = engagement
+        research_context.append(item)
+        raw_topics.append(f"{title} - {details}")
+
+        logger.info(f"[Research]   Parsed Topic {i}: '{title}'")
+        logger.debug(f"[Research]   Details {i}: {details[:100]}...")
+        logger.debug(f"[Research]   URL {i}: {url}")
+
+    return raw_topics, research_context
+
+
+def _research_fallback_entries(raw_text):
+    """Parse a numbered-list research response when JSON parsing fails"""
+    # Split by numbered entries and parse each one
+    entries = re.split(r"\n(?=\d+\.)", raw_text.strip())
+    entries = [
+        entry.strip()
+        for entry in entries
+        if entry.strip() and re.match(r"^\d+\.", entry)
+    ]
+
+    research_context = []
+    raw_topics = []
+
+    for i, entry in enumerate(entries[:5], 1):
+        # Extract title from quotes or first line
+        title_match = re.search(r'"([^"]+)"', entry) or re.search(
+            r"\*\*([^*]+)\*\*", entry
+        )
+        if title_match:
+            title = title_match.group(1).strip()
+        else:
+            # Fallback: use first 50 chars after number
+            first_line = entry.split("\n")[0]
+            title = re.sub(r"^\d+\.\s*", "", first_line)[:50] + "..."
+
+        # Extract URL
+        url_match = re.search(r"https?://[^\s)]+", entry)
+        url = url_match.group(0) if url_match else ""
+
+        # Extract details (everything except title and URL)
+        details = entry
+        if title_match:
+            details = details.replace(title_match.group(0), "")
+        if url_match:
+            details = details.replace(url_match.group(0), "")
+
+        # Clean up details
+        details = re.sub(r"^\d+\.\s*", "", details)  # Remove number
+        details = re.sub(r"\([^)]*\)$", "", details)  # Remove trailing citations
+        details = details.strip(" -.,")
+
+        research_context.append({"title": title, "details": details, "url": url})
+        raw_topics.append(f"{title} - {details}")
+
+        logger.info(f"[Research]   Fallback Topic {i}: '{title}'")
+
+    return raw_topics, research_context
+
+
+def _parse_research_response(raw_text):
+    """Parse a single-movie research response into (raw_topics, research_context)"""
+    cleaned_text = ""
+    try:
+        # Use robust JSON extraction
+        cleaned_text = _extract_json_block(raw_text)
+        logger.debug(
+            f"[Research] 🧹 Cleaned text ({len(cleaned_text)} chars): {cleaned_text[:200]}..."
+        )
+
+        # Parse JSON response
+        research_data = json.loads(cleaned_text)
+        logger.info(f"[Research] ✅ Parsed JSON with {len(research_data)} entries")
+
+        raw_topics, research_context = _research_entries(research_data)
+        logger.info(f"[Research] ✅ Successfully parsed {len(research_context)} topics")
+        return raw_topics, research_context
+
+    except json.JSONDecodeError as json_error:
+        logger.error(f"[Research] 💥 JSON parse error: {json_error}")
+        logger.debug(f"[Research] 💥 Cleaned text was: {cleaned_text[:500]}...")
+
+        # Enhanced fallback parsing for numbered lists
+        logger.warning("[Research] 🔄 Falling back to enhanced text parsing...")
+        return _research_fallback_entries(raw_text)
+
+
+def _research_delta(topic, cached):
+    """
+    Research only what a near-identical cached topic does not cover.
+
+    Keeps the first cached items and adds RESEARCH_DELTA_COUNT new ones;
+    returns None when the delta call fails or comes back short.
+    """
+    count = min(RESEARCH_DELTA_COUNT, RESEARCH_TOPICS_PER_MOVIE)
+    keep = RESEARCH_TOPICS_PER_MOVIE - count
+    known = "\n".join(f"- {item['title']}" for item in cached["research_context"])
+    prompt = RESEARCH_DELTA_PROMPT.format(
+        topic=topic, count=count, known=known, current_year=datetime.now().year
+    )
+    try:
+        resp = llm_call(
+            "research", "responses", input=prompt, tools=[{"type": "web_search_preview"}]
+        )
+        research_data = json.loads(_extract_json_block(resp.output_text))
+        if not isinstance(research_data, list):
+            raise ValueError(f"expected a JSON array, got {type(research_data).__name__}")
+        raw_topics, research_context = _research_entries(research_data[:count])
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error(f"[Research] 💥 Delta research failed: {e}")
+        return None
+
+    if len(research_context) < count:
+        return None
+    raw_topics = cached["raw_topics"][:keep] + raw_topics
+    research_context = cached["research_context"][:keep] + research_context
+    research_cache_store(topic, raw_topics, research_context)
+    record_watermark(topic, research_context)
+    return {"raw_topics": raw_topics, "research_context": research_context}
+
+
+def research_node(state: PipelineState) -> PipelineState:
+    logger.info("[Research] 🔍 === RESEARCH NODE STARTING ===")
+
+    topic = state["topic"]
+    logger.info(f"[Research] 🎯 Topic received: '{topic}' (length: {len(topic)} chars)")
+
+    if not openai_client:
+        logger.error("[Research] ❌ OpenAI client not available - cannot proceed")
+        return {"raw_topics": [], "research_context": []}
+
+    incremental = state.get("incremental", INCREMENTAL_RESEARCH)
+    watermark = research_watermarks.get(topic) if incremental and research_watermarks else None
+    if watermark:
+        result = _research_since(topic, watermark)
+        if result:
+            return result
+        logger.warning("[Research] ⚠️ Incremental research failed, running full research")
+
+    cache_state, cached, similarity = research_cache_lookup(topic)
+    run = current_run()
+    if run:
+        run.count(f"research.cache_{cache_state}")
+    if cache_state == "hit":
+        logger.info(
+            f"[Research] ♻️ Reusing research for '{cached['topic']}' (similarity {similarity:.2f})"
+        )
+        record_watermark(topic, cached["research_context"], cached.get("researched_at"))
+        return {
+            "raw_topics": list(cached["raw_topics"]),
+            "research_context": list(cached["research_context"]),
+        }
+    if cache_state == "delta":
+        logger.info(
+            f"[Research] ♻️ Near match '{cached['topic']}' (similarity {similarity:.2f}), refreshing delta"
+        )
+        result = _research_delta(topic, cached)
+        if result:
+            return result
+        logger.warning("[Research] ⚠️ Delta refresh failed, running full research")
+
+    if (state.get("research_mode") or RESEARCH_MODE) == "sharded":
+        result = research_sharded(topic)
+        if result:
+            research_cache_store(topic, result["raw_topics"], result["research_context"])
+            record_watermark(topic, result["research_context"])
+            return result
+        logger.warning("[Research] ⚠️ Sharded research came back short, running single-call research")
+
+    current_year = datetime.now().year
+    logger.info(f"[Research] 📅 Current year determined: {current_year}")
+
+    prompt = RESEARCH_PROMPT.format(topic=topic, current_year=current_year)
+    if (state.get("selection_mode") or SELECTION_MODE) == "fused":
+        prompt += "\n\n" + RESEARCH_TAGS_INSTRUCTION
+    logger.debug(
+        f"[Research] 📝 Formatted prompt ({len(prompt)} chars): {prompt[:200]}..."
+    )
+
+    try:
+        logger.info("[Research] 📡 Making OpenAI API call with web search...")
+        logger.debug(
+            f"[Research] 🔧 API parameters: models={model_router.candidates('research')}, tools=[web_search_preview]"
+        )
+
+        resp = llm_call(
+            "research", "responses", input=prompt, tools=[{"type": "web_search_preview"}]
+        )
+
+        logger.info("[Research] ✅ OpenAI API call completed successfully")
+        raw_text = resp.output_text
+        logger.info(f"[Research] 📄 Raw response received ({len(raw_text)} chars)")
+        logger.debug(f"[Research] 📄 Response preview: {raw_text[:300]}...")
+
+        raw_topics, research_context = _parse_research_response(raw_text)
+        research_cache_store(topic, raw_topics, research_context)
+        record_watermark(topic, research_context)
+        return {"raw_topics": raw_topics, "research_context": research_context}
+
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error(f"[Research] 💥 Error during research: {e}")
+        logger.error(f"[Research] 💥 Error type: {type(e).__name__}")
+        import traceback
+
+        logger.error(f"[Research] 💥 Full traceback: {traceback.format_exc()}")
+        logger.error("[Research] 🏁 === RESEARCH NODE FAILED ===")
+        return {"raw_topics": [], "research_context": []}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Sharded Research
+# ──────────────────────────────────────────────────────────────────────────────
+# RESEARCH_PROMPT asks one web-search call to cover eight facets and write five
+# long entries, which is one long generation. In sharded mode each facet is its
+# own small query (at most RESEARCH_FACET_ITEMS entries), all sent at once, so
+# research takes as long as the slowest facet. Results are merged round-robin in
+# facet order, skipping repeated URLs and near-identical titles, into the usual
+# five research_context entries.
+#
+# Modes (AGENT_RESEARCH_MODE, or "research_mode" per request):
+#   single   one combined web-search call (default)
+#   sharded  one concurrent web-search call per facet
+RESEARCH_MODES = ("single", "sharded")
+RESEARCH_MODE = os.getenv("AGENT_RESEARCH_MODE", "single")
+if RESEARCH_MODE not in RESEARCH_MODES:
+    logger.warning(f"[Research] ⚠️ Unknown AGENT_RESEARCH_MODE '{RESEARCH_MODE}', using 'single'")
+    RESEARCH_MODE = "single"
+RESEARCH_FACET_ITEMS = 2
+RESEARCH_TITLE_SIMILARITY = float(os.getenv("AGENT_RESEARCH_TITLE_SIMILARITY", "0.8"))
+RESEARCH_FACETS = (
+    "the movie itself (sequels, reboots, anniversaries, re-releases)",
+    "its cast (new projects, casting news, interviews, career updates)",
+    "its director and crew (new projects, retrospectives, behind-the-scenes reveals)",
+    "similar movies in its genre or franchise (box office comparisons, trends)",
+    "its cultural impact and legacy (retrospectives, influence on new films)",
+    "streaming (new platform releases, removals, exclusive content)",
+    "box office, reviews and awards for it or similar films",
+    "remakes, spiritual successors and films it inspired",
+)
+
+
+def _research_facet(topic, facet, current_year):
+    """research_context entries for one facet ([] when the call fails)"""
+    prompt = RESEARCH_FACET_PROMPT.format(
+        topic=topic, facet=facet, count=RESEARCH_FACET_ITEMS, current_year=current_year
+    )
+    try:
+        resp = llm_call(
+            "research", "responses", input=prompt, tools=[{"type": "web_search_preview"}]
+        )
+        research_data = json.loads(_extract_json_block(resp.output_text))
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.warning(f"[Research] ⚠️ Facet '{facet.split(' (')[0]}' failed: {e}")
+        return []
+    if not isinstance(research_data, list):
+        return []
+    return _research_entries(research_data[:RESEARCH_FACET_ITEMS])[1]
+
+
+def merge_research(facet_results, limit=None):
+    """
+    Merge per-facet research_context lists into at most limit entries
+    (RESEARCH_TOPICS_PER_MOVIE by default).
+
+    Takes one entry per facet per round (in facet order) so the result spans
+    facets, skipping entries whose URL was already used or whose title is
+    near-identical to one already taken. Returns (entries, duplicates_dropped).
+    """
+    limit = limit or RESEARCH_TOPICS_PER_MOVIE
+    queues = [list(items) for items in facet_results]
+    merged, urls, titles = [], set(), []
+    dropped = 0
+    while len(merged) < limit and any(queues):
+        for queue in queues:
+            if not queue or len(merged) >= limit:
+                continue
+            item = queue.pop(0)
+            url = normalize_url(item["url"]) if item.get("url") else ""
+            title = item.get("title", "").lower()
+            if (url and url in urls) or any(
+                difflib.SequenceMatcher(None, title, seen).ratio() >= RESEARCH_TITLE_SIMILARITY
+                for seen in titles
+            ):
+                dropped += 1
+                continue
+            if url:
+                urls.add(url)
+            titles.append(title)
+            merged.append(item)
+    return merged, dropped
+
+
+def research_sharded(topic):
+    """
+    Research topic with one concurrent query per facet.
+
+    Returns {"raw_topics", "research_context"}, or None when the merged
+    result has fewer than RESEARCH_TOPICS_PER_MOVIE entries.
+    """
+    current_year = datetime.now().year
+    started = time.perf_counter()
+    with ThreadPoolExecutor(
+        max_workers=len(RESEARCH_FACETS), thread_name_prefix="research-facet"
+    ) as pool:
+        futures = [
+            submit_with_context(pool, _research_facet, topic, facet, current_year)
+            for facet in RESEARCH_FACETS
+        ]
+        facet_results = [future.result() for future in futures]
+
+    research_context, dropped = merge_research(facet_results)
+    found = sum(len(items) for items in facet_results)
+    run = current_run()
+    if run:
+        run.count("research.facet_calls", len(RESEARCH_FACETS))
+        run.count("research.facet_duplicates", dropped)
+    logger.info(
+        f"[Research] 🧩 Sharded research: {found} facet entries, {dropped} duplicates dropped, "
+        f"{len(research_context)} kept ({(time.perf_counter() - started) * 1000:.0f} ms)"
+    )
+    if len(research_context) < RESEARCH_TOPICS_PER_MOVIE:
+        return None
+    raw_topics = [f"{item['title']} - {item['details']}" for item in research_context]
+    return {"raw_topics": raw_topics, "research_context": research_context}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Grouped Research
+# ──────────────────────────────────────────────────────────────────────────────
+# Several movies share one web-search call; the response is split back into
+# per-movie research lists. Movies that come back with fewer than 5 topics are
+# re-queried (as a smaller group first, then one by one).
+RESEARCH_GROUP_SIZE = max(1, int(os.getenv("AGENT_RESEARCH_GROUP_SIZE", "5")))
+RESEARCH_TOPICS_PER_MOVIE = 5
+
+
+def _research_key(topic):
+    return re.sub(r"\s+", " ", topic).strip().casefold()
+
+
+def _research_group(topics):
+    """
+    One grouped research call.
+
+    Returns {topic: (raw_topics, research_context)} for the movies that came
+    back complete; incomplete or missing movies are left out.
+    """
+    current_year = datetime.now().year
+    movies = "\n".join(f"{n}. '{topic}'" for n, topic in enumerate(topics, 1))
+    prompt = RESEARCH_BATCH_PROMPT.format(movies=movies, current_year=current_year)
+
+    logger.info(f"[Research] 📡 Grouped research call for {len(topics)} movies")
+    try:
+        resp = llm_call(
+            "research", "responses", input=prompt, tools=[{"type": "web_search_preview"}]
+        )
+        raw_text = resp.output_text
+        research_data = json.loads(_extract_json_block(raw_text, "{", "}"))
+        if not isinstance(research_data, dict):
+            raise ValueError("expected a JSON object keyed by movie")
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error(f"[Research] 💥 Grouped research failed: {e}")
+        return {}
+
+    by_key = {_research_key(str(key)): value for key, value in research_data.items()}
+    results = {}
+    for topic in topics:
+        entries = by_key.get(_research_key(topic))
+        if not isinstance(entries, list):
+            logger.warning(f"[Research] ⚠️ '{topic}' missing from grouped response")
+            continue
+        raw_topics, research_context = _research_entries(entries)
+        if len(research_context) < RESEARCH_TOPICS_PER_MOVIE:
+            logger.warning(
+                f"[Research] ⚠️ '{topic}' came back with {len(research_context)} topics"
+            )
+            continue
+        research_cache_store(topic, raw_topics, research_context)
+        record_watermark(topic, research_context)
+        results[topic] = (raw_topics, research_context)
+    return results
+
+
+def research_many(topics, group_size=None, concurrency=None):
+    """
+    Research several movies with grouped web-search calls.
+
+    Returns {topic: {"raw_topics", "research_context"}} for every input topic.
+    """
+    group_size = max(1, group_size or RESEARCH_GROUP_SIZE)
+    topics = list(dict.fromkeys(topics))
+    results = {}
+    run = current_run()
+
+    # Cache hits and near matches go through research_node (reuse / delta)
+    uncached = [t for t in topics if research_cache_lookup(t)[0] == "miss"]
+    if group_size == 1 or len(uncached) == 1:
+        groups = []
+    else:
+        groups = [uncached[i : i + group_size] for i in range(0, len(uncached), group_size)]
+
+    with ThreadPoolExecutor(
+        max_workers=concurrency or MAX_CONCURRENCY, thread_name_prefix="research-group"
+    ) as pool:
+        # Pass 1: grouped calls
+        futures = [submit_with_context(pool, _research_group, g) for g in groups]
+        for future in futures:
+            for topic, (raw_topics, research_context) in future.result().items():
+                results[topic] = {
+                    "raw_topics": raw_topics,
+                    "research_context": research_context,
+                }
+
+        # Pass 2: regroup the incomplete movies once (cached ones wait for pass 3)
+        incomplete = [t for t in uncached if t not in results]
+        if groups and len(incomplete) > 1:
+            logger.info(
+                f"[Research] 🔄 Re-querying {len(incomplete)} incomplete movies as a group"
+            )
+            if run:
+                run.count("research.regrouped", len(incomplete))
+            regroups = [
+                incomplete[i : i + group_size]
+                for i in range(0, len(incomplete), group_size)
+            ]
+            futures = [submit_with_context(pool, _research_group, g) for g in regroups]
+            for future in futures:
+                for topic, (raw_topics, research_context) in future.result().items():
+                    results[topic] = {
+                        "raw_topics": raw_topics,
+                        "research_context": research_context,
+                    }
+
+        # Pass 3: whatever is still missing goes through the single-movie path
+        incomplete = [t for t in topics if t not in results]
+        if incomplete and run:
+            run.count("research.single", len(incomplete))
+        futures = {
+            t: submit_with_context(pool, research_node, {"topic": t})
+            for t in incomplete
+        }
+        for topic, future in futures.items():
+            results[topic] = future.result()
+
+    if run:
+        run.count("research.grouped_calls", len(groups))
+        run.count("research.movies", len(topics))
+    logger.info(
+        f"[Research] ✅ Grouped research done: {len(topics)} movies, "
+        f"{len(groups)} grouped calls, {len(incomplete)} single re-queries"
+    )
+    return results
+
+
+# Prefetch: the nightly ingest researches every pending movie up front (while
+# it is still generating summaries), then starts each movie's run at
+# select_topics with the returned state. Results also land in research_cache.
+PREFETCH_CONCURRENCY = int(os.getenv("AGENT_PREFETCH_CONCURRENCY", "4"))
+
+
+def prefetch_research(topics, concurrency=None):
+    """
+    Research pending movies ahead of their pipeline runs.
+
+    Returns {topic: {"raw_topics", "research_context"}} for the movies whose
+    research produced sources; movies that came back empty are left out so the
+    caller runs them from the start.
+    """
+    started = time.perf_counter()
+    results = research_many(topics, concurrency=concurrency or PREFETCH_CONCURRENCY)
+    prefetched = {
+        topic: research
+        for topic, research in results.items()
+        if research.get("research_context")
+    }
+
+    run = current_run()
+    if run:
+        run.count("prefetch.topics", len(results))
+        run.count("prefetch.ready", len(prefetched))
+    logger.info(
+        f"[Prefetch] 🔥 Research ready for {len(prefetched)}/{len(results)} movies "
+        f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+    )
+    return prefetched
+
+
+# How select_topics picks 3 of the researched topics (AGENT_SELECTION_MODE, or
+# "selection_mode" per request):
+#   llm    a second LLM call ranks the topics (default)
+#   fused  the research call tags each topic with sentiment and engagement
+#          (RESEARCH_TAGS_INSTRUCTION) and selection is a local pick; runs
+#          whose research is untagged (cache, prefetch, sharded, incremental)
+#          fall back to the LLM call
+SELECTION_MODES = ("llm", "fused")
+SELECTION_MODE = os.getenv("AGENT_SELECTION_MODE", "llm")
+if SELECTION_MODE not in SELECTION_MODES:
+    logger.warning(f"[TopicSelector] ⚠️ Unknown AGENT_SELECTION_MODE '{SELECTION_MODE}', using 'llm'")
+    SELECTION_MODE = "llm"
+# The "2 positive + 1 controversial" rule from TOPIC_SELECTOR_SYSTEM
+SELECTION_QUOTA = (("positive", 2), ("controversial", 1))
+
+
+def select_tagged(research_context):
+    """
+    Indices of the topics to draft, picked from research tags: the most
+    engaging topics of each sentiment per SELECTION_QUOTA, with any shortfall
+    filled by the most engaging of the rest. Ties keep research order.
+    Returns None when any topic lacks its tags.
+    """
+    if not research_context or any(
+        "sentiment" not in ctx or "engagement" not in ctx for ctx in research_context
+    ):
+        return None
+
+    ranked = sorted(
+        range(len(research_context)), key=lambda i: -research_context[i]["engagement"]
+    )
+    wanted = sum(count for _, count in SELECTION_QUOTA)
+    picked = []
+    for sentiment, count in SELECTION_QUOTA:
+        picked += [i for i in ranked if research_context[i]["sentiment"] == sentiment][:count]
+    picked += [i for i in ranked if i not in picked][: wanted - len(picked)]
+    return picked[:wanted]
+
+
+def _selection(research_context, selected_indices):
+    """select_topics result fields for the chosen research_context indices"""
+    selected_research = [research_context[i] for i in selected_indices[:3]]
+    selected_topics = [ctx["title"] + " - " + ctx["details"] for ctx in selected_research]
+
+    logger.info(
+        f"[TopicSelector] ✅ Selected {len(selected_research)} topics with full context"
+    )
+    for i, ctx in enumerate(selected_research, 1):
+        logger.info(f"[TopicSelector]   Selected {i}: '{ctx['title']}'")
+        logger.debug(f"[TopicSelector]     Details {i}: {ctx['details'][:80]}...")
+        logger.debug(f"[TopicSelector]     URL {i}: {ctx['url']}")
+
+    return {
+        "selected_topics": selected_topics,
+        "selected_research": selected_research,
+    }
+
+
+def select_topics_node(state: PipelineState) -> PipelineState:
+    logger.info("[TopicSelector] 🎯 === TOPIC SELECTOR NODE STARTING ===")
+
+    research_context = state.get("research_context", [])
+    raws = state.get("raw_topics", [])
+
+    logger.info(
+        f"[TopicSelector] 📥 Received {len(research_context)} research context items"
+    )
+    logger.info(f"[TopicSelector] 📥 Received {len(raws)} raw topics (fallback)")
 
     # Primary check: research_context must be available
     if not research_context:
@@ -494,30 +2464,50 @@ def select_topics_node(state: PipelineState) -> PipelineState:
         )
         return {"selected_topics": [], "selected_research": []}
 
+    if (state.get("selection_mode") or SELECTION_MODE) == "fused":
+        selected_indices = select_tagged(research_context)
+        run = current_run()
+        if selected_indices is not None:
+            if run:
+                run.count("select_topics.fused")
+            logger.info("[TopicSelector] ⚡ Selected locally from research tags")
+            logger.info("[TopicSelector] 🏁 === TOPIC SELECTOR NODE COMPLETED ===")
+            return _selection(research_context, selected_indices)
+        logger.info("[TopicSelector] 🔄 Research is untagged, selecting with the LLM")
+        if run:
+            run.count("select_topics.fused_fallback")
+
     if not openai_client:
         logger.error("[TopicSelector] ❌ OpenAI client not available")
         logger.error("[TopicSelector] 🏁 === TOPIC SELECTOR NODE FAILED ===")
         return {"selected_topics": [], "selected_research": []}
 
-    # Build selection prompt using research_context (richer data)
-    prompt = "Analyze these movie news topics and select the 3 most engaging ones:\n\n"
+    # Speculative mode: start drafting every candidate while selection runs
+    speculative = state.get("speculative", SPECULATIVE_DRAFTS)
+    speculation = (
+        SpeculativeDrafts(state.get("topic", ""), research_context, state.get("draft_search"))
+        if speculative
+        else None
+    )
 
-    for i, ctx in enumerate(research_context, 1):
-        title = ctx["title"]
-        details = (
-            ctx["details"][:120] + "..."
-            if len(ctx["details"]) > 120
-            else ctx["details"]
+    collected = False
+    try:
+        # Build selection prompt using research_context (richer data)
+        topics = "".join(
+            TOPIC_SELECTOR_ITEM.format(
+                number=i,
+                title=ctx["title"],
+                details=apply_token_budget("select_topics", ctx["details"], f"details {i}"),
+            )
+            for i, ctx in enumerate(research_context, 1)
         )
-        prompt += f"{i}. {title}\n   Details: {details}\n\n"
-
-    prompt += "Select exactly 3 topics (2 positive + 1 controversial) that will generate the most clicks and engagement."
+        prompt = TOPIC_SELECTOR_PROMPT.format(topics=topics)
 
-    try:
         logger.debug("[TopicSelector] 📡 Making API call for topic selection...")
 
-        resp = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
+        resp = llm_call(
+            "select_topics",
+            "chat",
             messages=[
                 {"role": "system", "content": TOPIC_SELECTOR_SYSTEM},
                 {"role": "user", "content": prompt},
@@ -544,33 +2534,441 @@ def select_topics_node(state: PipelineState) -> PipelineState:
         if len(selected_indices) < 3:
             selected_indices = [0, 1, 2][: len(research_context)]
             logger.warning("[TopicSelector] ⚠️ Using fallback selection: first 3 topics")
+            if len(research_context) >= 3:
+                note_fallback("select_topics")
 
         # Extract selected research context and build topics
-        selected_research = [research_context[i] for i in selected_indices[:3]]
-        selected_topics = [
-            ctx["title"] + " - " + ctx["details"] for ctx in selected_research
-        ]
-
-        logger.info(
-            f"[TopicSelector] ✅ Selected {len(selected_research)} topics with full context"
-        )
-        for i, ctx in enumerate(selected_research, 1):
-            logger.info(f"[TopicSelector]   Selected {i}: '{ctx['title']}'")
-            logger.debug(f"[TopicSelector]     Details {i}: {ctx['details'][:80]}...")
-            logger.debug(f"[TopicSelector]     URL {i}: {ctx['url']}")
+        result = _selection(research_context, selected_indices)
+        if speculation:
+            drafts, sources = speculation.collect(selected_indices[:3])
+            collected = True
+            result.update(drafts=drafts, sources=sources)
 
         logger.info("[TopicSelector] 🏁 === TOPIC SELECTOR NODE COMPLETED ===")
 
-        return {
-            "selected_topics": selected_topics,
-            "selected_research": selected_research,
-        }
+        return result
 
+    except CircuitOpenError:
+        raise
     except Exception as e:
         logger.error(f"[TopicSelector] 💥 Error selecting topics: {e}")
         logger.error(f"[TopicSelector] 💥 Error type: {type(e).__name__}")
         logger.error("[TopicSelector] 🏁 === TOPIC SELECTOR NODE FAILED ===")
         return {"selected_topics": [], "selected_research": []}
+    finally:
+        # Also on CircuitOpenError, which propagates to the caller
+        if speculation and not collected:
+            speculation.abandon()
+
+
+# Where drafts get context beyond the research step (AGENT_DRAFT_SEARCH, or
+# "draft_search" on the request):
+#   none         write from the run's research_context only (default)
+#   shared       plus one shared web search per run, reused by every draft
+#   per_article  a web search inside every draft call (slowest)
+DRAFT_SEARCH_MODES = ("none", "shared", "per_article")
+DRAFT_SEARCH = os.getenv("AGENT_DRAFT_SEARCH", "none")
+if DRAFT_SEARCH not in DRAFT_SEARCH_MODES:
+    logger.warning(f"[Draft] ⚠️ Unknown AGENT_DRAFT_SEARCH '{DRAFT_SEARCH}', using 'none'")
+    DRAFT_SEARCH = "none"
+
+
+def shared_draft_search(original_topic, selected_research):
+    """One web search for complementary context shared by all drafts of a run"""
+    stories = "\n".join(
+        f"{i}. {ctx.get('title', '')} ({ctx.get('url', '')})"
+        for i, ctx in enumerate(selected_research, 1)
+    )
+    prompt = SHARED_SEARCH_PROMPT.format(original_topic=original_topic, stories=stories)
+
+    try:
+        logger.info(f"[Draft] 🔎 Shared web search for {len(selected_research)} stories...")
+        resp = llm_call(
+            "draft_search", "responses", input=prompt, tools=[{"type": "web_search_preview"}]
+        )
+        notes = resp.output_text.strip()
+        logger.info(f"[Draft] ✅ Shared search notes received ({len(notes)} chars)")
+        return notes
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error(f"[Draft] 💥 Shared web search failed: {e}")
+        return ""
+
+
+def _draft_background(research_item, research_context, shared_context=""):
+    """Related research (and shared search notes) for a grounded draft prompt"""
+    lines = [
+        f"- {ctx.get('title', '')}: {ctx.get('details', '')} ({ctx.get('url', '')})"
+        for ctx in research_context
+        if ctx is not research_item and ctx.get("title") != research_item.get("title")
+    ]
+    if shared_context:
+        lines.append(DRAFT_SHARED_NOTES.format(notes=shared_context))
+    background = "\n".join(lines) or "None"
+    return apply_token_budget("draft_background", background, "background")
+
+
+def _draft_request(original_topic, research_context, search_mode=None, background=""):
+    """Build the draft call for one research item; returns (request, research_url, avoid_domain)"""
+    search_mode = search_mode or DRAFT_SEARCH
+    research_title = research_context.get("title", "No title available")
+    research_details = research_context.get("details", "No details available")
+    research_url = research_context.get("url", "")
+
+    # Extract domain from research URL to avoid duplicates
+    avoid_domain = ""
+    if research_url:
+        parsed_url = urllib.parse.urlparse(research_url)
+        avoid_domain = parsed_url.netloc
+        logger.debug(f"[Draft] 🚫 Will avoid domain: {avoid_domain}")
+
+    logger.debug("[Draft] 📋 Research context for draft:")
+    logger.debug(f"[Draft]   Title: {research_title}")
+    logger.debug(f"[Draft]   Details: {research_details[:100]}...")
+    logger.debug(f"[Draft]   URL: {research_url}")
+
+    if search_mode != "per_article":
+        grounded_prompt = DRAFT_PROMPT_GROUNDED.format(
+            original_topic=original_topic,
+            research_title=research_title,
+            research_details=research_details,
+            research_url=research_url,
+            background=background or "None",
+        )
+        return {"input": grounded_prompt}, research_url, avoid_domain
+
+    # Create enhanced prompt with structured JSON output request
+    detailed_prompt = DRAFT_PROMPT.format(
+        original_topic=original_topic,
+        research_title=research_title,
+        research_details=research_details,
+        research_url=research_url,
+        avoid_domain=avoid_domain,
+    )
+
+    request = {"input": detailed_prompt, "tools": [{"type": "web_search_preview"}]}
+    return request, research_url, avoid_domain
+
+
+def _parse_draft_response(i, response_text, research_url, avoid_domain, resp=None):
+    """Parse a draft model response into (draft, sources), falling back to raw text"""
+    try:
+        # Parse the structured JSON response
+        def extract_json_from_draft_response(text):
+            """Extract JSON from draft response, handling various formats"""
+            text = text.strip()
+
+            # Remove markdown code blocks if present
+            if text.startswith("```"):
+                lines = text.split("\n")
+                start_idx = 0
+                end_idx = len(lines)
+
+                # Find start of JSON (skip ```json or just ```)
+                for i, line in enumerate(lines):
+                    if line.strip().startswith("```"):
+                        start_idx = i + 1
+                        break
+
+                # Find end of JSON (look for closing ```)
+                for i in range(len(lines) - 1, -1, -1):
+                    if lines[i].strip() == "```":
+                        end_idx = i
+                        break
+
+                # Extract JSON content
+                json_lines = lines[start_idx:end_idx]
+                text = "\n".join(json_lines).strip()
+                logger.debug(
+                    f"[Draft] 🔧 Extracted JSON from markdown: {len(text)} chars"
+                )
+
+            # Find JSON object boundaries
+            first_brace = text.find("{")
+            last_brace = text.rfind("}")
+
+            if (
+                first_brace != -1
+                and last_brace != -1
+                and first_brace < last_brace
+            ):
+                text = text[first_brace : last_brace + 1]
+                logger.debug(
+                    f"[Draft] 🔧 Extracted JSON object: {len(text)} chars"
+                )
+
+            return text
+
+        # Extract and parse JSON
+        cleaned_response = extract_json_from_draft_response(response_text)
+        logger.debug(
+            f"[Draft] 🧹 Cleaned JSON response ({len(cleaned_response)} chars)"
+        )
+
+        draft_data = json.loads(cleaned_response)
+
+        # Validate required fields
+        if "draft" in draft_data and "sources" in draft_data:
+            draft_content = draft_data["draft"].strip()
+            draft_sources = draft_data.get("sources", [])
+
+            # Ensure sources is a list
+            if isinstance(draft_sources, str):
+                draft_sources = [draft_sources]
+            elif not isinstance(draft_sources, list):
+                draft_sources = []
+
+            # Add research URL if not already included
+            if research_url and research_url not in draft_sources:
+                draft_sources.insert(0, research_url)
+
+            # Add any additional sources from API response annotations
+            api_urls = []
+            try:
+                for item in getattr(resp, "output_items", []):
+                    if item.get("type") == "message":
+                        for ann in item.get("annotations", []):
+                            if ann.get("type") == "url_citation":
+                                url = ann.get("url", "")
+                                if url and url not in draft_sources:
+                                    # Check if this URL is from a different domain
+                                    try:
+                                        parsed_new_url = urllib.parse.urlparse(
+                                            url
+                                        )
+                                        new_domain = parsed_new_url.netloc
+
+                                        if new_domain != avoid_domain:
+                                            api_urls.append(url)
+                                            logger.debug(
+                                                f"[Draft]   Additional API source: {url}"
+                                            )
+                                        else:
+                                            logger.debug(
+                                                f"[Draft]   Skipped duplicate domain: {url}"
+                                            )
+                                    except Exception:
+                                        api_urls.append(url)
+            except Exception as e:
+                logger.debug(f"[Draft] ⚠️ Error extracting API URLs: {e}")
+
+            # Combine all sources and remove duplicates
+            all_sources = draft_sources + api_urls
+            unique_sources = list(dict.fromkeys(all_sources))  # Preserves order
+
+            logger.info(f"[Draft] ✅ Draft {i} parsed successfully")
+            logger.debug(
+                f"[Draft] 📄 Draft {i} content: {len(draft_content)} chars"
+            )
+            logger.info(
+                f"[Draft] 🔗 Draft {i} sources: {len(unique_sources)} URLs"
+            )
+
+            # Log sources with their types
+            for j, url in enumerate(unique_sources, 1):
+                if url == research_url:
+                    source_type = "Primary Research"
+                elif url in draft_data.get("sources", []):
+                    source_type = "Draft Referenced"
+                else:
+                    source_type = "API Additional"
+                logger.debug(f"[Draft]   Source {j} ({source_type}): {url}")
+
+            return draft_content, unique_sources
+
+        else:
+            logger.warning(
+                f"[Draft] ⚠️ Invalid JSON structure for draft {i}, missing 'draft' or 'sources'"
+            )
+            # Fallback: treat entire response as draft
+            return response_text, [research_url] if research_url else []
+
+    except json.JSONDecodeError as json_error:
+        logger.error(f"[Draft] 💥 JSON parse error for draft {i}: {json_error}")
+        logger.debug(
+            f"[Draft] 💥 Unparseable response: {cleaned_response[:300]}..."
+        )
+
+        # Fallback: treat entire response as draft and use research URL
+        logger.warning(f"[Draft] 🔄 Using fallback parsing for draft {i}")
+        note_fallback("draft")
+        return response_text, [research_url] if research_url else []
+
+
+def _draft_one(i, topic, research_context, original_topic, search_mode=None, background=""):
+    """Draft one article from its research context; returns (draft, sources)"""
+    try:
+        request, research_url, avoid_domain = _draft_request(
+            original_topic, research_context, search_mode, background
+        )
+
+        logger.debug(
+            f"[Draft] 📝 Using enhanced JSON prompt ({len(request['input'])} chars)"
+        )
+        with_search = "with web search" if "tools" in request else "grounded in research"
+        logger.debug(f"[Draft] 📡 Making API call ({with_search}) for topic {i}...")
+
+        resp = llm_call("draft", "responses", **request)
+
+        response_text = resp.output_text.strip()
+        logger.info(
+            f"[Draft] ✅ Draft response {i} received ({len(response_text)} chars)"
+        )
+        logger.debug(
+            f"[Draft] 📄 Raw response {i} preview: {response_text[:200]}..."
+        )
+
+        return _parse_draft_response(i, response_text, research_url, avoid_domain, resp)
+
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error(f"[Draft] 💥 Error drafting topic {i}: {e}")
+        logger.error(f"[Draft] 💥 Error type: {type(e).__name__}")
+        import traceback
+
+        logger.debug(f"[Draft] 💥 Traceback: {traceback.format_exc()}")
+
+        # Ultimate fallback: add empty draft and research URL
+        note_fallback("draft")
+        research_url = research_context.get("url", "")
+        return (
+            f"Error generating draft for topic: {topic}",
+            [research_url] if research_url else [],
+        )
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Speculative Drafting
+# ──────────────────────────────────────────────────────────────────────────────
+# With AGENT_SPECULATIVE_DRAFTS=1 (or "speculative": true on the request),
+# research candidates are drafted while the selection call runs, at most
+# AGENT_SPECULATIVE_WORKERS at a time and always fewer than the candidates, so
+# some are still queued when selection lands. Drafts of the selected topics are
+# handed to draft_node; queued unselected ones are cancelled, started ones
+# discarded or (AGENT_SPECULATIVE_KEEP_BACKUPS=1) kept as backups that a later
+# run selecting the same topic with the same draft search mode can reuse within
+# AGENT_SPECULATIVE_BACKUP_TTL_S.
+
+SPECULATIVE_DRAFTS = os.getenv("AGENT_SPECULATIVE_DRAFTS", "").lower() in ("1", "true", "yes")
+SPECULATIVE_KEEP_BACKUPS = os.getenv("AGENT_SPECULATIVE_KEEP_BACKUPS", "").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+SPECULATIVE_BACKUP_MAX = int(os.getenv("AGENT_SPECULATIVE_BACKUP_MAX", "200"))
+SPECULATIVE_BACKUP_TTL_S = int(os.getenv("AGENT_SPECULATIVE_BACKUP_TTL_S", str(3600)))
+SPECULATIVE_WORKERS = int(os.getenv("AGENT_SPECULATIVE_WORKERS", "3"))
+
+_speculative_backups = OrderedDict()
+_speculative_backups_lock = threading.Lock()
+
+
+def _backup_key(original_topic, research_item, search_mode):
+    return (original_topic.strip().lower(), research_item.get("title", ""), search_mode)
+
+
+def _store_speculative_backup(key, result):
+    with _speculative_backups_lock:
+        _speculative_backups[key] = (time.time() + SPECULATIVE_BACKUP_TTL_S, result)
+        _speculative_backups.move_to_end(key)
+        while len(_speculative_backups) > SPECULATIVE_BACKUP_MAX:
+            _speculative_backups.popitem(last=False)
+
+
+def pop_speculative_backup(original_topic, research_item, search_mode):
+    """Take a kept, unexpired speculative draft for this research item, if any"""
+    now = time.time()
+    with _speculative_backups_lock:
+        for key in [k for k, (expires, _) in _speculative_backups.items() if expires < now]:
+            del _speculative_backups[key]
+        entry = _speculative_backups.pop(_backup_key(original_topic, research_item, search_mode), None)
+    return entry[1] if entry else None
+
+
+class SpeculativeDrafts:
+    def __init__(self, original_topic, research_context, search_mode=None, keep_backups=None):
+        search_mode = search_mode or DRAFT_SEARCH
+        if search_mode == "shared":
+            # The shared search would sit in front of every draft; skip it here
+            logger.info("[Speculative] ℹ️ Shared draft search skipped in speculative mode")
+            search_mode = "none"
+        self.original_topic = original_topic
+        self.research_context = research_context
+        self.search_mode = search_mode
+        self.keep_backups = (
+            SPECULATIVE_KEEP_BACKUPS if keep_backups is None else keep_backups
+        )
+        self.run = current_run()
+        self.workers = max(
+            1, min(len(research_context) - 1, SPECULATIVE_WORKERS, MAX_CONCURRENCY)
+        )
+        self.pool = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="speculative-draft"
+        )
+        self.futures = [
+            submit_with_context(
+                self.pool,
+                _draft_one,
+                i,
+                f"{ctx['title']} - {ctx['details']}",
+                ctx,
+                original_topic,
+                search_mode,
+                _draft_background(ctx, research_context),
+            )
+            for i, ctx in enumerate(research_context, 1)
+        ]
+        self._count("speculative.drafts_submitted", len(self.futures))
+        logger.info(
+            f"[Speculative] 🚀 Drafting {len(self.futures)} candidates "
+            f"({self.workers} at a time) while selection runs"
+        )
+
+    def _count(self, name, amount=1):
+        if self.run:
+            self.run.count(name, amount)
+
+    def collect(self, indices):
+        """Release the unselected drafts, then wait for the selected ones"""
+        # Cancel queued losers first so they don't take a worker from a winner
+        self._release(keep=set(indices))
+        started = time.perf_counter()
+        results = [self.futures[i].result() for i in indices]
+        waited_ms = (time.perf_counter() - started) * 1000
+
+        self._count("speculative.drafts_used", len(results))
+        self._count("speculative.wait_after_selection_ms", round(waited_ms))
+        logger.info(
+            f"[Speculative] ✅ {len(results)} selected drafts ready "
+            f"({waited_ms:.0f} ms wait after selection)"
+        )
+        return [draft for draft, _ in results], [sources for _, sources in results]
+
+    def abandon(self):
+        self._release(keep=set())
+
+    def _release(self, keep):
+        for i, future in enumerate(self.futures):
+            if i in keep:
+                continue
+            if future.cancel():
+                self._count("speculative.drafts_cancelled")
+            elif self.keep_backups:
+                key = _backup_key(
+                    self.original_topic, self.research_context[i], self.search_mode
+                )
+                future.add_done_callback(
+                    lambda f, key=key: None
+                    if f.exception()
+                    else _store_speculative_backup(key, f.result())
+                )
+                self._count("speculative.drafts_backed_up")
+            else:
+                self._count("speculative.drafts_discarded")
+        # Don't wait for unselected drafts still in flight
+        self.pool.shutdown(wait=False)
 
 
 # Update the draft_node function
@@ -592,11 +2990,24 @@ def draft_node(state: PipelineState) -> PipelineState:
         logger.warning("[Draft] 🏁 === DRAFT NODE COMPLETED (EMPTY) ===")
         return {"drafts": [], "sources": []}
 
+    prepared = state.get("drafts") or []
+    if len(prepared) == len(selected_topics):
+        logger.info(f"[Draft] ⚡ {len(prepared)} drafts already prepared (speculative)")
+        logger.info("[Draft] 🏁 === DRAFT NODE COMPLETED ===")
+        return {"drafts": prepared, "sources": state.get("sources", [])}
+
     if not openai_client:
         logger.error("[Draft] ❌ OpenAI client not available")
         logger.error("[Draft] 🏁 === DRAFT NODE FAILED ===")
         return {"drafts": [], "sources": []}
 
+    search_mode = state.get("draft_search") or DRAFT_SEARCH
+    research_pool = state.get("research_context") or selected_research
+    shared_context = state.get("shared_context", "")
+    if search_mode == "shared" and not shared_context:
+        shared_context = shared_draft_search(original_topic, selected_research)
+    logger.info(f"[Draft] 🔧 Draft search mode: {search_mode}")
+
     drafts, sources = [], []
 
     for i, topic in enumerate(selected_topics, 1):
@@ -604,216 +3015,24 @@ def draft_node(state: PipelineState) -> PipelineState:
             f"[Draft] ✍️ {i}/{len(selected_topics)} Drafting content for: '{topic[:60]}...'"
         )
 
-        try:
-            # Get corresponding research context from selected_research
-            research_context = (
-                selected_research[i - 1] if i <= len(selected_research) else {}
-            )
-            research_title = research_context.get("title", "No title available")
-            research_details = research_context.get("details", "No details available")
-            research_url = research_context.get("url", "")
-
-            # Extract domain from research URL to avoid duplicates
-            avoid_domain = ""
-            if research_url:
-                import urllib.parse
-
-                parsed_url = urllib.parse.urlparse(research_url)
-                avoid_domain = parsed_url.netloc
-                logger.debug(f"[Draft] 🚫 Will avoid domain: {avoid_domain}")
-
-            logger.debug(f"[Draft] 📋 Research context for draft {i}:")
-            logger.debug(f"[Draft]   Title: {research_title}")
-            logger.debug(f"[Draft]   Details: {research_details[:100]}...")
-            logger.debug(f"[Draft]   URL: {research_url}")
-
-            # Create enhanced prompt with structured JSON output request
-            detailed_prompt = DRAFT_PROMPT.format(
-                original_topic=original_topic,
-                research_title=research_title,
-                research_details=research_details,
-                research_url=research_url,
-                avoid_domain=avoid_domain,
-            )
-
-            logger.debug(
-                f"[Draft] 📝 Using enhanced JSON prompt ({len(detailed_prompt)} chars)"
-            )
-            logger.debug(f"[Draft] 📡 Making API call with web search for topic {i}...")
-
-            # Make API call with web search enabled for additional context
-            resp = openai_client.responses.create(
-                model="gpt-4o-mini",
-                input=detailed_prompt,
-                tools=[{"type": "web_search_preview"}],
-            )
-
-            response_text = resp.output_text.strip()
-            logger.info(
-                f"[Draft] ✅ Draft response {i} received ({len(response_text)} chars)"
+        research_context = (
+            selected_research[i - 1] if i <= len(selected_research) else {}
+        )
+        backup = pop_speculative_backup(original_topic, research_context, search_mode)
+        if backup:
+            logger.info(f"[Draft] ♻️ Reusing speculative backup draft for topic {i}")
+            draft, draft_sources = backup
+        else:
+            background = (
+                _draft_background(research_context, research_pool, shared_context)
+                if search_mode != "per_article"
+                else ""
             )
-            logger.debug(
-                f"[Draft] 📄 Raw response {i} preview: {response_text[:200]}..."
+            draft, draft_sources = _draft_one(
+                i, topic, research_context, original_topic, search_mode, background
             )
-
-            try:
-                # Parse the structured JSON response
-                def extract_json_from_draft_response(text):
-                    """Extract JSON from draft response, handling various formats"""
-                    text = text.strip()
-
-                    # Remove markdown code blocks if present
-                    if text.startswith("```"):
-                        lines = text.split("\n")
-                        start_idx = 0
-                        end_idx = len(lines)
-
-                        # Find start of JSON (skip ```json or just ```)
-                        for i, line in enumerate(lines):
-                            if line.strip().startswith("```"):
-                                start_idx = i + 1
-                                break
-
-                        # Find end of JSON (look for closing ```)
-                        for i in range(len(lines) - 1, -1, -1):
-                            if lines[i].strip() == "```":
-                                end_idx = i
-                                break
-
-                        # Extract JSON content
-                        json_lines = lines[start_idx:end_idx]
-                        text = "\n".join(json_lines).strip()
-                        logger.debug(
-                            f"[Draft] 🔧 Extracted JSON from markdown: {len(text)} chars"
-                        )
-
-                    # Find JSON object boundaries
-                    first_brace = text.find("{")
-                    last_brace = text.rfind("}")
-
-                    if (
-                        first_brace != -1
-                        and last_brace != -1
-                        and first_brace < last_brace
-                    ):
-                        text = text[first_brace : last_brace + 1]
-                        logger.debug(
-                            f"[Draft] 🔧 Extracted JSON object: {len(text)} chars"
-                        )
-
-                    return text
-
-                # Extract and parse JSON
-                cleaned_response = extract_json_from_draft_response(response_text)
-                logger.debug(
-                    f"[Draft] 🧹 Cleaned JSON response ({len(cleaned_response)} chars)"
-                )
-
-                draft_data = json.loads(cleaned_response)
-
-                # Validate required fields
-                if "draft" in draft_data and "sources" in draft_data:
-                    draft_content = draft_data["draft"].strip()
-                    draft_sources = draft_data.get("sources", [])
-
-                    # Ensure sources is a list
-                    if isinstance(draft_sources, str):
-                        draft_sources = [draft_sources]
-                    elif not isinstance(draft_sources, list):
-                        draft_sources = []
-
-                    # Add research URL if not already included
-                    if research_url and research_url not in draft_sources:
-                        draft_sources.insert(0, research_url)
-
-                    # Add any additional sources from API response annotations
-                    api_urls = []
-                    try:
-                        for item in getattr(resp, "output_items", []):
-                            if item.get("type") == "message":
-                                for ann in item.get("annotations", []):
-                                    if ann.get("type") == "url_citation":
-                                        url = ann.get("url", "")
-                                        if url and url not in draft_sources:
-                                            # Check if this URL is from a different domain
-                                            try:
-                                                parsed_new_url = urllib.parse.urlparse(
-                                                    url
-                                                )
-                                                new_domain = parsed_new_url.netloc
-
-                                                if new_domain != avoid_domain:
-                                                    api_urls.append(url)
-                                                    logger.debug(
-                                                        f"[Draft]   Additional API source: {url}"
-                                                    )
-                                                else:
-                                                    logger.debug(
-                                                        f"[Draft]   Skipped duplicate domain: {url}"
-                                                    )
-                                            except Exception:
-                                                api_urls.append(url)
-                    except Exception as e:
-                        logger.debug(f"[Draft] ⚠️ Error extracting API URLs: {e}")
-
-                    # Combine all sources and remove duplicates
-                    all_sources = draft_sources + api_urls
-                    unique_sources = list(dict.fromkeys(all_sources))  # Preserves order
-
-                    drafts.append(draft_content)
-                    sources.append(unique_sources)
-
-                    logger.info(f"[Draft] ✅ Draft {i} parsed successfully")
-                    logger.debug(
-                        f"[Draft] 📄 Draft {i} content: {len(draft_content)} chars"
-                    )
-                    logger.info(
-                        f"[Draft] 🔗 Draft {i} sources: {len(unique_sources)} URLs"
-                    )
-
-                    # Log sources with their types
-                    for j, url in enumerate(unique_sources, 1):
-                        if url == research_url:
-                            source_type = "Primary Research"
-                        elif url in draft_data.get("sources", []):
-                            source_type = "Draft Referenced"
-                        else:
-                            source_type = "API Additional"
-                        logger.debug(f"[Draft]   Source {j} ({source_type}): {url}")
-
-                else:
-                    logger.warning(
-                        f"[Draft] ⚠️ Invalid JSON structure for draft {i}, missing 'draft' or 'sources'"
-                    )
-                    # Fallback: treat entire response as draft
-                    drafts.append(response_text)
-                    sources.append([research_url] if research_url else [])
-
-            except json.JSONDecodeError as json_error:
-                logger.error(f"[Draft] 💥 JSON parse error for draft {i}: {json_error}")
-                logger.debug(
-                    f"[Draft] 💥 Unparseable response: {cleaned_response[:300]}..."
-                )
-
-                # Fallback: treat entire response as draft and use research URL
-                drafts.append(response_text)
-                sources.append([research_url] if research_url else [])
-                logger.warning(f"[Draft] 🔄 Using fallback parsing for draft {i}")
-
-        except Exception as e:
-            logger.error(f"[Draft] 💥 Error drafting topic {i}: {e}")
-            logger.error(f"[Draft] 💥 Error type: {type(e).__name__}")
-            import traceback
-
-            logger.debug(f"[Draft] 💥 Traceback: {traceback.format_exc()}")
-
-            # Ultimate fallback: add empty draft and research URL
-            drafts.append(f"Error generating draft for topic: {topic}")
-            if i <= len(selected_research):
-                research_url = selected_research[i - 1].get("url", "")
-                sources.append([research_url] if research_url else [])
-            else:
-                sources.append([])
+        drafts.append(draft)
+        sources.append(draft_sources)
 
     logger.info(
         f"[Draft] ✅ Draft creation completed: {len(drafts)} drafts, {len(sources)} source lists"
@@ -847,7 +3066,213 @@ def draft_node(state: PipelineState) -> PipelineState:
     )
     logger.info("[Draft] 🏁 === DRAFT NODE COMPLETED ===")
 
-    return {"drafts": drafts, "sources": sources}
+    return {"drafts": drafts, "sources": sources, "shared_context": shared_context}
+
+
+def _editor_request(i, draft, locale=None):
+    """Build the editor chat call for draft number i"""
+    draft_input = apply_token_budget("edit", draft, f"draft {i}")
+    return {
+        "messages": [
+            {
+                "role": "system",
+                "content": EDITOR_PROMPT + locale_instruction(LOCALE_EDITOR_INSTRUCTION, locale),
+            },
+            {
+                "role": "user",
+                "content": EDITOR_USER_PROMPT.format(draft=draft_input),
+            },
+        ],
+        "temperature": 0.3,
+    }
+
+
+def _parse_editor_response(i, response_content):
+    """Parse an editor response into {"title", "content"}, falling back to raw text"""
+    try:
+        # Parse JSON response
+        parsed_result = json.loads(response_content)
+
+        # Validate required fields
+        if "title" in parsed_result and "content" in parsed_result:
+            final_article = {
+                "title": parsed_result["title"].strip(),
+                "content": parsed_result["content"].strip(),
+            }
+
+            logger.info(f"[Editor] 📰 Title {i}: '{final_article['title']}'")
+            logger.debug(
+                f"[Editor] 📄 Content {i} preview: {final_article['content'][:150]}..."
+            )
+
+            return final_article
+
+        else:
+            logger.warning(
+                f"[Editor] ⚠️ Invalid JSON structure for draft {i}, missing title or content"
+            )
+            # Fallback: create structure from raw response
+            fallback_article = {
+                "title": f"Breaking News: Article {i}",
+                "content": response_content,
+            }
+            return fallback_article
+
+    except json.JSONDecodeError as json_error:
+        logger.error(f"[Editor] 💥 JSON parse error for draft {i}: {json_error}")
+        logger.debug(f"[Editor] 💥 Unparseable response: {response_content}")
+
+        # Fallback: try to extract title and content manually
+        lines = response_content.split("\n")
+        title = f"Breaking: {lines[0][:50]}..." if lines else f"Article {i}"
+        content = response_content
+
+        fallback_article = {"title": title, "content": content}
+        logger.warning(f"[Editor] 🔄 Using fallback structure for draft {i}")
+        note_fallback("edit")
+        return fallback_article
+
+
+def _editor_fallback(i, draft):
+    """Final article used when editing draft number i failed outright"""
+    return {"title": f"Breaking News: Article {i}", "content": draft}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Edit Fast Path
+# ──────────────────────────────────────────────────────────────────────────────
+# Drafts that already meet the editor contract (length, ## subheadings, short
+# paragraphs, a hook up front) can skip the full rewrite. The fast path is
+# opt-in, per request ("edit_fast_path") or with AGENT_EDIT_FAST_PATH:
+#   "title" - one small call that writes only the headline
+#   "seo"   - no edit call; the SEO call writes the headline as well
+#   "off"   - every draft gets the full editor rewrite (default)
+EDIT_FAST_PATH_MODES = ("title", "seo", "off")
+EDIT_FAST_PATH = os.getenv("AGENT_EDIT_FAST_PATH", "off").lower()
+if EDIT_FAST_PATH not in EDIT_FAST_PATH_MODES:
+    logger.warning(f"[Editor] ⚠️ Unknown AGENT_EDIT_FAST_PATH '{EDIT_FAST_PATH}', using 'off'")
+    EDIT_FAST_PATH = "off"
+
+EDITOR_CONTRACT = {
+    "min_words": 250,
+    "max_words": 600,
+    "min_headings": 2,
+    "min_paragraphs": 4,
+    "max_paragraph_sentences": 4,
+    "max_paragraph_words": 90,
+    "min_hook_words": 8,
+    "max_hook_words": 60,
+}
+
+# Recent full-edit latencies, used to estimate what the fast path saves
+_full_edit_latencies = deque(maxlen=50)
+_full_edit_latencies_lock = threading.Lock()
+
+
+def check_editor_contract(draft):
+    """
+    Local quality gate for a draft. Returns (passed, reasons).
+
+    Mirrors what EDITOR_PROMPT asks for: overall length, ## subheadings, short
+    paragraphs (2-4 sentences) and an opening paragraph that works as a hook.
+    """
+    text = (draft or "").strip()
+    reasons = []
+    if not text or text.startswith(("{", "```", "Error generating draft")):
+        return False, ["not a prose draft"]
+
+    contract = EDITOR_CONTRACT
+    words = len(text.split())
+    if not contract["min_words"] <= words <= contract["max_words"]:
+        reasons.append(f"{words} words")
+
+    blocks = [b.strip() for b in re.split(r"\n\s*\n", text) if b.strip()]
+    headings = [b for b in blocks if b.startswith("#")]
+    paragraphs = [b for b in blocks if not b.startswith("#")]
+    if len(headings) < contract["min_headings"]:
+        reasons.append(f"{len(headings)} subheadings")
+    if len(paragraphs) < contract["min_paragraphs"]:
+        reasons.append(f"{len(paragraphs)} paragraphs")
+
+    for n, paragraph in enumerate(paragraphs, 1):
+        sentences = [x for x in _SENTENCE_END_RE.split(paragraph) if x.strip()]
+        if (
+            len(sentences) > contract["max_paragraph_sentences"]
+            or len(paragraph.split()) > contract["max_paragraph_words"]
+        ):
+            reasons.append(f"paragraph {n} too long")
+            break
+
+    hook_words = len(paragraphs[0].split()) if paragraphs else 0
+    if not blocks or blocks[0].startswith("#"):
+        reasons.append("no opening hook")
+    elif not contract["min_hook_words"] <= hook_words <= contract["max_hook_words"]:
+        reasons.append(f"{hook_words}-word hook")
+
+    return not reasons, reasons
+
+
+def _title_request(i, draft):
+    """Headline-only chat call for a draft that passed the editor contract"""
+    blocks = [b.strip() for b in re.split(r"\n\s*\n", draft.strip()) if b.strip()]
+    lead = next((b for b in blocks if not b.startswith("#")), "")
+    headings = "\n".join(b.lstrip("# ") for b in blocks if b.startswith("#"))
+    return {
+        "messages": [
+            {"role": "system", "content": TITLE_SYSTEM},
+            {"role": "user", "content": TITLE_PROMPT.format(lead=lead, headings=headings)},
+        ],
+        "temperature": 0.3,
+        "max_tokens": 60,
+    }
+
+
+def _parse_title_response(i, response_content):
+    try:
+        title = json.loads(_extract_json_block(response_content, "{", "}")).get("title", "")
+    except (json.JSONDecodeError, AttributeError):
+        title = response_content.strip().strip('"').split("\n")[0]
+    return title.strip() or f"Breaking News: Article {i}"
+
+
+def _record_edit_latency(latency_ms):
+    with _full_edit_latencies_lock:
+        _full_edit_latencies.append(latency_ms)
+
+
+def _expected_edit_latency():
+    """Median recent full-edit latency in ms (None until one has been seen)"""
+    with _full_edit_latencies_lock:
+        samples = sorted(_full_edit_latencies)
+    return samples[len(samples) // 2] if samples else None
+
+
+def _fast_path_final(i, draft, mode):
+    """Final article for a draft that passed the gate; None when the fast path fails"""
+    started = time.perf_counter()
+    if mode == "seo":
+        # Headline is written by the SEO call (see _seo_request)
+        final = {"title": "", "content": draft.strip(), "title_pending": True}
+    else:
+        try:
+            resp = llm_call("edit_title", "chat", **_title_request(i, draft))
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.warning(f"[Editor] ⚠️ Title-only call for draft {i} failed: {e}")
+            return None
+        title = _parse_title_response(i, resp.choices[0].message.content)
+        final = {"title": title, "content": draft.strip()}
+
+    run = current_run()
+    expected = _expected_edit_latency()
+    if run:
+        run.count("edit.fast_path")
+        if expected is not None:
+            spent_ms = (time.perf_counter() - started) * 1000
+            run.count("edit.latency_saved_ms", max(0, round(expected - spent_ms)))
+    logger.info(f"[Editor] ⚡ Draft {i} met the editor contract; fast path '{mode}'")
+    return final
 
 
 def edit_node(state: PipelineState) -> PipelineState:
@@ -867,25 +3292,36 @@ def edit_node(state: PipelineState) -> PipelineState:
         return {"finals": []}
 
     finals = []
+    fast_path = state.get("edit_fast_path") or EDIT_FAST_PATH
+    locale = state.get("locale")
+    if locale_instruction(LOCALE_EDITOR_INSTRUCTION, locale):
+        fast_path = "off"  # a translated edition always needs the full rewrite
+    run = current_run()
 
     for i, draft in enumerate(drafts, 1):
         logger.info(f"[Editor] ✨ {i}/{len(drafts)} Editing draft ({len(draft)} chars)")
         logger.debug(f"[Editor] 📄 Draft {i} preview: {draft[:150]}...")
 
+        if fast_path != "off":
+            passed, reasons = check_editor_contract(draft)
+            if run:
+                run.count("edit.gate_checked")
+                run.count("edit.gate_passed", int(passed))
+            if passed:
+                final = _fast_path_final(i, draft, fast_path)
+                if final is not None:
+                    finals.append(final)
+                    continue
+            else:
+                logger.info(f"[Editor] 🔍 Draft {i} needs a full edit: {', '.join(reasons)}")
+
         try:
+            request = _editor_request(i, draft, locale)
             logger.debug(f"[Editor] 📡 Making API call to edit draft {i}...")
 
-            resp = openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": EDITOR_PROMPT},
-                    {
-                        "role": "user",
-                        "content": f"Polish this draft and create an engaging title:\n\n{draft}",
-                    },
-                ],
-                temperature=0.3,
-            )
+            started = time.perf_counter()
+            resp = llm_call("edit", "chat", **request)
+            _record_edit_latency((time.perf_counter() - started) * 1000)
 
             response_content = resp.choices[0].message.content.strip()
             logger.info(
@@ -893,61 +3329,18 @@ def edit_node(state: PipelineState) -> PipelineState:
             )
             logger.debug(f"[Editor] 📄 Raw response {i}: {response_content[:200]}...")
 
-            try:
-                # Parse JSON response
-                parsed_result = json.loads(response_content)
-
-                # Validate required fields
-                if "title" in parsed_result and "content" in parsed_result:
-                    final_article = {
-                        "title": parsed_result["title"].strip(),
-                        "content": parsed_result["content"].strip(),
-                    }
-
-                    logger.info(f"[Editor] 📰 Title {i}: '{final_article['title']}'")
-                    logger.debug(
-                        f"[Editor] 📄 Content {i} preview: {final_article['content'][:150]}..."
-                    )
-
-                    finals.append(final_article)
-
-                else:
-                    logger.warning(
-                        f"[Editor] ⚠️ Invalid JSON structure for draft {i}, missing title or content"
-                    )
-                    # Fallback: create structure from raw response
-                    fallback_article = {
-                        "title": f"Breaking News: Article {i}",
-                        "content": response_content,
-                    }
-                    finals.append(fallback_article)
-
-            except json.JSONDecodeError as json_error:
-                logger.error(
-                    f"[Editor] 💥 JSON parse error for draft {i}: {json_error}"
-                )
-                logger.debug(f"[Editor] 💥 Unparseable response: {response_content}")
-
-                # Fallback: try to extract title and content manually
-                lines = response_content.split("\n")
-                title = f"Breaking: {lines[0][:50]}..." if lines else f"Article {i}"
-                content = response_content
-
-                fallback_article = {"title": title, "content": content}
-                finals.append(fallback_article)
-                logger.warning(f"[Editor] 🔄 Using fallback structure for draft {i}")
+            finals.append(_parse_editor_response(i, response_content))
 
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"[Editor] 💥 Error editing draft {i}: {e}")
             logger.error(f"[Editor] 💥 Error type: {type(e).__name__}")
 
             # Ultimate fallback: use original draft with generated title
-            fallback_article = {
-                "title": f"Breaking News: Article {i}",
-                "content": draft,
-            }
-            finals.append(fallback_article)
+            finals.append(_editor_fallback(i, draft))
             logger.warning(f"[Editor] 🔄 Using original draft {i} as ultimate fallback")
+            note_fallback("edit")
 
     logger.info(f"[Editor] ✅ Editing completed: {len(finals)} final articles created")
     for i, final in enumerate(finals, 1):
@@ -1013,6 +3406,8 @@ def post_node(state: PipelineState) -> PipelineState:
                 ),  # Extract content from finals
                 "sources": sources[i] if i < len(sources) else [],
             }
+            if final_article.get("title_pending"):
+                post["title_pending"] = True
             posts.append(post)
 
             logger.info(f"[Post] ✅ Post {i+1} created:")
@@ -1038,6 +3433,84 @@ def post_node(state: PipelineState) -> PipelineState:
     return {"posts": posts}
 
 
+def _seo_request(i, post, locale=None):
+    """Build the SEO chat call for post number i"""
+    seo_content = apply_token_budget("seo_generator", post.get("final", ""), f"post {i}")
+    if post.get("title_pending"):
+        prompt = SEO_WITH_TITLE_PROMPT.format(topic=post.get("topic", ""), content=seo_content)
+    else:
+        prompt = SEO_PROMPT.format(
+            title=post.get("title", ""), topic=post.get("topic", ""), content=seo_content
+        )
+    prompt += locale_instruction(LOCALE_SEO_INSTRUCTION, locale)
+    logger.debug(f"[SEO] 📝 SEO prompt ({len(prompt)} chars): {prompt[:200]}...")
+    return {
+        "messages": [
+            {"role": "system", "content": SEO_SYSTEM},
+            {"role": "user", "content": prompt},
+        ],
+        "temperature": 0.3,
+    }
+
+
+def _settle_title(i, post):
+    """Give a fast-path post (headline left to SEO) its final title"""
+    if not post.get("title_pending"):
+        return post
+    post = {k: v for k, v in post.items() if k != "title_pending"}
+    if not post.get("title"):
+        post["title"] = post.get("seo_title") or f"Breaking News: Article {i}"
+    return post
+
+
+def _parse_seo_response(i, response_content, post):
+    """Merge SEO fields from a model response into post (post unchanged on failure)"""
+    return _settle_title(i, _merge_seo_response(i, response_content, post))
+
+
+def _merge_seo_response(i, response_content, post):
+    try:
+        # Remove markdown code blocks if present
+        if response_content.startswith("```"):
+            lines = response_content.split("\n")
+            response_content = (
+                "\n".join(lines[1:-1]) if len(lines) > 2 else response_content
+            )
+            response_content = response_content.strip()
+            logger.debug(f"[SEO] 🔧 Removed markdown code blocks for post {i}")
+
+        # Parse JSON response
+        seo_data = json.loads(response_content)
+
+        # Validate required fields
+        if "seo_title" in seo_data and "seo_description" in seo_data:
+            allowed = ("title", "seo_title", "seo_description")
+            if not post.get("title_pending"):
+                allowed = allowed[1:]
+            updated_post = {**post, **{k: seo_data[k] for k in allowed if seo_data.get(k)}}
+
+            logger.info(f"[SEO] 🏷️ SEO Title {i}: '{seo_data['seo_title']}'")
+            logger.debug(
+                f"[SEO] 📝 SEO Description {i}: {seo_data['seo_description'][:100]}..."
+            )
+
+            return updated_post
+
+        logger.warning(
+            f"[SEO] ⚠️ Invalid JSON structure for post {i}, missing seo_title or seo_description"
+        )
+        # Fallback: use original post without SEO enhancement
+        return post
+
+    except json.JSONDecodeError as json_error:
+        logger.error(f"[SEO] 💥 JSON parse error for post {i}: {json_error}")
+        logger.debug(f"[SEO] 💥 Unparseable response: {response_content}")
+
+        # Fallback: use original post without SEO enhancement
+        logger.warning(f"[SEO] 🔄 Using original post {i} without SEO enhancement")
+        return post
+
+
 def seo_generator_node(state: PipelineState) -> PipelineState:
     logger.info("[SEO] 🚀 === SEO GENERATOR NODE STARTING ===")
 
@@ -1052,7 +3525,7 @@ def seo_generator_node(state: PipelineState) -> PipelineState:
     if not openai_client:
         logger.error("[SEO] ❌ OpenAI client not available")
         logger.error("[SEO] 🏁 === SEO GENERATOR NODE FAILED ===")
-        return {"posts": posts}
+        return {"posts": [_settle_title(i, post) for i, post in enumerate(posts, 1)]}
 
     updated_posts = []
 
@@ -1070,19 +3543,8 @@ def seo_generator_node(state: PipelineState) -> PipelineState:
         try:
             logger.debug(f"[SEO] 📡 Making API call for SEO generation {i}...")
 
-            prompt = SEO_PROMPT.format(title=title, topic=topic, content=content)
-            logger.debug(
-                f"[SEO] 📝 SEO prompt ({len(prompt)} chars): {prompt[:200]}..."
-            )
-
-            resp = openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are an expert SEO copywriter."},
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.3,
-            )
+            request = _seo_request(i, post, state.get("locale"))
+            resp = llm_call("seo_generator", "chat", **request)
 
             response_content = resp.choices[0].message.content.strip()
             logger.info(
@@ -1090,54 +3552,18 @@ def seo_generator_node(state: PipelineState) -> PipelineState:
             )
             logger.debug(f"[SEO] 📄 Raw response {i}: {response_content[:200]}...")
 
-            try:
-                # Remove markdown code blocks if present
-                if response_content.startswith("```"):
-                    lines = response_content.split("\n")
-                    response_content = (
-                        "\n".join(lines[1:-1]) if len(lines) > 2 else response_content
-                    )
-                    response_content = response_content.strip()
-                    logger.debug(f"[SEO] 🔧 Removed markdown code blocks for post {i}")
-
-                # Parse JSON response
-                seo_data = json.loads(response_content)
-
-                # Validate required fields
-                if "seo_title" in seo_data and "seo_description" in seo_data:
-                    updated_post = {**post, **seo_data}
-
-                    logger.info(f"[SEO] 🏷️ SEO Title {i}: '{seo_data['seo_title']}'")
-                    logger.debug(
-                        f"[SEO] 📝 SEO Description {i}: {seo_data['seo_description'][:100]}..."
-                    )
-
-                    updated_posts.append(updated_post)
-
-                else:
-                    logger.warning(
-                        f"[SEO] ⚠️ Invalid JSON structure for post {i}, missing seo_title or seo_description"
-                    )
-                    # Fallback: use original post without SEO enhancement
-                    updated_posts.append(post)
-
-            except json.JSONDecodeError as json_error:
-                logger.error(f"[SEO] 💥 JSON parse error for post {i}: {json_error}")
-                logger.debug(f"[SEO] 💥 Unparseable response: {response_content}")
-
-                # Fallback: use original post without SEO enhancement
-                updated_posts.append(post)
-                logger.warning(
-                    f"[SEO] 🔄 Using original post {i} without SEO enhancement"
-                )
+            updated_posts.append(_parse_seo_response(i, response_content, post))
 
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"[SEO] 💥 Error generating SEO for post {i}: {e}")
             logger.error(f"[SEO] 💥 Error type: {type(e).__name__}")
 
             # Ultimate fallback: use original post
-            updated_posts.append(post)
+            updated_posts.append(_settle_title(i, post))
             logger.warning(f"[SEO] 🔄 Using original post {i} as ultimate fallback")
+            note_fallback("seo_generator")
 
     logger.info(
         f"[SEO] ✅ SEO generation completed: {len(updated_posts)} posts processed"
@@ -1154,63 +3580,751 @@ def seo_generator_node(state: PipelineState) -> PipelineState:
     return {"posts": updated_posts}
 
 
+# ──────────────────────────────────────────────────────────────────────────────
+# Source Validation
+# ──────────────────────────────────────────────────────────────────────────────
+# Draft sources come from model JSON and url_citation annotations and can be
+# dead or hallucinated. Every URL of a run is checked concurrently through one
+# pooled session (HEAD, falling back to GET), with a per-host concurrency cap
+# and tight timeouts. Only definitive failures (404/410 and DNS errors) drop a
+# source; timeouts, 403s and 5xx keep it, since many news sites block bots.
+# URLs are untrusted: redirects are followed hop by hop, and a URL whose host
+# resolves to a private, loopback, link-local or otherwise non-public address
+# (at any hop) is dropped without being requested.
+logger.info("[Sources] 🔗 Setting up source validation...")
+
+VALIDATE_SOURCES = os.getenv("AGENT_VALIDATE_SOURCES", "true").lower() in ("1", "true", "yes")
+SOURCE_CONNECT_TIMEOUT_S = float(os.getenv("AGENT_SOURCE_CONNECT_TIMEOUT_S", "1.5"))
+SOURCE_READ_TIMEOUT_S = float(os.getenv("AGENT_SOURCE_READ_TIMEOUT_S", "3"))
+SOURCE_MAX_WORKERS = int(os.getenv("AGENT_SOURCE_MAX_WORKERS", "16"))
+SOURCE_PER_HOST = int(os.getenv("AGENT_SOURCE_PER_HOST", "2"))
+SOURCE_CACHE_TTL_S = int(os.getenv("AGENT_SOURCE_CACHE_TTL_S", "3600"))
+SOURCE_CACHE_UNKNOWN_TTL_S = 300  # inconclusive results are retried sooner
+SOURCE_CACHE_MAX = int(os.getenv("AGENT_SOURCE_CACHE_MAX", "4096"))
+SOURCE_DEAD_STATUSES = (404, 410)
+SOURCE_MAX_REDIRECTS = int(os.getenv("AGENT_SOURCE_MAX_REDIRECTS", "5"))
+SOURCE_REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+SOURCE_USER_AGENT = "Mozilla/5.0 (compatible; movie-news-research-agent/1.0)"
+
+_TRACKING_PARAMS = re.compile(r"^(utm_\w+|fbclid|gclid|mc_cid|mc_eid)$", re.IGNORECASE)
+
+
+def normalize_url(url):
+    """Cache key for a URL: lowercased host, no fragment/default port/tracking params"""
+    parts = urllib.parse.urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not (scheme == "http" and port == 80 or scheme == "https" and port == 443):
+        host = f"{host}:{port}"
+    query = urllib.parse.urlencode(
+        sorted(
+            (k, v)
+            for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+            if not _TRACKING_PARAMS.match(k)
+        )
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urllib.parse.urlunsplit((scheme, host, path, query, ""))
+
+
+def _is_dns_failure(exc):
+    seen = set()
+    stack = [exc]
+    while stack:
+        err = stack.pop()
+        if err is None or id(err) in seen:
+            continue
+        seen.add(id(err))
+        if isinstance(err, socket.gaierror) or type(err).__name__ == "NameResolutionError":
+            return True
+        stack.extend([err.__cause__, err.__context__, getattr(err, "reason", None)])
+        stack.extend(arg for arg in getattr(err, "args", ()) if isinstance(arg, BaseException))
+    return False
+
+
+class BlockedSourceError(Exception):
+    """A source URL (or a redirect hop) points at a non-public address"""
+
+
+# getaddrinfo has no timeout of its own; lookups run here so a check can stop
+# waiting for one (the lookup itself finishes in the background)
+_resolver_pool = ThreadPoolExecutor(max_workers=SOURCE_MAX_WORKERS, thread_name_prefix="source-dns")
+
+
+def _resolve(host, timeout):
+    """Addresses host resolves to, in resolver order; socket.timeout after timeout seconds"""
+    future = _resolver_pool.submit(socket.getaddrinfo, host, None)
+    try:
+        infos = future.result(timeout=timeout)
+    except FuturesTimeoutError:
+        future.cancel()
+        raise socket.timeout(f"resolving {host} took longer than {timeout}s") from None
+    return list(dict.fromkeys(info[4][0] for info in infos))
+
+
+def _public_address(host, timeout):
+    """The address to connect to for host, or None unless every address it resolves to is public"""
+    addresses = _resolve(host, timeout)
+    if addresses and all(
+        ipaddress.ip_address(address.split("%")[0]).is_global for address in addresses
+    ):
+        return addresses[0]
+    return None
+
+
+class _PinnedAdapter(HTTPAdapter):
+    """
+    Connects a request with a pinned_address attribute to that address.
+
+    The URL keeps its hostname, which still goes out as the Host header, the
+    TLS server name and the name the certificate is checked against; only the
+    DNS lookup at connect time is skipped, so a record that changes between
+    the public-address check and the connection cannot redirect the request.
+    """
+
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(
+            request, verify, cert
+        )
+        address = getattr(request, "pinned_address", None)
+        if address:
+            hostname = host_params["host"]
+            host_params["host"] = f"[{address}]" if ":" in address else address
+            if host_params["scheme"] == "https":
+                pool_kwargs.update(server_hostname=hostname, assert_hostname=hostname)
+        return host_params, pool_kwargs
+
+    def send(self, request, **kwargs):
+        if getattr(request, "pinned_address", None):
+            request.headers["Host"] = urllib.parse.urlsplit(request.url).netloc.rpartition("@")[2]
+        return super().send(request, **kwargs)
+
+
+class SourceValidator:
+    def __init__(
+        self,
+        max_workers=None,
+        per_host=None,
+        timeout=None,
+        ttl=None,
+        max_entries=None,
+        allow_private=False,  # local benchmarks only
+    ):
+        self.max_workers = max_workers or SOURCE_MAX_WORKERS
+        self.per_host = per_host or SOURCE_PER_HOST
+        self.timeout = timeout or (SOURCE_CONNECT_TIMEOUT_S, SOURCE_READ_TIMEOUT_S)
+        self.ttl = ttl or SOURCE_CACHE_TTL_S
+        self.max_entries = max_entries or SOURCE_CACHE_MAX
+        self.allow_private = allow_private
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = SOURCE_USER_AGENT
+        # A proxy would do its own lookup and undo the address pinning
+        self.session.trust_env = False
+        adapter = _PinnedAdapter(
+            pool_connections=self.max_workers, pool_maxsize=self.max_workers, max_retries=0
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._cache = OrderedDict()
+        self._host_limits = {}  # host -> [semaphore, holders and waiters]
+        self._lock = threading.Lock()
+
+    def _cached(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._cache.move_to_end(key)
+                return entry[1]
+            return None
+
+    def _store(self, key, verdict):
+        ttl = SOURCE_CACHE_UNKNOWN_TTL_S if verdict == "unknown" else self.ttl
+        with self._lock:
+            self._cache[key] = (time.monotonic() + ttl, verdict)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _acquire_host(self, host):
+        with self._lock:
+            slot = self._host_limits.get(host)
+            if slot is None:
+                slot = self._host_limits[host] = [threading.BoundedSemaphore(self.per_host), 0]
+            slot[1] += 1
+        slot[0].acquire()
+        return slot
+
+    def _release_host(self, host, slot):
+        slot[0].release()
+        with self._lock:
+            slot[1] -= 1
+            if slot[1] == 0:
+                # Only hosts with requests in flight or waiting keep an entry
+                del self._host_limits[host]
+
+    def _check_host(self, url):
+        """The vetted address to connect to for url (None when private hosts are allowed)"""
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise BlockedSourceError(f"not an http(s) URL: {url}")
+        if self.allow_private:
+            return None
+        connect_timeout = self.timeout[0] if isinstance(self.timeout, tuple) else self.timeout
+        address = _public_address(parts.hostname, connect_timeout)
+        if address is None:
+            raise BlockedSourceError(f"{parts.hostname} is not a public address")
+        return address
+
+    def _fetch(self, method, url):
+        """Status of url, following redirects one checked hop at a time"""
+        for _ in range(SOURCE_MAX_REDIRECTS + 1):
+            request = self.session.prepare_request(requests.Request(method, url))
+            request.pinned_address = self._check_host(url)
+            response = self.session.send(
+                request, timeout=self.timeout, allow_redirects=False, stream=True
+            )
+            response.close()
+            location = response.headers.get("Location")
+            if response.status_code not in SOURCE_REDIRECT_STATUSES or not location:
+                return response.status_code
+            url = urllib.parse.urljoin(url, location)
+        raise requests.TooManyRedirects(f"more than {SOURCE_MAX_REDIRECTS} redirects")
+
+    def _probe(self, url):
+        """'ok', 'dead' or 'unknown' for one URL (no cache)"""
+        host = urllib.parse.urlsplit(url).netloc.lower()
+        slot = self._acquire_host(host)
+        try:
+            status = self._fetch("HEAD", url)
+            if status < 400:
+                return "ok"
+            # Many servers reject or mishandle HEAD; confirm with GET
+            status = self._fetch("GET", url)
+        except BlockedSourceError as e:
+            logger.warning(f"[Sources] 🚫 {url}: {e}")
+            return "dead"
+        except (requests.RequestException, OSError) as e:
+            if _is_dns_failure(e):
+                return "dead"
+            logger.debug(f"[Sources] ⚠️ {url}: {type(e).__name__}")
+            return "unknown"
+        finally:
+            self._release_host(host, slot)
+        if status < 400:
+            return "ok"
+        if status in SOURCE_DEAD_STATUSES:
+            return "dead"
+        return "unknown"
+
+    def check(self, url):
+        if not url.lower().startswith(("http://", "https://")):
+            return "dead"
+        try:
+            key = normalize_url(url)
+        except ValueError:  # malformed port or host
+            return "dead"
+        verdict = self._cached(key)
+        run = current_run()
+        if verdict is not None:
+            if run:
+                run.count("sources.cache_hits")
+            return verdict
+        verdict = self._probe(url)
+        self._store(key, verdict)
+        if run:
+            run.count("sources.checked")
+        return verdict
+
+    def validate(self, urls):
+        """Check URLs concurrently; returns {url: 'ok' | 'dead' | 'unknown'}"""
+        urls = list(dict.fromkeys(u for u in urls if u))
+        if not urls:
+            return {}
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(urls)), thread_name_prefix="source-check"
+        ) as pool:
+            futures = {url: submit_with_context(pool, self.check, url) for url in urls}
+            return {url: future.result() for url, future in futures.items()}
+
+
+source_validator = SourceValidator()
+
+
+def validate_sources_node(state: PipelineState) -> PipelineState:
+    if not state.get("validate_sources", VALIDATE_SOURCES):
+        return {}
+
+    logger.info("[Sources] 🔍 === SOURCE VALIDATION STARTING ===")
+    sources = state.get("sources", [])
+    started = time.perf_counter()
+    verdicts = source_validator.validate(url for urls in sources for url in urls)
+
+    validated = []
+    for i, urls in enumerate(sources, 1):
+        kept = [url for url in urls if verdicts.get(url) != "dead"]
+        for url in urls:
+            if verdicts.get(url) == "dead":
+                logger.warning(f"[Sources]   Dropped dead source for draft {i}: {url}")
+        validated.append(kept)
+
+    dead = sum(1 for verdict in verdicts.values() if verdict == "dead")
+    run = current_run()
+    if run:
+        run.count("sources.dead", dead)
+    logger.info(
+        f"[Sources] ✅ Checked {len(verdicts)} URLs in {(time.perf_counter() - started) * 1000:.0f}ms, "
+        f"dropped {dead}"
+    )
+    return {"sources": validated}
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Build LangGraph
 # ──────────────────────────────────────────────────────────────────────────────
+# The pipeline is a straight line. A graph can start at any node (re-entry):
+# it then contains only that node and the ones downstream of it, and the
+# caller supplies the state the start node needs (see REENTRY_REQUIREMENTS).
 logger.info("[Graph] 🏗️ Building LangGraph pipeline...")
 
-graph = StateGraph(PipelineState)
+PIPELINE_NODES = (
+    ("research", research_node),
+    ("select_topics", select_topics_node),
+    ("draft", draft_node),
+    ("validate_sources", validate_sources_node),
+    ("edit", edit_node),
+    ("post", post_node),
+    ("seo_generator", seo_generator_node),
+)
+PIPELINE_NODE_NAMES = tuple(name for name, _ in PIPELINE_NODES)
+
+# State fields a caller must supply when starting at each node
+REENTRY_REQUIREMENTS = {
+    "select_topics": ("research_context",),
+    "draft": ("selected_research",),
+    "edit": ("selected_topics", "drafts"),
+    "post": ("selected_topics", "drafts", "finals"),
+    "seo_generator": ("posts",),
+}
+START_NODES = ("research",) + tuple(REENTRY_REQUIREMENTS)
+
+# The node that produces each caller-suppliable state field. A re-entry run
+# keeps only the fields produced upstream of its start node; the rest are
+# recomputed (drafts sent with start_node "draft" would otherwise be taken
+# as already prepared).
+REENTRY_FIELD_PRODUCERS = {
+    "raw_topics": "research",
+    "research_context": "research",
+    "selected_topics": "select_topics",
+    "selected_research": "select_topics",
+    "drafts": "draft",
+    "sources": "draft",
+    "shared_context": "draft",
+    "finals": "edit",
+    "posts": "post",
+}
+
+# Early exits: after the named node, the run ends when the predicate holds
+PIPELINE_EXITS = {
+    "research": lambda state: bool(state.get("nothing_new")),
+}
+
+
+def _exit_route(name, next_name):
+    exit_when = PIPELINE_EXITS[name]
+
+    def route(state):
+        return END if exit_when(state) else next_name
+
+    return route
+
 
-logger.info("[Graph] ➕ Adding nodes to graph...")
-graph.add_node("research", research_node)
-logger.debug("[Graph]   ✅ Added 'research' node")
+def build_pipeline_graph(entry_point="research", stop_before=None):
+    """Compile the pipeline from entry_point through seo_generator (or up to stop_before)"""
+    end = PIPELINE_NODE_NAMES.index(stop_before) if stop_before else len(PIPELINE_NODES)
+    nodes = PIPELINE_NODES[PIPELINE_NODE_NAMES.index(entry_point) : end]
+    graph = StateGraph(PipelineState)
 
-graph.add_node("select_topics", select_topics_node)
-logger.debug("[Graph]   ✅ Added 'select_topics' node")
+    logger.info("[Graph] ➕ Adding nodes to graph...")
+    for name, fn in nodes:
+        graph.add_node(name, profiled(name, fn))
+        logger.debug(f"[Graph]   ✅ Added '{name}' node")
 
-graph.add_node("draft", draft_node)
-logger.debug("[Graph]   ✅ Added 'draft' node")
+    logger.info("[Graph] 🔗 Adding edges to graph...")
+    for (name, _), (next_name, _) in zip(nodes, nodes[1:]):
+        if name in PIPELINE_EXITS:
+            graph.add_conditional_edges(
+                name, _exit_route(name, next_name), {next_name: next_name, END: END}
+            )
+            logger.debug(f"[Graph]   ✅ Added edge: {name} → {next_name} | END")
+        else:
+            graph.add_edge(name, next_name)
+            logger.debug(f"[Graph]   ✅ Added edge: {name} → {next_name}")
+
+    graph.add_edge(nodes[-1][0], END)
+    logger.debug(f"[Graph]   ✅ Added edge: {nodes[-1][0]} → END")
+
+    logger.info(f"[Graph] 🚀 Setting entry point to '{entry_point}'...")
+    graph.set_entry_point(entry_point)
+
+    logger.info("[Graph] ⚙️ Compiling graph...")
+    return graph.compile()
 
-graph.add_node("edit", edit_node)
-logger.debug("[Graph]   ✅ Added 'edit' node")
 
-graph.add_node("post", post_node)
-logger.debug("[Graph]   ✅ Added 'post' node")
+_compiled_graphs = {}
+_compiled_graphs_lock = threading.Lock()
 
-graph.add_node("seo_generator", seo_generator_node)
-logger.debug("[Graph]   ✅ Added 'seo_generator' node")
 
-logger.info("[Graph] 🔗 Adding edges to graph...")
-graph.add_edge("research", "select_topics")
-logger.debug("[Graph]   ✅ Added edge: research → select_topics")
+def pipeline_graph(start_node="research", stop_before=None):
+    """Compiled graph starting at start_node (compiled once, then reused)"""
+    key = (start_node, stop_before)
+    with _compiled_graphs_lock:
+        if key not in _compiled_graphs:
+            _compiled_graphs[key] = build_pipeline_graph(start_node, stop_before)
+        return _compiled_graphs[key]
 
-graph.add_edge("select_topics", "draft")
-logger.debug("[Graph]   ✅ Added edge: select_topics → draft")
 
-graph.add_edge("draft", "edit")
-logger.debug("[Graph]   ✅ Added edge: draft → edit")
+# Locale fan-out: everything before LOCALE_FORK_NODE runs once, then the rest
+# of the graph runs concurrently per locale from the shared state
+LOCALE_FORK_NODE = "edit"
 
-graph.add_edge("edit", "post")
-logger.debug("[Graph]   ✅ Added edge: edit → post")
 
-graph.add_edge("post", "seo_generator")
-logger.debug("[Graph]   ✅ Added edge: post → seo_generator")
+def run_localized(initial_state, start_node, locales):
+    """
+    Run the shared stages once, then edit → post → seo_generator per locale.
+
+    Returns the shared state plus "posts_by_locale"; "posts" holds the first
+    locale's posts so single-locale callers see the usual shape.
+    """
+    if PIPELINE_NODE_NAMES.index(start_node) < PIPELINE_NODE_NAMES.index(LOCALE_FORK_NODE):
+        shared = pipeline_graph(start_node, stop_before=LOCALE_FORK_NODE).invoke(initial_state)
+    else:
+        shared = dict(initial_state)
+    if shared.get("nothing_new"):
+        return dict(shared, posts=[], posts_by_locale={locale: [] for locale in locales})
+
+    logger.info(f"[Locales] 🌍 Editing {len(locales)} editions: {', '.join(locales)}")
+    branch = pipeline_graph(LOCALE_FORK_NODE)
+    with ThreadPoolExecutor(max_workers=len(locales), thread_name_prefix="locale") as pool:
+        futures = {
+            locale: submit_with_context(pool, branch.invoke, {**shared, "locale": locale})
+            for locale in locales
+        }
+        posts_by_locale = {locale: future.result().get("posts", []) for locale, future in futures.items()}
+
+    run = current_run()
+    if run:
+        run.count("locales.editions", len(locales))
+    return dict(shared, posts=posts_by_locale[locales[0]], posts_by_locale=posts_by_locale)
+
+
+def _is_string_list(value):
+    return isinstance(value, list) and all(isinstance(v, str) for v in value)
+
+
+def _reentry_item_error(field, item):
+    """Describe what is wrong with one item of a state list field, or None"""
+    if field in ("research_context", "selected_research"):
+        if not isinstance(item, dict) or not all(
+            isinstance(item.get(key), str) for key in ("title", "details")
+        ):
+            return "must be an object with string title and details"
+        if not isinstance(item.get("url", ""), str):
+            return "must have a string url"
+    elif field == "finals":
+        if not isinstance(item, dict) or not all(
+            isinstance(item.get(key), str) for key in ("title", "content")
+        ):
+            return "must be an object with string title and content"
+    elif field == "posts":
+        if not isinstance(item, dict) or not all(
+            isinstance(item.get(key), str) for key in ("title", "final")
+        ):
+            return "must be an object with string title and final"
+    elif field == "sources":
+        if not _is_string_list(item):
+            return "must be a list of URL strings"
+    elif not isinstance(item, str):
+        return "must be a string"
+    return None
+
+
+def prepare_reentry_state(start_node, state):
+    """
+    Validate caller-supplied state for a run starting at start_node.
+
+    Returns (initial_state, error). Only fields produced upstream of
+    start_node are kept (see REENTRY_FIELD_PRODUCERS). Fields the node can
+    derive are filled in: selected_topics from selected_research, and empty
+    source lists.
+    """
+    if start_node not in START_NODES:
+        return None, f"start_node must be one of: {', '.join(START_NODES)}"
+    if not isinstance(state, dict):
+        return None, "state must be an object"
+
+    upstream = set(PIPELINE_NODE_NAMES[: PIPELINE_NODE_NAMES.index(start_node)])
+    initial_state = {
+        k: v
+        for k, v in state.items()
+        if REENTRY_FIELD_PRODUCERS.get(k) in upstream
+    }
+    initial_state["topic"] = state.get("topic", "")
+    if not isinstance(initial_state["topic"], str):
+        return None, "state.topic must be a string"
+    if not isinstance(initial_state.get("shared_context", ""), str):
+        return None, "state.shared_context must be a string"
+
+    for field in REENTRY_REQUIREMENTS.get(start_node, ()):
+        value = initial_state.get(field)
+        if not isinstance(value, list) or not value:
+            return None, f"start_node '{start_node}' requires a non-empty state.{field} list"
+
+    for field, value in initial_state.items():
+        if field in ("topic", "shared_context"):
+            continue
+        if not isinstance(value, list):
+            return None, f"state.{field} must be a list"
+        for i, item in enumerate(value):
+            error = _reentry_item_error(field, item)
+            if error:
+                return None, f"state.{field}[{i}] {error}"
+        if field in ("research_context", "selected_research"):
+            initial_state[field] = [{"url": "", **item} for item in value]
+
+    if start_node == "draft" and not initial_state.get("selected_topics"):
+        initial_state["selected_topics"] = [
+            f"{item['title']} - {item['details']}"
+            for item in initial_state["selected_research"]
+        ]
+    if start_node in ("edit", "post"):
+        count = len(initial_state["drafts"])
+        lengths = {len(initial_state[f]) for f in REENTRY_REQUIREMENTS[start_node]}
+        if len(lengths) > 1:
+            return None, f"state.{', state.'.join(REENTRY_REQUIREMENTS[start_node])} must have equal lengths"
+        initial_state.setdefault("sources", [[] for _ in range(count)])
+        if len(initial_state["sources"]) != count:
+            return None, "state.sources must have one list per draft"
 
-graph.add_edge("seo_generator", END)
-logger.debug("[Graph]   ✅ Added edge: seo_generator → END")
+    return initial_state, None
 
-logger.info("[Graph] 🚀 Setting entry point to 'research'...")
-graph.set_entry_point("research")
 
-logger.info("[Graph] ⚙️ Compiling graph...")
-compiled_graph = graph.compile()
+compiled_graph = pipeline_graph("research")
 logger.info("[Graph] ✅ Graph compilation completed successfully!")
 
+# ──────────────────────────────────────────────────────────────────────────────
+# Batch Execution (OpenAI Batch API)
+# ──────────────────────────────────────────────────────────────────────────────
+# Bulk runs of the draft, edit and SEO stages through the OpenAI Batch API
+# (the nightly ingest); see _batch.py.
+import _batch  # noqa: E402
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Persistence Sink
+# ──────────────────────────────────────────────────────────────────────────────
+# Optional bulk writes of generated posts to the posts table (the "persist"
+# request option, AGENT_PERSIST_SINK); see _persist.py.
+import _persist  # noqa: E402
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # HTTP Handler
 # ──────────────────────────────────────────────────────────────────────────────
 logger.info("[Handler] 🌐 Setting up HTTP request handler...")
 
+# Fields a post can carry; callers may ask for a subset via the "fields" option
+POST_FIELDS = (
+    "topic",
+    "title",
+    "draft",
+    "final",
+    "sources",
+    "seo_title",
+    "seo_description",
+)
+
+# Bodies smaller than this are sent uncompressed (compression would not pay off)
+MIN_COMPRESS_BYTES = int(os.getenv("AGENT_MIN_COMPRESS_BYTES", "1024"))
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def shape_posts(posts, fields=None):
+    """Keep only the requested fields of each post (all fields when None)"""
+    if not fields:
+        return posts
+    return [{key: post[key] for key in fields if key in post} for post in posts]
+
+
+def parse_fields_option(fields):
+    """Validate the "fields" request option; returns (fields, error_message)"""
+    if fields is None:
+        return None, None
+    if isinstance(fields, str):
+        fields = [f.strip() for f in fields.split(",") if f.strip()]
+    if not isinstance(fields, list) or not all(isinstance(f, str) for f in fields):
+        return None, "fields must be a list of post field names"
+
+    unknown = [f for f in fields if f not in POST_FIELDS]
+    if unknown:
+        return None, f"Unknown fields: {', '.join(unknown)} (allowed: {', '.join(POST_FIELDS)})"
+    return fields, None
+
+
+def parse_locales_option(locales):
+    """Validate the "locales" request option; returns (locales, error_message)"""
+    if not isinstance(locales, list) or not all(isinstance(locale, str) for locale in locales):
+        return None, "locales must be a list of locale codes"
+    locales = list(dict.fromkeys(locale.strip() for locale in locales if locale.strip()))
+    if not locales:
+        return None, "No locales provided"
+    if len(locales) > MAX_LOCALES:
+        return None, f"Too many locales, maximum is {MAX_LOCALES}"
+    unknown = [locale for locale in locales if locale not in LOCALE_NAMES]
+    if unknown:
+        return None, f"Unsupported locales: {', '.join(unknown)} (supported: {', '.join(LOCALE_NAMES)})"
+    return locales, None
+
+
+def parse_topics_option(topics):
+    """Validate the "topics" request option; returns (topics, error_message)"""
+    if not isinstance(topics, list) or not all(isinstance(t, str) for t in topics):
+        return None, "topics must be a list of strings"
+    topics = [t.strip() for t in topics if t.strip()]
+    if not topics:
+        return None, "No topics provided"
+    if len(topics) > _batch.BATCH_MAX_TOPICS:
+        return None, f"Too many topics, maximum is {_batch.BATCH_MAX_TOPICS}"
+    if any(len(t) > 200 for t in topics):
+        return None, "Topic too long, must be under 200 characters"
+    return topics, None
+
+
+def _accepted_encodings(accept_encoding):
+    """Parse an Accept-Encoding header into {encoding: q}"""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+
+def encode_json_response(data, accept_encoding="", pretty=False):
+    """
+    Serialise data for the wire.
+
+    Compact separators by default; br (when the brotli package is installed)
+    or gzip when the client accepts it and the body is large enough.
+
+    Returns (body_bytes, content_encoding or None).
+    """
+    if pretty:
+        payload = json.dumps(data, indent=2, ensure_ascii=False)
+    else:
+        payload = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+    body = payload.encode("utf-8")
+
+    if len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+
+    accepted = _accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return brotli.compress(body, quality=5), "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return gzip.compress(body, compresslevel=6), "gzip"
+    return body, None
+
+
+# Single-flight: concurrent requests for the same normalised topic (plus
+# optional idempotency key and pipeline options) share one pipeline run, and
+# completed runs are served from a short-lived cache. This only spans requests
+# handled by the same warm instance. Shared responses say so ("coalesced") and
+# carry no metrics or profile of the run they reuse.
+RESULT_CACHE_TTL_S = int(os.getenv("AGENT_RESULT_CACHE_TTL_S", "300"))
+RESULT_CACHE_MAX = int(os.getenv("AGENT_RESULT_CACHE_MAX", "64"))
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, ttl=RESULT_CACHE_TTL_S, max_entries=RESULT_CACHE_MAX):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._inflight = {}
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def run(self, key, fn):
+        """
+        Run fn once per key among concurrent callers.
+
+        Returns (result, how) where how is "leader" (ran fn), "joined" (waited
+        on an in-flight run) or "cached". Errors propagate to every waiter and
+        are not cached.
+        """
+        with self._lock:
+            cached = self._results.get(key)
+            if cached and cached[0] > time.monotonic():
+                self._results.move_to_end(key)
+                return cached[1], "cached"
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, "joined"
+
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if flight.error is None and self.ttl > 0:
+                    self._results[key] = (time.monotonic() + self.ttl, flight.result)
+                    self._results.move_to_end(key)
+                    while len(self._results) > self.max_entries:
+                        self._results.popitem(last=False)
+            flight.done.set()
+        return flight.result, "leader"
+
+
+pipeline_flights = SingleFlight()
+
+
+def flight_key(initial_state, idempotency_key="", start_node="research", locales=None):
+    """Coalescing key: normalised topic, idempotency key, start node, locales and state"""
+    topic = re.sub(r"\s+", " ", initial_state["topic"]).strip().casefold()
+    options = sorted((k, v) for k, v in initial_state.items() if k != "topic")
+    return (topic, idempotency_key.strip(), start_node, tuple(locales or ()), json.dumps(options))
+
 
 class handler(BaseHTTPRequestHandler):
     def _cors(self):
@@ -1260,13 +4374,45 @@ class handler(BaseHTTPRequestHandler):
             body = json.loads(body_data.decode("utf-8"))
             logger.info(f"[Handler] 📋 Parsed JSON body: {body}")
 
+            if "topics" in body:
+                self._handle_topics(body)
+                return
+            if "prefetch" in body:
+                self._handle_prefetch(body)
+                return
+            if "batch_job" in body:
+                self._handle_batch_job(body)
+                return
+
             topic = body.get("topic", "").strip()
             logger.info(
                 f"[Handler] 🎯 Extracted topic: '{topic}' (length: {len(topic)})"
             )
 
+            fields, fields_error = parse_fields_option(body.get("fields"))
+            self._pretty = bool(body.get("pretty", False))
+
             # Validation
-            if not topic:
+            if fields_error:
+                logger.warning(f"[Handler] ⚠️ Invalid fields option: {fields_error}")
+                self._send_error(fields_error)
+                return
+
+            start_node = body.get("start_node", "research")
+            initial_state = {"topic": topic}
+            if start_node != "research":
+                initial_state, reentry_error = prepare_reentry_state(
+                    start_node, body.get("state", {})
+                )
+                if reentry_error:
+                    logger.warning(f"[Handler] ⚠️ Invalid re-entry request: {reentry_error}")
+                    self._send_error(reentry_error)
+                    return
+                topic = topic or initial_state["topic"].strip()
+                initial_state["topic"] = topic
+                logger.info(f"[Handler] ↪️ Re-entering pipeline at '{start_node}'")
+
+            if not topic and start_node == "research":
                 logger.warning("[Handler] ⚠️ No topic provided in request")
                 self._send_error("No topic provided")
                 return
@@ -1282,9 +4428,95 @@ class handler(BaseHTTPRequestHandler):
             )
             logger.info("[Handler] ⏰ Pipeline execution beginning...")
 
-            result = compiled_graph.invoke({"topic": topic})
+            if "speculative" in body:
+                initial_state["speculative"] = bool(body["speculative"])
+            if "validate_sources" in body:
+                initial_state["validate_sources"] = bool(body["validate_sources"])
+            if "edit_fast_path" in body:
+                if body["edit_fast_path"] not in EDIT_FAST_PATH_MODES:
+                    self._send_error(
+                        f"edit_fast_path must be one of: {', '.join(EDIT_FAST_PATH_MODES)}"
+                    )
+                    return
+                initial_state["edit_fast_path"] = body["edit_fast_path"]
+            priority = body.get("priority", "interactive")
+            if priority not in PRIORITY_CLASSES:
+                self._send_error(f"priority must be one of: {', '.join(PRIORITY_CLASSES)}")
+                return
+            if "incremental" in body:
+                initial_state["incremental"] = bool(body["incremental"])
+            if "research_mode" in body:
+                if body["research_mode"] not in RESEARCH_MODES:
+                    self._send_error(
+                        f"research_mode must be one of: {', '.join(RESEARCH_MODES)}"
+                    )
+                    return
+                initial_state["research_mode"] = body["research_mode"]
+            if "selection_mode" in body:
+                if body["selection_mode"] not in SELECTION_MODES:
+                    self._send_error(
+                        f"selection_mode must be one of: {', '.join(SELECTION_MODES)}"
+                    )
+                    return
+                initial_state["selection_mode"] = body["selection_mode"]
+            if "draft_search" in body:
+                if body["draft_search"] not in DRAFT_SEARCH_MODES:
+                    self._send_error(
+                        f"draft_search must be one of: {', '.join(DRAFT_SEARCH_MODES)}"
+                    )
+                    return
+                initial_state["draft_search"] = body["draft_search"]
+
+            persist_movie = None
+            if "persist" in body:
+                persist_movie, persist_error = _persist.parse_persist_option(body["persist"])
+                if persist_error:
+                    self._send_error(persist_error)
+                    return
+
+            locales = None
+            if "locales" in body:
+                locales, locales_error = parse_locales_option(body["locales"])
+                if locales_error:
+                    self._send_error(locales_error)
+                    return
+                if PIPELINE_NODE_NAMES.index(start_node) > PIPELINE_NODE_NAMES.index(LOCALE_FORK_NODE):
+                    self._send_error(
+                        f"locales need a run that starts at or before '{LOCALE_FORK_NODE}'"
+                    )
+                    return
+
+            idempotency_key = str(
+                self.headers.get("Idempotency-Key") or body.get("idempotency_key") or ""
+            )
+
+            profile = _profiling.profile_requested(self.headers.get("X-Profile-Token", ""))
+
+            def execute():
+                run_kind = "locales" if locales else "run"
+                with run_context(RunContext(priority=priority)) as run, _history.recorded_run(
+                    run, run_kind, start_node
+                ):
+                    with _profiling.profile_run(run, profile) as profiling:
+                        if locales:
+                            result = run_localized(initial_state, start_node, locales)
+                        else:
+                            result = pipeline_graph(start_node).invoke(initial_state)
+                    run.profile_summary = profiling.summary
+                    return result, run
 
-            logger.info("[Handler] ✅ Pipeline execution completed successfully")
+            (result, run), coalesced = pipeline_flights.run(
+                flight_key(initial_state, idempotency_key, start_node, locales), execute
+            )
+            if coalesced == "leader":
+                run_metrics = run.summary()
+                logger.info("[Handler] ✅ Pipeline execution completed successfully")
+                logger.info(f"[Handler] 📊 Run metrics: {json.dumps(run_metrics)}")
+            else:
+                # The run belongs to another request; its calls, tokens and
+                # timings are not this request's, so only point at it
+                run_metrics = {"coalesced": coalesced, "source_run_id": run.run_id}
+                logger.info(f"[Handler] 🔗 Served from {coalesced} run {run.run_id}")
             logger.info(f"[Handler] 📊 Pipeline result keys: {list(result.keys())}")
 
             # Extract results
@@ -1303,19 +4535,45 @@ class handler(BaseHTTPRequestHandler):
             response_data = {
                 "status": "success",
                 "message": "Research completed successfully",
-                "posts": posts,
+                "posts": shape_posts(posts, fields),
                 "topic_count": len(posts),
                 "original_topic": topic,
             }
+            if result.get("nothing_new"):
+                response_data["nothing_new"] = True
+            if persist_movie:
+                response_data.update(_persist.persist_posts([(persist_movie, posts)]))
+            if locales:
+                response_data["posts_by_locale"] = {
+                    locale: shape_posts(locale_posts, fields)
+                    for locale, locale_posts in result["posts_by_locale"].items()
+                }
+            if coalesced != "leader":
+                response_data["coalesced"] = coalesced
+            if run.profile_summary and coalesced == "leader":
+                response_data["profile"] = run.profile_summary
+            if body.get("include_metrics"):
+                response_data["metrics"] = run_metrics
 
             logger.info("[Handler] 📤 Sending success response...")
             self._send_success(response_data)
+            if run.traced and coalesced == "leader":
+                flush_traces()
             logger.info("[Handler] 🏁 === POST REQUEST COMPLETED SUCCESSFULLY ===")
             end_time = time.time()
             logger.info(
                 f"[Handler] ⏱️ Total request time: {end_time - start_time:.2f} seconds"
             )
 
+        except CircuitOpenError as e:
+            logger.error(f"[Handler] 🔌 {e}")
+            self._send_error(
+                "Upstream model service unavailable, retry later",
+                status_code=503,
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            logger.error("[Handler] 🏁 === POST REQUEST FAILED (CIRCUIT OPEN) ===")
+
         except json.JSONDecodeError as e:
             logger.error(f"[Handler] 💥 JSON decode error: {e}")
             logger.error(f"[Handler] 💥 Raw body was: {body_data}")
@@ -1331,7 +4589,155 @@ class handler(BaseHTTPRequestHandler):
             self._send_error(f"Pipeline error: {str(e)}")
             logger.error("[Handler] 🏁 === POST REQUEST FAILED (PIPELINE ERROR) ===")
 
+    def _handle_topics(self, body):
+        """Multi-movie request: {"topics": [...], "execution": "batch", "persist": [movie, ...]}"""
+        fields, fields_error = parse_fields_option(body.get("fields"))
+        topics, topics_error = parse_topics_option(body.get("topics"))
+        self._pretty = bool(body.get("pretty", False))
+        execution = body.get("execution", "batch")
+        edit_fast_path = body.get("edit_fast_path")
+
+        if fields_error or topics_error:
+            self._send_error(fields_error or topics_error)
+            return
+        if execution != "batch":
+            self._send_error(f"Unsupported execution mode: {execution}")
+            return
+        if edit_fast_path is not None and edit_fast_path not in EDIT_FAST_PATH_MODES:
+            self._send_error(f"edit_fast_path must be one of: {', '.join(EDIT_FAST_PATH_MODES)}")
+            return
+        persist_movies = {}
+        for movie in body.get("persist") or []:
+            movie, persist_error = _persist.parse_persist_option(movie)
+            if persist_error:
+                self._send_error(persist_error)
+                return
+            persist_movies[movie["title"].strip()] = movie
+
+        logger.info(f"[Handler] 📦 Submitting batch job for {len(topics)} topics")
+        with run_context(RunContext(priority="batch")) as run, _history.recorded_run(run, "batch"):
+            job = _batch.submit_batch_job(topics, persist_movies, edit_fast_path)
+        logger.info(f"[Handler] 📊 Run metrics: {json.dumps(run.summary())}")
+        self._send_batch_job(job, fields, body, run)
+        logger.info("[Handler] 🏁 === POST REQUEST COMPLETED SUCCESSFULLY (BATCH SUBMIT) ===")
+
+    def _handle_batch_job(self, body):
+        """Batch job poll: {"batch_job": id} -> job status, or its results once completed"""
+        job_id = body.get("batch_job")
+        fields, fields_error = parse_fields_option(body.get("fields"))
+        self._pretty = bool(body.get("pretty", False))
+        if fields_error:
+            self._send_error(fields_error)
+            return
+        if not isinstance(job_id, str) or not re.fullmatch(r"[0-9a-f]{16}", job_id):
+            self._send_error("batch_job must be a job id returned by a batch submission")
+            return
+
+        with run_context(RunContext(priority="batch")) as run, _history.recorded_run(
+            run, "batch_advance"
+        ):
+            job = _batch.advance_batch_job(job_id)
+        if job is None:
+            self._send_error(f"Unknown batch job: {job_id}", status_code=404)
+            return
+        self._send_batch_job(job, fields, body, run)
+        logger.info("[Handler] 🏁 === POST REQUEST COMPLETED SUCCESSFULLY (BATCH POLL) ===")
+
+    def _send_batch_job(self, job, fields, body, run):
+        if job["status"] == "failed":
+            self._send_error(f"Batch job {job['id']} failed: {job.get('error', '')}", status_code=502)
+            return
+
+        summary = _batch.batch_job_summary(job)
+        for entry in summary.get("results", []):
+            entry["posts"] = shape_posts(entry["posts"], fields)
+        response_data = {
+            "status": "success" if job["status"] == "completed" else "pending",
+            "message": "Batch research completed successfully"
+            if job["status"] == "completed"
+            else f"Batch stage '{job['stage']}' in progress; poll with batch_job",
+            **summary,
+        }
+        if body.get("include_metrics"):
+            response_data["metrics"] = run.summary()
+        self._send_success(response_data)
+        if run.traced:
+            flush_traces()
+
+    def _handle_prefetch(self, body):
+        """Research-only request: {"prefetch": [...]} -> per-topic research state"""
+        topics, topics_error = parse_topics_option(body.get("prefetch"))
+        self._pretty = bool(body.get("pretty", False))
+        if topics_error:
+            self._send_error(topics_error)
+            return
+
+        logger.info(f"[Handler] 🔥 Prefetching research for {len(topics)} topics")
+        with run_context(RunContext(priority="prefetch")) as run, _history.recorded_run(run, "prefetch"):
+            prefetched = prefetch_research(topics)
+
+        response_data = {
+            "status": "success",
+            "message": "Research prefetched",
+            "research": prefetched,
+            "missing": [t for t in dict.fromkeys(topics) if t not in prefetched],
+            "topic_count": len(prefetched),
+        }
+        if body.get("include_metrics"):
+            response_data["metrics"] = run.summary()
+        self._send_success(response_data)
+        if run.traced:
+            flush_traces()
+        logger.info("[Handler] 🏁 === POST REQUEST COMPLETED SUCCESSFULLY (PREFETCH) ===")
+
     def do_GET(self):
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+        if "metrics" in query:
+            expected_key = os.getenv("MY_DAILY_API_KEY", "")
+            if not expected_key or self.headers.get("X-API-KEY", "") != expected_key:
+                self._send_error("Invalid API key", status_code=403)
+                return
+            logger.info("[Handler] 📊 Serving breaker and scheduler metrics")
+            self._pretty = True
+            self._send_success(
+                {
+                    "status": "success",
+                    "breakers": circuit_breakers.snapshot(),
+                    "scheduler": call_scheduler.snapshot(),
+                }
+            )
+            return
+        if "batch_tick" in query:
+            # Scheduler entry point: API key, or the Vercel cron secret
+            api_key = os.getenv("MY_DAILY_API_KEY", "")
+            cron_secret = os.getenv("CRON_SECRET", "")
+            authorization = self.headers.get("Authorization", "")
+            if not (
+                (api_key and hmac.compare_digest(self.headers.get("X-API-KEY", ""), api_key))
+                or (cron_secret and hmac.compare_digest(authorization, f"Bearer {cron_secret}"))
+            ):
+                self._send_error("Invalid API key", status_code=403)
+                return
+            logger.info("[Handler] ⏱️ Advancing batch jobs")
+            with run_context(RunContext(priority="batch")) as run, _history.recorded_run(
+                run, "batch_advance"
+            ):
+                jobs = _batch.advance_batch_jobs()
+            self._send_success(
+                {
+                    "status": "success",
+                    "jobs": [
+                        {
+                            key: value
+                            for key, value in _batch.batch_job_summary(job).items()
+                            if key != "results"
+                        }
+                        for job in jobs
+                    ],
+                }
+            )
+            return
+
         logger.info("[Handler] 🚫 GET request received (not supported)")
         self._send_error(
             "GET method not allowed, use POST with JSON body", status_code=405
@@ -1342,39 +4748,53 @@ class handler(BaseHTTPRequestHandler):
         """Send a successful JSON response"""
         logger.debug("[Handler] ✅ Preparing success response...")
 
+        started = time.perf_counter()
+        body, content_encoding = encode_json_response(
+            data,
+            accept_encoding=self.headers.get("Accept-Encoding", ""),
+            pretty=getattr(self, "_pretty", False),
+        )
+        encode_ms = (time.perf_counter() - started) * 1000
+
         self.send_response(200)
         self._cors()
         self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Vary", "Accept-Encoding")
+        if content_encoding:
+            self.send_header("Content-Encoding", content_encoding)
         self.end_headers()
 
-        response_json = json.dumps(data, indent=2)
         logger.info(
-            f"[Handler] 📤 Sending success response ({len(response_json)} chars)"
+            f"[Handler] 📤 Sending success response ({len(body)} bytes, "
+            f"encoding: {content_encoding or 'identity'}, encoded in {encode_ms:.1f} ms)"
         )
-        logger.debug(f"[Handler] 📄 Response preview: {response_json[:300]}...")
 
-        self.wfile.write(response_json.encode("utf-8"))
+        self.wfile.write(body)
         logger.info("[Handler] ✅ Success response sent successfully")
 
-    def _send_error(self, message, status_code=400):
+    def _send_error(self, message, status_code=400, headers=None):
         """Send an error JSON response"""
         logger.debug(f"[Handler] ❌ Preparing error response: {message}")
 
-        self.send_response(status_code)
-        self._cors()
-        self.send_header("Content-Type", "application/json")
-        self.end_headers()
-
         error_data = {
             "status": "error",
             "message": message,
             "timestamp": str(logger.name),  # Placeholder for timestamp
         }
+        body, _ = encode_json_response(error_data)
+
+        self.send_response(status_code)
+        self._cors()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
 
-        response_json = json.dumps(error_data, indent=2)
         logger.error(f"[Handler] 📤 Sending error response ({status_code}): {message}")
 
-        self.wfile.write(response_json.encode("utf-8"))
+        self.wfile.write(body)
         logger.error(f"[Handler] ❌ Error response sent: {message}")
 
 
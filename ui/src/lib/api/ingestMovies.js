@@ -18,7 +18,39 @@ function slugify(text) {
     .replace(/-+$/, "");
 }
 
-async function createAgentPostPerMovie() {
+// Research every pending movie up front so the per-movie agent runs can
+// start at topic selection. Returns { [title]: researchState }; movies that
+// are missing (or a failed prefetch) fall back to a full agent run.
+async function prefetchResearch(titles) {
+  if (!titles.length) {
+    return {};
+  }
+
+  try {
+    const response = await axios.post(
+      buildApiUrl("/api/agents/research"),
+      { prefetch: titles },
+      {
+        headers: { "x-api-key": process?.env?.MY_DAILY_API_KEY || "" },
+      }
+    );
+
+    if (response.data.status !== "success") {
+      console.error("Error prefetching research:", response.data);
+      return {};
+    }
+
+    console.log(
+      `Prefetched research for ${response.data.topic_count}/${titles.length} movies`
+    );
+    return response.data.research || {};
+  } catch (error) {
+    console.error("Error prefetching research:", error);
+    return {};
+  }
+}
+
+async function createAgentPostPerMovie(prefetched = {}) {
   const { data: movies, error } = await supabase
     .from("posts")
     .select("*")
@@ -33,12 +65,29 @@ async function createAgentPostPerMovie() {
   try {
     for (const movie of movies) {
       try {
-        // Create an agent post for each movie
+        // Create an agent post for each movie, skipping research when it
+        // was prefetched. The agent saves the posts itself when its
+        // persistence sink is configured.
+        const research = prefetched[movie.title];
+        const persist = {
+          id: movie.id,
+          title: movie.title,
+          tags: movie.tags || [],
+          images: movie.images || [],
+        };
         const agentResponse = await axios.post(
           buildApiUrl("/api/agents/research"),
-          {
-            topic: movie.title,
-          },
+          research
+            ? {
+                topic: movie.title,
+                start_node: "select_topics",
+                state: { topic: movie.title, ...research },
+                persist,
+              }
+            : {
+                topic: movie.title,
+                persist,
+              },
           {
             headers: { "x-api-key": process?.env?.MY_DAILY_API_KEY || "" },
           }
@@ -57,24 +106,46 @@ async function createAgentPostPerMovie() {
           continue;
         }
 
-        // Process each post from the agent response
+        if (agentResponse.data.persisted) {
+          console.log(
+            `Agent saved ${agentResponse.data.persisted.posts} posts for movie ${movie.title}`
+          );
+          if (agentResponse.data.persisted.dropped) {
+            console.warn(
+              `Agent dropped ${agentResponse.data.persisted.dropped} posts with repeated slugs for movie ${movie.title}`
+            );
+          }
+          continue;
+        }
+        if (agentResponse.data.persist_error) {
+          console.error(
+            `Agent could not save posts for movie ${movie.title}, saving here:`,
+            agentResponse.data.persist_error
+          );
+        }
+
+        // Process each post from the agent response. Upsert on slug: the
+        // agent may already have saved some of these posts before failing.
         for (const post of agentResponse.data.posts) {
-          const { error: upsertError } = await supabase.from("posts").upsert({
-            title: post.title,
-            slug: slugify(post.title),
-            content: post.final,
-            draft: post.draft,
-            sources: post.sources,
-            tags: [...(movie.tags || []), "generated"],
-            published_at: new Date().toISOString(),
-            images: movie.images,
-            parent_id: movie.id,
-            is_movie: false,
-            processed: true,
-            topic_ref: movie.title,
-            seo_title: post.seo_title,
-            seo_desc: post.seo_description,
-          });
+          const { error: upsertError } = await supabase.from("posts").upsert(
+            {
+              title: post.title,
+              slug: slugify(post.title),
+              content: post.final,
+              draft: post.draft,
+              sources: post.sources,
+              tags: [...(movie.tags || []), "generated"],
+              published_at: new Date().toISOString(),
+              images: movie.images,
+              parent_id: movie.id,
+              is_movie: false,
+              processed: true,
+              topic_ref: movie.title,
+              seo_title: post.seo_title,
+              seo_desc: post.seo_description,
+            },
+            { onConflict: "slug" }
+          );
 
           if (upsertError) {
             console.error(`Error saving post for ${post.topic}:`, upsertError);
@@ -209,6 +280,9 @@ export async function handleIngestMovies(req, res) {
       return res.status(404).json({ error: "No movies found to save." });
     }
 
+    // Research runs while the summaries below are generated
+    const prefetchPromise = prefetchResearch(newMovies.map((m) => m.title));
+
     let saved = 0;
     let failed = 0;
 
@@ -323,7 +397,8 @@ export async function handleIngestMovies(req, res) {
     try {
       console.log("Creating agent posts for new movies...");
       // Call the function to create agent posts for each movie
-      await createAgentPostPerMovie();
+      const prefetched = await prefetchPromise;
+      await createAgentPostPerMovie(prefetched);
     } catch (err) {
       console.error("Error creating agent posts:", err);
       await sendEmailNotification(
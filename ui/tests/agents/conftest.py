@@ -0,0 +1,38 @@
+"""
+Tests for the research agent (api/agents). From ui/:
+
+    pip install -r api/agents/requirements.txt pytest
+    python -m pytest tests/agents
+"""
+
+import os
+import sys
+
+# Keep the module's optional stores and tracing out of test runs
+os.environ.setdefault("AGENT_TRACING", "off")
+os.environ.setdefault("AGENT_RESEARCH_CACHE", "false")
+os.environ.setdefault("AGENT_RUN_HISTORY_DB", "")
+os.environ.setdefault("AGENT_WATERMARK_DB", "")
+os.environ.setdefault("AGENT_PERSIST_SINK", "off")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "api", "agents"))
+
+import pytest  # noqa: E402
+
+import _fakes  # noqa: E402
+import research  # noqa: E402
+
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+    """Route LLM calls to a zero-latency FakeOpenAI for the test"""
+    monkeypatch.setattr(research, "openai_client", research.openai_client)
+    monkeypatch.setattr(research, "openai_raw_client", research.openai_raw_client)
+    monkeypatch.setattr(research, "VALIDATE_SOURCES", research.VALIDATE_SOURCES)
+    return _fakes.enable_fake_backend(latency_scale=0)
+
+
+@pytest.fixture
+def run():
+    with research.run_context() as run:
+        yield run
@@ -0,0 +1,193 @@
+import pytest
+from openai import OpenAI
+
+import _batch
+import _fakes
+import _persist
+
+
+@pytest.fixture
+def batch_api(fake_backend):
+    """(stub, runner, store) against a local Batch API stand-in"""
+    server, stub, base_url = _fakes.start_batch_stub(latency_scale=0)
+    runner = _batch.BatchRunner(OpenAI(api_key="stub", base_url=base_url), timeout=600)
+    yield stub, runner, _batch.BatchJobStore(runner.client)
+    stub.running.set()
+    server.shutdown()
+
+
+def advance_until_done(job, runner, store, limit=50):
+    for _ in range(limit):
+        if job["status"] != "running":
+            return job
+        job = _batch.advance_batch_job(job["id"], runner, store)
+    raise AssertionError(f"job still {job['status']} at stage {job['stage']}")
+
+
+def test_submit_returns_without_waiting_for_the_batch(batch_api, run):
+    stub, runner, store = batch_api
+    stub.running.clear()  # batches stay in progress
+
+    job = _batch.submit_batch_job(["Dune", "Alien"], runner=runner, store=store)
+
+    assert job["status"] == "running"
+    assert job["stage"] == "draft"
+    assert len(job["batch_ids"]) == 1
+    assert [job_id for _, job_id in store.list()] == [job["id"]]
+
+
+def test_advance_leaves_a_pending_stage_alone(batch_api, run):
+    stub, runner, store = batch_api
+    stub.running.clear()
+    job = _batch.submit_batch_job(["Dune"], runner=runner, store=store)
+
+    polled = _batch.advance_batch_job(job["id"], runner, store)
+
+    assert polled["stage"] == "draft"
+    assert polled["batch_statuses"] == {job["batch_ids"][0]: "in_progress"}
+    assert store.find(job["id"]) is not None
+
+
+def test_advance_walks_every_stage_and_keeps_the_results(batch_api, run):
+    _, runner, store = batch_api
+    job = _batch.submit_batch_job(["Dune", "Alien"], runner=runner, store=store)
+
+    job = advance_until_done(job, runner, store)
+
+    assert job["status"] == "completed"
+    assert [entry["original_topic"] for entry in job["results"]] == ["Dune", "Alien"]
+    for entry in job["results"]:
+        assert entry["topic_count"] == 3
+        assert all(post.get("seo_title") and post.get("final") for post in entry["posts"])
+    # Polling a finished job returns it again, from its single stored file
+    assert _batch.advance_batch_job(job["id"], runner, store)["results"] == job["results"]
+    assert len(store.list()) == 1
+    assert run.counters["batch.seo_generator.requests"] == 6
+
+
+def test_completion_persists_the_requested_movies(batch_api, run, monkeypatch):
+    _, runner, store = batch_api
+    persisted = []
+    monkeypatch.setattr(
+        _persist, "persist_posts", lambda entries: persisted.extend(entries) or {"persisted": {"posts": 3}}
+    )
+    movie = {"id": 7, "title": "Dune", "tags": [], "images": []}
+
+    job = _batch.submit_batch_job(["Dune", "Alien"], {"Dune": movie}, runner=runner, store=store)
+    job = advance_until_done(job, runner, store)
+
+    assert [(m, len(posts)) for m, posts in persisted] == [(movie, 3)]
+    assert job["persisted"] == {"posts": 3}
+
+
+def test_unknown_job_is_none(batch_api):
+    _, runner, store = batch_api
+    assert _batch.advance_batch_job("0" * 16, runner, store) is None
+
+
+def test_only_one_advancer_claims_a_job(batch_api, run):
+    _, runner, store = batch_api
+    job = _batch.submit_batch_job(["Dune"], runner=runner, store=store)
+    file_id = store.find(job["id"])
+
+    assert store.claim(file_id) is True
+    assert store.claim(file_id) is False
+
+
+def test_stage_past_its_timeout_fails_the_job(batch_api, run):
+    stub, runner, store = batch_api
+    stub.running.clear()
+    job = _batch.submit_batch_job(["Dune"], runner=runner, store=store)
+    runner.timeout = 0
+
+    job = _batch.advance_batch_job(job["id"], runner, store)
+
+    assert job["status"] == "failed"
+    assert "draft" in job["error"]
+    assert all(batch["status"] == "cancelled" for batch in stub.batches.values())
+
+
+def test_tick_advances_jobs_and_drops_expired_results(batch_api, run, monkeypatch):
+    _, runner, store = batch_api
+    job = _batch.submit_batch_job(["Dune"], runner=runner, store=store)
+    job = advance_until_done(job, runner, store)
+
+    assert [j["id"] for j in _batch.advance_batch_jobs(runner, store)] == [job["id"]]
+    monkeypatch.setattr(_batch, "BATCH_RESULT_TTL_S", -1)
+    assert _batch.advance_batch_jobs(runner, store) == []
+    assert store.list() == []
+
+
+def _edit_batches(stub):
+    return [batch for batch in stub.batches.values() if batch["endpoint"] == "/v1/chat/completions"]
+
+
+def test_failed_save_is_retried(batch_api, run, monkeypatch):
+    stub, runner, store = batch_api
+    monkeypatch.setattr(_batch, "BATCH_SAVE_BACKOFF_S", 0)
+    job = _batch.submit_batch_job(["Dune"], runner=runner, store=store)
+    save, failures = store.save, [ConnectionError("upload failed")]
+
+    def flaky_save(job):
+        if failures:
+            raise failures.pop()
+        return save(job)
+
+    monkeypatch.setattr(store, "save", flaky_save)
+    job = _batch.advance_batch_job(job["id"], runner, store)
+
+    assert job["stage"] == "edit"
+    assert store.find(job["id"]) is not None
+
+
+def test_unsaved_stage_goes_back_and_resumes_without_resubmitting(batch_api, run, monkeypatch):
+    stub, runner, store = batch_api
+    monkeypatch.setattr(_batch, "BATCH_SAVE_BACKOFF_S", 0)
+    job = _batch.submit_batch_job(["Dune"], runner=runner, store=store)
+    save = store.save
+
+    def save_only_draft(job):
+        if job["stage"] != "draft":
+            raise ConnectionError("upload failed")
+        return save(job)
+
+    monkeypatch.setattr(store, "save", save_only_draft)
+    with pytest.raises(ConnectionError):
+        _batch.advance_batch_job(job["id"], runner, store)
+    monkeypatch.setattr(store, "save", save)
+
+    stored = store.load(store.find(job["id"]))
+    assert stored["stage"] == "draft"
+    assert stored["submitted"]["edit"] == [batch["id"] for batch in _edit_batches(stub)]
+
+    job = _batch.advance_batch_job(job["id"], runner, store)
+
+    assert job["stage"] == "edit"
+    assert job["batch_ids"] == stored["submitted"]["edit"]
+    assert "submitted" not in job
+    assert len(_edit_batches(stub)) == 1
+
+
+def test_partial_submit_resumes_with_the_missing_chunks(batch_api, run, monkeypatch):
+    stub, runner, store = batch_api
+    monkeypatch.setattr(_batch, "BATCH_MAX_REQUESTS", 1)
+    job = _batch.submit_batch_job(["Dune"], runner=runner, store=store)
+    submit, calls = runner._submit, []
+
+    def fail_second_chunk(*args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise ConnectionError("create failed")
+        return submit(*args)
+
+    monkeypatch.setattr(runner, "_submit", fail_second_chunk)
+    with pytest.raises(ConnectionError):
+        _batch.advance_batch_job(job["id"], runner, store)
+    assert len(_edit_batches(stub)) == 1
+
+    job = _batch.advance_batch_job(job["id"], runner, store)
+
+    assert job["stage"] == "edit"
+    assert len(job["batch_ids"]) == 3
+    assert len(_edit_batches(stub)) == 3
+    assert job["batch_ids"][0] == next(iter(_edit_batches(stub)))["id"]
@@ -0,0 +1,116 @@
+import threading
+import time
+
+import research
+from research import CallScheduler
+
+
+def _wait_for(predicate, timeout_s=2.0):
+    deadline = time.perf_counter() + timeout_s  # monotonic may be frozen by a test
+    while not predicate():
+        assert time.perf_counter() < deadline, "timed out waiting for the scheduler"
+        time.sleep(0.001)
+
+
+def _queue(scheduler, priorities, order, on_enqueue=None):
+    """Start one waiter per priority, in order, each queued before the next starts"""
+    threads = []
+    for i, priority in enumerate(priorities, 1):
+
+        def wait(priority=priority):
+            scheduler.acquire(priority)
+            order.append(priority)
+            scheduler.release()
+
+        thread = threading.Thread(target=wait, daemon=True)
+        thread.start()
+        _wait_for(lambda i=i: len(scheduler._waiting) == i)
+        if on_enqueue:
+            on_enqueue()
+        threads.append(thread)
+    return threads
+
+
+def _drain(scheduler, threads):
+    scheduler.release()
+    for thread in threads:
+        thread.join(timeout=2)
+    assert scheduler.snapshot()["active"] == 0
+
+
+def test_free_slots_are_granted_without_waiting():
+    scheduler = CallScheduler(slots=2)
+
+    assert scheduler.acquire("prefetch") == 0.0
+    assert scheduler.acquire("interactive") == 0.0
+    assert scheduler.snapshot()["active"] == 2
+
+    scheduler.release()
+    scheduler.release()
+    assert scheduler.snapshot()["active"] == 0
+
+
+def test_waiters_are_served_by_priority_class():
+    scheduler = CallScheduler(slots=1, aging_s=3600)
+    scheduler.acquire()
+    order = []
+
+    threads = _queue(scheduler, ["prefetch", "batch", "prefetch", "interactive", "batch"], order)
+    assert scheduler.snapshot()["waiting"] == {"interactive": 1, "batch": 2, "prefetch": 2}
+    _drain(scheduler, threads)
+
+    assert order == ["interactive", "batch", "batch", "prefetch", "prefetch"]
+
+
+def test_without_prioritization_waiters_are_served_in_arrival_order():
+    scheduler = CallScheduler(slots=1, prioritize=False)
+    scheduler.acquire()
+    order = []
+
+    threads = _queue(scheduler, ["prefetch", "batch", "interactive"], order)
+    _drain(scheduler, threads)
+
+    assert order == ["prefetch", "batch", "interactive"]
+
+
+def test_unknown_priority_is_treated_as_interactive():
+    scheduler = CallScheduler(slots=1, aging_s=3600)
+    scheduler.acquire()
+    order = []
+
+    threads = _queue(scheduler, ["batch", "unknown"], order)
+    _drain(scheduler, threads)
+
+    assert order == ["unknown", "batch"]
+
+
+def test_aged_waiters_overtake_fresh_higher_classes(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(research.time, "monotonic", lambda: now[0])
+    scheduler = CallScheduler(slots=1, aging_s=10)
+    scheduler.acquire()
+    order = []
+
+    def advance():
+        now[0] += 25  # the prefetch waiter has aged past two classes
+
+    threads = _queue(scheduler, ["prefetch", "interactive"], order, on_enqueue=advance)
+    _drain(scheduler, threads)
+
+    assert order == ["prefetch", "interactive"]
+
+
+def test_acquire_reports_the_time_spent_waiting():
+    scheduler = CallScheduler(slots=1)
+    scheduler.acquire()
+    waited = []
+
+    thread = threading.Thread(target=lambda: waited.append(scheduler.acquire("batch")), daemon=True)
+    thread.start()
+    _wait_for(lambda: scheduler.snapshot()["waiting"]["batch"] == 1)
+    time.sleep(0.05)
+    scheduler.release()
+    thread.join(timeout=2)
+
+    assert waited[0] >= 0.05
+    scheduler.release()
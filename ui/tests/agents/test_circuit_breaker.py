@@ -0,0 +1,199 @@
+from types import SimpleNamespace
+
+import pytest
+
+import research
+from research import CircuitBreaker, CircuitBreakers, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(research.time, "monotonic", clock)
+    return clock
+
+
+def _breaker(**settings):
+    defaults = dict(window_s=60, min_calls=4, failure_rate=0.5, open_s=30, consecutive_failures=3)
+    return CircuitBreaker("responses:test", **{**defaults, **settings})
+
+
+def test_consecutive_failures_open_the_breaker(clock):
+    breaker = _breaker()
+
+    breaker.record(failed=True)
+    breaker.record(failed=True)
+    assert breaker.state == "closed"
+    breaker.record(failed=True)
+
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+
+
+def test_a_success_resets_the_failure_streak(clock):
+    breaker = _breaker(min_calls=100)
+
+    for failed in (True, True, False, True, True):
+        breaker.record(failed=failed)
+
+    assert breaker.state == "closed"
+    assert breaker.snapshot()["failure_streak"] == 2
+
+
+def test_failure_rate_over_the_window_opens_the_breaker(clock):
+    breaker = _breaker(consecutive_failures=0)
+
+    for failed in (True, False, True, False):
+        breaker.record(failed=failed)
+
+    assert breaker.state == "open"
+
+
+def test_failures_older_than_the_window_are_forgotten(clock):
+    breaker = _breaker(consecutive_failures=0)
+    breaker.record(failed=True)
+    breaker.record(failed=True)
+    clock.now += 61
+
+    breaker.record(failed=False)
+    breaker.record(failed=False)
+
+    assert breaker.state == "closed"
+    assert breaker.snapshot()["window_calls"] == 2
+
+
+def test_open_breaker_lets_one_probe_through_after_open_s(clock):
+    breaker = _breaker(consecutive_failures=1)
+    breaker.record(failed=True)
+    clock.now += 10
+    assert breaker.retry_after() == 20
+    assert not breaker.allow()
+
+    clock.now += 20
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()  # the probe is already out
+
+
+def test_successful_probe_closes_the_breaker(clock):
+    breaker = _breaker(consecutive_failures=1)
+    breaker.record(failed=True)
+    clock.now += 30
+    breaker.allow()
+
+    breaker.record(failed=False)
+
+    assert breaker.state == "closed"
+    assert breaker.snapshot()["window_calls"] == 0
+    assert breaker.transitions == {"closed->open": 1, "open->half_open": 1, "half_open->closed": 1}
+
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = _breaker(consecutive_failures=1)
+    breaker.record(failed=True)
+    clock.now += 30
+    breaker.allow()
+
+    breaker.record(failed=True)
+
+    assert breaker.state == "open"
+    assert breaker.retry_after() == 30
+
+
+def test_outcomes_recorded_while_open_are_ignored(clock):
+    breaker = _breaker(consecutive_failures=1)
+    breaker.record(failed=True)
+
+    breaker.record(failed=False)
+
+    assert breaker.state == "open"
+
+
+@pytest.mark.parametrize(
+    "exc, failed",
+    [
+        (TimeoutError("read timeout"), True),
+        (SimpleNamespace(status_code=429), True),
+        (SimpleNamespace(status_code=503), True),
+        (SimpleNamespace(status_code=400), False),
+    ],
+)
+def test_breaker_failure_counts_only_service_errors(exc, failed):
+    assert research.breaker_failure(exc) is failed
+
+
+class HangingClient:
+    """OpenAI stand-in whose every call times out immediately"""
+
+    def __init__(self):
+        self.calls = 0
+        self.responses = SimpleNamespace(create=self._create)
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        raise TimeoutError("simulated read timeout")
+
+
+@pytest.fixture
+def hanging(monkeypatch, clock):
+    client = HangingClient()
+    monkeypatch.setattr(research, "openai_client", client)
+    monkeypatch.setattr(research, "openai_raw_client", client)
+    monkeypatch.setattr(research, "BREAKER_ENABLED", True)
+    monkeypatch.setattr(research, "LLM_CALL_RETRIES", 2)
+    monkeypatch.setattr(research, "LLM_RETRY_BACKOFF_S", 0)
+    monkeypatch.setattr(research.model_router, "candidates", lambda node: ["test-model"])
+    monkeypatch.setattr(
+        research, "circuit_breakers", CircuitBreakers(window_s=60, consecutive_failures=3, open_s=30)
+    )
+    return client
+
+
+def test_llm_call_retries_open_the_breaker_within_one_call(hanging, run):
+    with pytest.raises(TimeoutError):
+        research.llm_call("research", "responses", input="prompt")
+
+    assert hanging.calls == 3
+    assert research.circuit_breakers.get("responses", "test-model").state == "open"
+    assert run.counters["llm.retries"] == 2
+    assert [call["retry"] for call in run.calls] == [0, 1, 2]
+
+
+def test_llm_call_fails_fast_once_the_breaker_is_open(hanging, run):
+    with pytest.raises(TimeoutError):
+        research.llm_call("research", "responses", input="prompt")
+
+    with pytest.raises(CircuitOpenError) as excinfo:
+        research.llm_call("research", "responses", input="prompt")
+
+    assert hanging.calls == 3
+    assert excinfo.value.retry_after == 30
+
+
+def test_llm_call_does_not_retry_request_errors(hanging, run, monkeypatch):
+    def bad_request(**kwargs):
+        hanging.calls += 1
+        raise type("BadRequestError", (Exception,), {"status_code": 400})("bad request")
+
+    monkeypatch.setattr(hanging.responses, "create", bad_request)
+
+    with pytest.raises(Exception, match="bad request"):
+        research.llm_call("research", "responses", input="prompt")
+
+    assert hanging.calls == 1
+    assert research.circuit_breakers.get("responses", "test-model").state == "closed"
+
+
+def test_openai_client_leaves_retries_to_llm_call():
+    client = research.build_openai_client("test-key")
+
+    assert client.max_retries == research.OPENAI_MAX_RETRIES == 0
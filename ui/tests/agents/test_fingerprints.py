@@ -0,0 +1,44 @@
+import re
+
+import _history
+import research
+
+
+def _fingerprints():
+    _history.config_fingerprints.cache_clear()
+    try:
+        return _history.config_fingerprints()
+    finally:
+        _history.config_fingerprints.cache_clear()
+
+
+def test_every_template_constant_is_fingerprinted():
+    templates = {
+        name
+        for name, value in vars(research).items()
+        if isinstance(value, str) and re.search(r"_(PROMPT|INSTRUCTION|SYSTEM|ITEM|NOTES)(_[A-Z]+)?$", name)
+    }
+
+    assert templates <= set(research.PROMPT_TEMPLATES)
+    assert all(research.PROMPT_TEMPLATES[name] is getattr(research, name) for name in templates)
+
+
+def test_prompt_hash_follows_templates(monkeypatch):
+    model_hash, prompt_hash = _fingerprints()
+
+    monkeypatch.setitem(research.PROMPT_TEMPLATES, "SEO_SYSTEM", "You are a terse SEO copywriter.")
+    changed_model_hash, changed_prompt_hash = _fingerprints()
+
+    assert changed_model_hash == model_hash
+    assert changed_prompt_hash != prompt_hash
+
+
+def test_model_hash_follows_routes(monkeypatch):
+    model_hash, prompt_hash = _fingerprints()
+
+    routes = {**research.model_router.routes, "seo_generator": {"models": ["other"], "strategy": "ordered"}}
+    monkeypatch.setattr(research.model_router, "routes", routes)
+    changed_model_hash, changed_prompt_hash = _fingerprints()
+
+    assert changed_model_hash != model_hash
+    assert changed_prompt_hash == prompt_hash
@@ -0,0 +1,31 @@
+import pytest
+
+from research import LOCALE_NAMES, MAX_LOCALES, parse_locales_option
+
+
+def test_locales_are_stripped_and_deduplicated_in_order():
+    assert parse_locales_option([" es", "en", "es ", ""]) == (["es", "en"], None)
+
+
+@pytest.mark.parametrize(
+    "locales, message",
+    [
+        ("es", "locales must be a list of locale codes"),
+        (["es", 1], "locales must be a list of locale codes"),
+        ([], "No locales provided"),
+        (["  "], "No locales provided"),
+        (["es", "xx", "yy"], "Unsupported locales: xx, yy"),
+    ],
+)
+def test_invalid_locales_are_rejected(locales, message):
+    parsed, error = parse_locales_option(locales)
+
+    assert parsed is None
+    assert error.startswith(message)
+
+
+def test_too_many_locales_are_rejected():
+    locales = list(LOCALE_NAMES)[: MAX_LOCALES + 1]
+    assert len(locales) > MAX_LOCALES
+
+    assert parse_locales_option(locales) == (None, f"Too many locales, maximum is {MAX_LOCALES}")
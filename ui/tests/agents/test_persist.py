@@ -0,0 +1,156 @@
+import pytest
+
+import _fakes
+import _persist
+from _persist import PersistError, PostgrestSink, post_rows, slugify
+
+MOVIES = [
+    {"id": 1, "title": "Dune", "tags": ["sci-fi"], "images": ["/dune.jpg"]},
+    {"id": 2, "title": "Alien", "tags": [], "images": []},
+]
+
+
+def _posts(movie, count=3):
+    return [
+        {
+            "title": f"{movie['title']}: Story {n}",
+            "final": f"final {n}",
+            "draft": f"draft {n}",
+            "sources": [f"https://example.com/{movie['id']}/{n}"],
+            "seo_title": f"Story {n}",
+            "seo_description": "Description",
+        }
+        for n in range(count)
+    ]
+
+
+@pytest.fixture
+def postgrest():
+    server, stub, base_url = _fakes.start_postgrest_stub()
+    stub.seed([{"id": m["id"], "title": m["title"], "is_movie": True, "processed": False} for m in MOVIES])
+    yield stub, base_url
+    server.shutdown()
+
+
+def _generated(stub):
+    return [row for row in stub.rows.values() if row.get("parent_id") is not None]
+
+
+def _processed(stub):
+    return {row["id"] for row in stub.rows.values() if row.get("is_movie") and row.get("processed")}
+
+
+def test_slugify_matches_ingest_movies_js():
+    assert slugify("  Dune: Part Two -- Reviews!  ") == "dune-part-two-reviews"
+    assert slugify("Amélie's Café") == "amlies-caf"
+
+
+def test_post_rows_use_plain_slugs_and_skip_untitled_posts():
+    posts = [{"title": "Same Title"}, {"title": "Same  title"}, {"final": "no title"}]
+
+    rows = post_rows(MOVIES[0], posts, published_at="2026-01-01T00:00:00.000Z")
+
+    assert [row["slug"] for row in rows] == ["same-title", "same-title"]
+    assert rows[0]["tags"] == ["sci-fi", "generated"]
+    assert rows[0]["parent_id"] == 1
+
+
+def test_persist_upserts_posts_in_batches_and_marks_movies_processed(postgrest):
+    stub, base_url = postgrest
+    sink = PostgrestSink(base_url, batch_size=4, backoff_s=0)
+
+    result = sink.persist([(movie, _posts(movie)) for movie in MOVIES])
+
+    assert result == {"posts": 6, "dropped": 0, "movies": [1, 2], "batches": 2}
+    assert sorted(row["slug"] for row in _generated(stub)) == sorted(
+        slugify(post["title"]) for movie in MOVIES for post in _posts(movie)
+    )
+    assert _processed(stub) == {1, 2}
+    assert stub.requests == 3  # two upserts, one PATCH with the last batch
+
+
+def test_persisting_twice_adds_no_duplicates(postgrest):
+    stub, base_url = postgrest
+    sink = PostgrestSink(base_url, backoff_s=0)
+
+    sink.persist([(MOVIES[0], _posts(MOVIES[0]))])
+    sink.persist([(MOVIES[0], _posts(MOVIES[0]))])
+
+    assert len(_generated(stub)) == 3
+
+
+def test_repeated_slugs_collapse_to_one_post(postgrest):
+    stub, base_url = postgrest
+    posts = [{"title": "Same Title", "final": "first"}, {"title": "same title", "final": "second"}]
+
+    result = PostgrestSink(base_url, backoff_s=0).persist([(MOVIES[0], posts)])
+
+    assert result["posts"] == 1
+    assert result["dropped"] == 1
+    assert [row["content"] for row in _generated(stub)] == ["second"]
+
+
+def test_slug_collisions_across_movies_are_counted(postgrest, run):
+    stub, base_url = postgrest
+    fallback = [{"title": "Breaking News: Article 1", "final": "news"}]
+
+    result = PostgrestSink(base_url, backoff_s=0).persist([(movie, fallback) for movie in MOVIES])
+
+    assert result["dropped"] == 1
+    assert run.counters["persist.slug_collisions"] == 1
+    assert [row["parent_id"] for row in _generated(stub)] == [2]
+
+
+def test_failed_patch_retries_the_whole_batch_without_duplicate_posts(postgrest):
+    stub, base_url = postgrest
+    stub.fail_patches = 2
+    sink = PostgrestSink(base_url, retries=3, backoff_s=0)
+
+    result = sink.persist([(movie, _posts(movie)) for movie in MOVIES])
+
+    assert result["posts"] == 6
+    assert stub.requests == 6  # upsert + failing PATCH twice, then upsert + PATCH
+    assert len(_generated(stub)) == 6
+    assert len({row["slug"] for row in _generated(stub)}) == 6
+    assert _processed(stub) == {1, 2}
+
+
+def test_exhausted_patch_retries_leave_posts_a_rerun_can_overwrite(postgrest):
+    stub, base_url = postgrest
+    stub.fail_patches = 2
+    entries = [(MOVIES[0], _posts(MOVIES[0]))]
+
+    with pytest.raises(PersistError):
+        PostgrestSink(base_url, retries=1, backoff_s=0).persist(entries)
+    assert len(_generated(stub)) == 3
+    assert _processed(stub) == set()
+
+    PostgrestSink(base_url, retries=1, backoff_s=0).persist(entries)
+
+    assert len(_generated(stub)) == 3
+    assert _processed(stub) == {1}
+
+
+def test_supabase_sink_requires_the_service_role_key(monkeypatch):
+    monkeypatch.setattr(_persist, "PERSIST_URL", "https://project.supabase.co")
+    monkeypatch.setattr(_persist, "PERSIST_KEY", "")
+    assert _persist.build_post_sink("supabase") is None
+
+    monkeypatch.setattr(_persist, "PERSIST_KEY", "service-role-key")
+    sink = _persist.build_post_sink("supabase")
+    assert isinstance(sink, PostgrestSink)
+    assert sink.session.headers["Authorization"] == "Bearer service-role-key"
+
+
+def test_sqlite_sink_writes_posts_and_leaves_other_rows_alone(tmp_path):
+    sink = _persist.SqliteSink(str(tmp_path / "posts.sqlite3"), backoff_s=0)
+    with sink._db:
+        sink._db.execute("INSERT INTO posts (id, slug, processed) VALUES (1, 'older-post', 0)")
+
+    sink.persist([(movie, _posts(movie)) for movie in MOVIES])
+    result = sink.persist([(movie, _posts(movie)) for movie in MOVIES])
+
+    assert result["posts"] == 6
+    rows = dict(sink._db.execute("SELECT slug, processed FROM posts").fetchall())
+    assert len(rows) == 7
+    assert rows["older-post"] == 0
@@ -0,0 +1,58 @@
+import pytest
+
+from research import POST_FIELDS, parse_fields_option, shape_posts
+
+POSTS = [
+    {
+        "topic": "Dune sequel",
+        "title": "Dune: Part Three Is Happening",
+        "draft": "draft",
+        "final": "final",
+        "sources": ["https://example.com/a"],
+        "seo_title": "Dune 3",
+        "seo_description": "All about Dune 3",
+    }
+]
+
+
+def test_shape_posts_without_fields_returns_posts_unchanged():
+    assert shape_posts(POSTS) is POSTS
+    assert shape_posts(POSTS, []) is POSTS
+
+
+def test_shape_posts_keeps_requested_fields_in_order():
+    shaped = shape_posts(POSTS, ["title", "seo_title"])
+
+    assert shaped == [{"title": "Dune: Part Three Is Happening", "seo_title": "Dune 3"}]
+    assert list(shaped[0]) == ["title", "seo_title"]
+
+
+def test_shape_posts_skips_fields_a_post_lacks():
+    assert shape_posts([{"title": "t"}], ["title", "sources"]) == [{"title": "t"}]
+
+
+def test_parse_fields_option_absent():
+    assert parse_fields_option(None) == (None, None)
+
+
+@pytest.mark.parametrize(
+    "option", [["title", "final"], "title,final", " title , final ,"]
+)
+def test_parse_fields_option_accepts_list_or_comma_string(option):
+    assert parse_fields_option(option) == (["title", "final"], None)
+
+
+@pytest.mark.parametrize("option", [42, {"title": True}, ["title", 3]])
+def test_parse_fields_option_rejects_other_types(option):
+    fields, error = parse_fields_option(option)
+
+    assert fields is None
+    assert error == "fields must be a list of post field names"
+
+
+def test_parse_fields_option_names_unknown_fields():
+    fields, error = parse_fields_option(["title", "body", "slug"])
+
+    assert fields is None
+    assert "body, slug" in error
+    assert all(name in error for name in POST_FIELDS)
@@ -0,0 +1,135 @@
+import pytest
+
+import research
+from research import prepare_reentry_state
+
+RESEARCH_ITEM = {"title": "Dune 3", "details": "Filming starts", "url": "https://example.com/a"}
+FINAL = {"title": "Dune 3 Is Filming", "content": "Body"}
+POST = {"topic": "Dune 3", "title": "Dune 3 Is Filming", "final": "Body", "sources": []}
+
+
+def test_select_topics_keeps_research_and_fills_missing_urls():
+    item = {"title": "Dune 3", "details": "Filming starts"}
+
+    state, error = prepare_reentry_state(
+        "select_topics", {"topic": "Dune", "research_context": [item]}
+    )
+
+    assert error is None
+    assert state["research_context"] == [{"url": "", **item}]
+    assert "url" not in item
+
+
+def test_draft_derives_selected_topics():
+    state, error = prepare_reentry_state("draft", {"selected_research": [RESEARCH_ITEM]})
+
+    assert error is None
+    assert state["topic"] == ""
+    assert state["selected_topics"] == ["Dune 3 - Filming starts"]
+
+
+def test_draft_drops_fields_the_draft_node_and_later_nodes_produce():
+    state, error = prepare_reentry_state(
+        "draft",
+        {
+            "selected_research": [RESEARCH_ITEM],
+            "drafts": ["supplied draft"],
+            "sources": [["https://example.com/b"]],
+            "shared_context": "findings",
+            "finals": [FINAL],
+            "edit_fast_path": "title",
+        },
+    )
+
+    assert error is None
+    assert set(state) == {"topic", "selected_research", "selected_topics"}
+
+
+def test_draft_node_writes_drafts_for_supplied_ones(fake_backend, run):
+    state, _ = prepare_reentry_state(
+        "draft", {"selected_research": [RESEARCH_ITEM], "drafts": ["supplied draft"]}
+    )
+
+    result = research.draft_node(state)
+
+    assert result["drafts"] != ["supplied draft"]
+    assert len(result["drafts"]) == 1
+
+
+def test_edit_fills_empty_source_lists():
+    state, error = prepare_reentry_state(
+        "edit", {"selected_topics": ["a", "b"], "drafts": ["x", "y"]}
+    )
+
+    assert error is None
+    assert state["sources"] == [[], []]
+
+
+@pytest.mark.parametrize(
+    "start_node, state, message",
+    [
+        ("bogus", {}, "start_node must be one of"),
+        ("draft", [], "state must be an object"),
+        ("draft", {"topic": 3, "selected_research": [RESEARCH_ITEM]}, "state.topic must be a string"),
+        ("draft", {"selected_research": []}, "requires a non-empty state.selected_research list"),
+        (
+            "draft",
+            {"selected_research": [RESEARCH_ITEM, "Dune 3"]},
+            "state.selected_research[1] must be an object with string title and details",
+        ),
+        (
+            "select_topics",
+            {"research_context": [{"title": "Dune 3", "details": None}]},
+            "state.research_context[0] must be an object with string title and details",
+        ),
+        (
+            "select_topics",
+            {"research_context": [{**RESEARCH_ITEM, "url": 7}]},
+            "state.research_context[0] must have a string url",
+        ),
+        (
+            "select_topics",
+            {"research_context": [RESEARCH_ITEM], "raw_topics": "Dune 3"},
+            "state.raw_topics must be a list",
+        ),
+        ("edit", {"selected_topics": ["a"], "drafts": [{"text": "x"}]}, "state.drafts[0] must be a string"),
+        (
+            "edit",
+            {"selected_topics": ["a"], "drafts": ["x"], "sources": ["https://example.com/a"]},
+            "state.sources[0] must be a list of URL strings",
+        ),
+        ("edit", {"selected_topics": ["a", "b"], "drafts": ["x"]}, "must have equal lengths"),
+        (
+            "edit",
+            {"selected_topics": ["a"], "drafts": ["x"], "sources": [[], []]},
+            "state.sources must have one list per draft",
+        ),
+        (
+            "post",
+            {"selected_topics": ["a"], "drafts": ["x"], "finals": [{"title": "t"}]},
+            "state.finals[0] must be an object with string title and content",
+        ),
+        ("seo_generator", {"posts": [["t"]]}, "state.posts[0] must be an object with string title and final"),
+        (
+            "edit",
+            {"selected_topics": ["a"], "drafts": ["x"], "shared_context": ["x"]},
+            "state.shared_context must be a string",
+        ),
+    ],
+)
+def test_invalid_state_is_rejected_with_a_specific_message(start_node, state, message):
+    initial_state, error = prepare_reentry_state(start_node, state)
+
+    assert initial_state is None
+    assert message in error
+
+
+def test_valid_post_and_seo_states():
+    _, error = prepare_reentry_state(
+        "post", {"selected_topics": ["a"], "drafts": ["x"], "finals": [FINAL]}
+    )
+    assert error is None
+
+    state, error = prepare_reentry_state("seo_generator", {"posts": [POST]})
+    assert error is None
+    assert state["posts"] == [POST]
@@ -0,0 +1,187 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import research
+from research import SemanticResearchCache
+
+
+def _context(prefix, count=research.RESEARCH_TOPICS_PER_MOVIE):
+    return [
+        {"title": f"{prefix} {i}", "details": f"details {i}", "url": f"https://example.com/{prefix}/{i}"}
+        for i in range(count)
+    ]
+
+
+def _cached(topic="Dune"):
+    context = _context("old")
+    return {
+        "topic": topic,
+        "raw_topics": [f"{item['title']} - {item['details']}" for item in context],
+        "research_context": context,
+    }
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = SemanticResearchCache(dims=64, max_entries=4, ttl=60)
+    monkeypatch.setattr(research, "research_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def llm_output(monkeypatch):
+    """Make llm_call answer with the fixture's output_text"""
+    reply = SimpleNamespace(output_text="[]")
+    monkeypatch.setattr(
+        research, "llm_call", lambda node, api, **kwargs: SimpleNamespace(output_text=reply.output_text)
+    )
+    return reply
+
+
+def test_lookup_on_empty_cache_misses():
+    assert SemanticResearchCache(dims=64).lookup("Dune") == (None, 0.0)
+
+
+def test_release_qualifiers_do_not_change_the_match(cache):
+    cache.store("Dune", ["a"], _context("dune"))
+
+    entry, score = cache.lookup("Dune (Re-release)")
+
+    assert entry["topic"] == "Dune"
+    assert score == pytest.approx(1.0)
+
+
+def test_lookup_returns_the_most_similar_entry(cache):
+    cache.store("Dune", ["a"], _context("dune"))
+    cache.store("Alien", ["b"], _context("alien"))
+
+    entry, score = cache.lookup("Dune: Part Two")
+
+    assert entry["topic"] == "Dune"
+    assert research.RESEARCH_CACHE_DELTA <= score < 1.0
+
+
+def test_storing_the_same_topic_replaces_its_entry(cache):
+    cache.store("Dune", ["a"], _context("first"))
+    cache.store("dune", ["b"], _context("second"))
+
+    assert len(cache) == 1
+    assert cache.lookup("Dune")[0]["raw_topics"] == ["b"]
+
+
+def test_expired_entries_are_skipped(cache, monkeypatch):
+    cache.store("Dune", ["a"], _context("dune"))
+    now = research.time.time()
+    monkeypatch.setattr(research.time, "time", lambda: now + cache.ttl + 1)
+
+    assert cache.lookup("Dune") == (None, 0.0)
+
+
+def test_full_cache_overwrites_the_oldest_row(cache):
+    for topic in ("Dune", "Alien", "Heat", "Jaws", "Rocky"):
+        cache.store(topic, [topic], _context(topic))
+
+    assert len(cache) == cache.max_entries
+    assert cache.lookup("Dune")[0]["topic"] != "Dune"
+    assert cache.lookup("Rocky")[0]["topic"] == "Rocky"
+
+
+def test_research_cache_lookup_classifies_by_similarity(cache):
+    cache.store("Dune", ["a"], _context("dune"))
+
+    assert research.research_cache_lookup("Dune")[0] == "hit"
+    assert research.research_cache_lookup("Dune: Part Two")[0] == "delta"
+    assert research.research_cache_lookup("Casablanca")[0] == "miss"
+
+
+@pytest.mark.parametrize(
+    "cached, topic",
+    [("Toy Story", "Toy Story 4"), ("Spider-Man", "Spider-Man 2"), ("Rocky III", "Rocky IV")],
+)
+def test_sequels_are_not_reused(cache, cached, topic):
+    cache.store(cached, ["a"], _context("cached"))
+    assert cache.lookup(topic)[1] >= research.RESEARCH_CACHE_DELTA
+
+    assert research.research_cache_lookup(topic)[0] == "miss"
+    assert research.research_cache_lookup(cached)[0] == "hit"
+
+
+def test_subtitles_are_at_most_a_delta(cache, monkeypatch):
+    monkeypatch.setattr(research, "RESEARCH_CACHE_REUSE", 0.5)
+    cache.store("Dune", ["a"], _context("dune"))
+
+    assert research.research_cache_lookup("Dune: Part Two")[0] == "delta"
+    assert research.research_cache_lookup("The Dune (IMAX)")[0] == "hit"
+
+
+def test_research_delta_keeps_cached_items_and_adds_new_ones(cache, llm_output):
+    count = research.RESEARCH_DELTA_COUNT
+    llm_output.output_text = json.dumps(
+        [{"title": f"new {i}", "details": "d", "source": f"https://example.com/new/{i}"} for i in range(count + 1)]
+    )
+
+    result = research._research_delta("Dune: Part Two", _cached())
+
+    titles = [item["title"] for item in result["research_context"]]
+    keep = research.RESEARCH_TOPICS_PER_MOVIE - count
+    assert titles == [f"old {i}" for i in range(keep)] + [f"new {i}" for i in range(count)]
+    assert len(result["raw_topics"]) == research.RESEARCH_TOPICS_PER_MOVIE
+    assert cache.lookup("Dune: Part Two")[0]["topic"] == "Dune: Part Two"
+
+
+@pytest.mark.parametrize(
+    "output_text",
+    [
+        "not json at all",
+        json.dumps({"title": "new", "details": "d", "source": ""}),
+        json.dumps([{"title": "only one", "details": "d", "source": ""}]),
+        json.dumps([{"title": "new", "details": "d", "source": 5}] * 2),
+    ],
+    ids=["invalid", "object", "short", "bad-source"],
+)
+def test_research_delta_returns_none_on_unusable_responses(cache, llm_output, output_text):
+    llm_output.output_text = output_text
+
+    assert research._research_delta("Dune: Part Two", _cached()) is None
+    assert len(cache) == 0
+
+
+def test_research_node_falls_back_to_full_research_when_delta_fails(cache, monkeypatch, run):
+    cached = _cached()
+    cache.store("Dune", cached["raw_topics"], cached["research_context"])
+    full = [{"title": f"full {i}", "details": "d", "source": ""} for i in range(5)]
+    responses = iter([json.dumps({"unexpected": "object"}), json.dumps(full)])
+    monkeypatch.setattr(research, "openai_client", research.openai_client or object())
+    monkeypatch.setattr(
+        research, "llm_call", lambda node, api, **kwargs: SimpleNamespace(output_text=next(responses))
+    )
+
+    result = research.research_node({"topic": "Dune: Part Two"})
+
+    assert [item["title"] for item in result["research_context"]] == [f"full {i}" for i in range(5)]
+
+
+def test_research_many_leaves_cached_topics_out_of_grouped_calls(cache, monkeypatch, run):
+    cached = _cached()
+    cache.store("Dune", cached["raw_topics"], cached["research_context"])
+    entries = [{"title": f"new {i}", "details": "d", "source": ""} for i in range(5)]
+    prompts = []
+
+    def llm_call(node, api, **kwargs):
+        prompts.append(kwargs["input"])
+        # The grouped call only answers for Alien, leaving Heat incomplete
+        output = {"Alien": entries} if "Alien" in kwargs["input"] else entries
+        return SimpleNamespace(output_text=json.dumps(output))
+
+    monkeypatch.setattr(research, "openai_client", research.openai_client or object())
+    monkeypatch.setattr(research, "llm_call", llm_call)
+
+    results = research.research_many(["Dune", "Alien", "Heat"], group_size=2)
+
+    assert results["Dune"]["research_context"] == cached["research_context"]
+    assert len(results["Heat"]["research_context"]) == 5
+    assert len(prompts) == 2  # one grouped call, then Heat on its own
+    assert not any("Dune" in prompt for prompt in prompts)
+    assert "research.regrouped" not in run.counters
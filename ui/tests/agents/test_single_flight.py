@@ -0,0 +1,115 @@
+import json
+import threading
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import research
+
+
+def test_leader_runs_and_later_callers_get_the_cached_result():
+    flights = research.SingleFlight(ttl=60)
+    calls = []
+
+    def work():
+        calls.append(1)
+        return "result"
+
+    assert flights.run("key", work) == ("result", "leader")
+    assert flights.run("key", work) == ("result", "cached")
+    assert flights.run("other", work) == ("result", "leader")
+    assert len(calls) == 2
+
+
+def test_concurrent_callers_join_the_in_flight_run():
+    flights = research.SingleFlight(ttl=0)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    outcomes = []
+    leader = threading.Thread(target=lambda: outcomes.append(flights.run("key", work)))
+    leader.start()
+    started.wait(5)
+    followers = [
+        threading.Thread(target=lambda: outcomes.append(flights.run("key", work)))
+        for _ in range(3)
+    ]
+    for thread in followers:
+        thread.start()
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(how for _, how in outcomes) == ["joined", "joined", "joined", "leader"]
+
+
+def test_errors_reach_the_caller_and_are_not_cached():
+    flights = research.SingleFlight(ttl=60)
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        flights.run("key", fail)
+    assert flights.run("key", lambda: "ok") == ("ok", "leader")
+
+
+def test_cache_is_bounded_and_disabled_by_zero_ttl():
+    flights = research.SingleFlight(ttl=60, max_entries=2)
+    for key in ("a", "b", "c"):
+        flights.run(key, lambda: key)
+    assert flights.run("a", lambda: "again")[1] == "leader"
+
+    uncached = research.SingleFlight(ttl=0)
+    uncached.run("a", lambda: 1)
+    assert uncached.run("a", lambda: 2) == (2, "leader")
+
+
+def test_flight_key_normalises_topic_spacing_and_case():
+    key = research.flight_key({"topic": "  The   Matrix "})
+    assert key == research.flight_key({"topic": "the matrix"})
+    assert key != research.flight_key({"topic": "the matrix", "speculative": True})
+    assert key != research.flight_key({"topic": "the matrix"}, idempotency_key="retry-1")
+
+
+@pytest.fixture
+def agent_url(fake_backend, monkeypatch):
+    monkeypatch.setenv("MY_DAILY_API_KEY", "test-key")
+    monkeypatch.setattr(research, "pipeline_flights", research.SingleFlight(ttl=60))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), research.handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+
+
+def post(url, body):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(body).encode(),
+        headers={"X-API-KEY": "test-key", "Content-Type": "application/json"},
+    )
+    return json.loads(urllib.request.urlopen(request).read())
+
+
+def test_cached_response_carries_no_metrics_of_the_reused_run(agent_url):
+    body = {"topic": "Dune", "include_metrics": True}
+    first = post(agent_url, body)
+    second = post(agent_url, body)
+
+    assert "coalesced" not in first
+    assert first["metrics"]["llm_calls"] > 0
+    assert second["coalesced"] == "cached"
+    assert second["metrics"] == {
+        "coalesced": "cached",
+        "source_run_id": first["metrics"]["run_id"],
+    }
+    assert second["posts"] == first["posts"]
@@ -0,0 +1,108 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import research
+
+
+class RedirectingHandler(BaseHTTPRequestHandler):
+    """/ok answers 200, /gone 410, /to?<url> redirects to <url>; records Host headers"""
+
+    hosts = []
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self):
+        self.hosts.append(self.headers["Host"])
+        path, _, target = self.path.partition("?")
+        status = {"/ok": 200, "/gone": 410, "/to": 302}.get(path, 404)
+        self.send_response(status)
+        if status == 302:
+            self.send_header("Location", target)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_HEAD = do_GET = _respond
+
+
+@pytest.fixture
+def site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RedirectingHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+def only_ip_literal_is_public(monkeypatch):
+    # Stand-in for DNS: the stub's IP literal counts as public, "localhost" does not
+    monkeypatch.setattr(
+        research, "_public_address", lambda host, timeout: host if host == "127.0.0.1" else None
+    )
+
+
+def test_non_public_hosts_are_dropped_without_a_request(site):
+    validator = research.SourceValidator()
+    port = site.split(":")[1]
+
+    verdicts = validator.validate([f"http://{site}/ok", f"http://localhost:{port}/ok"])
+
+    assert set(verdicts.values()) == {"dead"}
+
+
+def test_every_redirect_hop_is_checked(site, only_ip_literal_is_public):
+    validator = research.SourceValidator()
+    port = site.split(":")[1]
+
+    verdicts = validator.validate(
+        [
+            f"http://{site}/ok",
+            f"http://{site}/to?http://{site}/ok",
+            f"http://{site}/to?http://localhost:{port}/ok",
+            f"http://{site}/to?/gone",
+        ]
+    )
+
+    assert list(verdicts.values()) == ["ok", "ok", "dead", "dead"]
+
+
+def test_redirect_loops_are_inconclusive(site, only_ip_literal_is_public):
+    loop = f"http://{site}/to?/to?/to?/to?/to?/to?/to?/ok"
+    assert research.SourceValidator().check(loop) == "unknown"
+
+
+def test_malformed_urls_are_dead():
+    assert research.SourceValidator().check("http://example.com:99999999/x") == "dead"
+    assert research.SourceValidator().check("ftp://example.com/file") == "dead"
+
+
+def test_host_limits_only_track_hosts_in_flight(site, only_ip_literal_is_public):
+    validator = research.SourceValidator()
+    validator.validate([f"http://{site}/ok?{n}" for n in range(20)])
+
+    assert validator._host_limits == {}
+
+
+def test_requests_go_to_the_vetted_address(site, monkeypatch):
+    # movies.invalid never resolves; it only reaches the stub through the pinned address
+    monkeypatch.setattr(research, "_public_address", lambda host, timeout: "127.0.0.1")
+    monkeypatch.setattr(RedirectingHandler, "hosts", [])
+    host = f"movies.invalid:{site.split(':')[1]}"
+
+    assert research.SourceValidator().check(f"http://{host}/ok") == "ok"
+    assert RedirectingHandler.hosts == [host]
+
+
+def test_slow_dns_is_inconclusive(monkeypatch):
+    monkeypatch.setattr(research.socket, "getaddrinfo", lambda *args: time.sleep(0.5) or [])
+    validator = research.SourceValidator(timeout=(0.05, 1))
+
+    started = time.perf_counter()
+    assert validator.check("http://slow.example.com/x") == "unknown"
+    assert time.perf_counter() - started < 0.4
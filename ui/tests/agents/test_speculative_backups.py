@@ -0,0 +1,30 @@
+import pytest
+
+import research
+from research import _backup_key, _store_speculative_backup, pop_speculative_backup
+
+ITEM = {"title": "Casting news", "details": "d"}
+
+
+@pytest.fixture(autouse=True)
+def backups(monkeypatch):
+    monkeypatch.setattr(research, "_speculative_backups", research.OrderedDict())
+
+
+def test_backup_is_only_reused_with_the_same_search_mode():
+    _store_speculative_backup(_backup_key("Dune", ITEM, "none"), ("draft", []))
+
+    assert pop_speculative_backup("Dune", ITEM, "per_article") is None
+    assert pop_speculative_backup(" dune ", ITEM, "none") == ("draft", [])
+    assert pop_speculative_backup("Dune", ITEM, "none") is None
+
+
+def test_expired_backups_are_dropped(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(research.time, "time", lambda: now[0])
+    _store_speculative_backup(_backup_key("Dune", ITEM, "none"), ("draft", []))
+
+    now[0] += research.SPECULATIVE_BACKUP_TTL_S + 1
+
+    assert pop_speculative_backup("Dune", ITEM, "none") is None
+    assert not research._speculative_backups
@@ -0,0 +1,60 @@
+from research import count_tokens, fit_to_token_budget
+
+ARTICLE = "\n\n".join(
+    [
+        "Lead paragraph about the sequel. It sets up the whole story.",
+        "## What Happened",
+        "The studio confirmed the sequel today. Filming starts in spring with the original cast returning.",
+        "## Why It Matters",
+        "Fans waited a decade for this. The first film still tops streaming charts every weekend.",
+        "## What's Next",
+        "A teaser is expected this summer. Release is pencilled in for next year.",
+    ]
+)
+
+
+def test_text_within_budget_is_untouched():
+    assert fit_to_token_budget(ARTICLE, count_tokens(ARTICLE)) == (ARTICLE, 0)
+
+
+def test_non_positive_budget_disables_trimming():
+    assert fit_to_token_budget(ARTICLE, 0) == (ARTICLE, 0)
+
+
+def test_trimmed_text_fits_and_reports_savings():
+    budget = count_tokens(ARTICLE) // 2
+    trimmed, saved = fit_to_token_budget(ARTICLE, budget)
+
+    assert count_tokens(trimmed) <= budget
+    assert saved == count_tokens(ARTICLE) - count_tokens(trimmed)
+    assert saved > 0
+
+
+def test_headings_and_lead_survive_trimming():
+    trimmed, _ = fit_to_token_budget(ARTICLE, count_tokens(ARTICLE) // 2)
+
+    assert trimmed.startswith("Lead paragraph about the sequel.")
+    for heading in ("## What Happened", "## Why It Matters", "## What's Next"):
+        assert heading in trimmed
+
+
+def test_paragraph_that_does_not_fit_keeps_its_first_sentence():
+    skeleton = "\n\n".join(
+        block for block in ARTICLE.split("\n\n") if block.startswith(("Lead", "##"))
+    )
+    # Room for the skeleton plus the first sentences, not the full paragraphs
+    budget = count_tokens(skeleton) + count_tokens(
+        "The studio confirmed the sequel today. Fans waited a decade for this."
+    ) + 6
+    trimmed, _ = fit_to_token_budget(ARTICLE, budget)
+
+    assert "The studio confirmed the sequel today." in trimmed
+    assert "original cast returning" not in trimmed
+
+
+def test_oversized_lead_is_truncated_to_budget():
+    text = " ".join(["word"] * 400) + "\n\n## Heading\n\nTail paragraph."
+    trimmed, _ = fit_to_token_budget(text, 50)
+
+    assert count_tokens(trimmed) <= 50
+    assert "## Heading" in trimmed
@@ -0,0 +1,142 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import research
+from research import SemanticResearchCache, WatermarkStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = WatermarkStore(str(tmp_path / "watermarks.sqlite3"))
+    monkeypatch.setattr(research, "research_watermarks", store)
+    return store
+
+
+def _context(prefix, count=research.RESEARCH_TOPICS_PER_MOVIE):
+    return [
+        {"title": f"{prefix} {i}", "details": "d", "url": f"https://example.com/{prefix}/{i}"}
+        for i in range(count)
+    ]
+
+
+def _entries(context):
+    return [{"title": item["title"], "details": item["details"], "source": item["url"]} for item in context]
+
+
+def test_unknown_topic_has_no_watermark(store):
+    assert store.get("Dune") is None
+
+
+def test_record_normalizes_and_deduplicates_urls(store):
+    store.record("Dune", ["https://Example.com/a/", "", "https://example.com/a"], researched_at=100)
+    store.record("dune", ["https://example.com/b", "https://example.com/a"], researched_at=200)
+
+    watermark = store.get("DUNE")
+    assert watermark["researched_at"] == 200
+    assert watermark["seen_urls"] == [
+        research.normalize_url("https://example.com/a"),
+        research.normalize_url("https://example.com/b"),
+    ]
+
+
+def test_watermark_never_moves_backwards(store):
+    store.record("Dune", [], researched_at=200)
+    store.record("Dune", ["https://example.com/a"], researched_at=100)
+
+    assert store.get("Dune")["researched_at"] == 200
+    assert len(store.get("Dune")["seen_urls"]) == 1
+
+
+def test_seen_urls_keep_the_most_recent(store, monkeypatch):
+    monkeypatch.setattr(research, "WATERMARK_MAX_URLS", 3)
+
+    store.record("Dune", [f"https://example.com/{i}" for i in range(5)])
+
+    assert store.get("Dune")["seen_urls"] == [
+        research.normalize_url(f"https://example.com/{i}") for i in (2, 3, 4)
+    ]
+
+
+def test_record_watermark_skips_urls_that_cannot_be_normalized(store, monkeypatch):
+    def normalize_url(url):
+        if "bad" in url:
+            raise ValueError("invalid URL")
+        return url
+
+    monkeypatch.setattr(research, "normalize_url", normalize_url)
+
+    research.record_watermark("Dune", [{"url": "https://bad"}, {"url": "https://example.com/a"}])
+
+    assert store.get("Dune")["seen_urls"] == ["https://example.com/a"]
+
+
+def test_record_watermark_swallows_store_errors(store, monkeypatch):
+    def fail(*args):
+        raise ValueError("boom")
+
+    monkeypatch.setattr(store, "record", fail)
+
+    research.record_watermark("Dune", _context("dune"))
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """llm_call answering with the JSON in llm.output"""
+    reply = SimpleNamespace(output=[])
+    monkeypatch.setattr(research, "openai_client", research.openai_client or object())
+    monkeypatch.setattr(
+        research, "llm_call", lambda node, api, **kwargs: SimpleNamespace(output_text=json.dumps(reply.output))
+    )
+    return reply
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = SemanticResearchCache(dims=64, ttl=60)
+    monkeypatch.setattr(research, "research_cache", cache)
+    return cache
+
+
+def test_cache_reuse_records_the_cached_research_time(store, cache, llm, run):
+    context = _context("dune")
+    cache.store("Dune", [item["title"] for item in context], context)
+    stored_at = cache.lookup("Dune")[0]["researched_at"]
+
+    research.research_node({"topic": "Dune"})
+
+    watermark = store.get("Dune")
+    assert watermark["researched_at"] == stored_at
+    assert len(watermark["seen_urls"]) == len(context)
+
+
+def test_delta_research_records_a_watermark(store, cache, llm, run):
+    context = _context("dune")
+    cache.store("Dune", [item["title"] for item in context], context)
+    llm.output = _entries(_context("new", research.RESEARCH_DELTA_COUNT))
+
+    research.research_node({"topic": "Dune: Part Two"})
+
+    seen = store.get("Dune: Part Two")["seen_urls"]
+    assert research.normalize_url("https://example.com/new/0") in seen
+
+
+def test_grouped_research_records_a_watermark_per_movie(store, llm, run):
+    llm.output = {"Dune": _entries(_context("dune")), "Alien": _entries(_context("alien"))}
+
+    results = research.research_many(["Dune", "Alien"], group_size=2)
+
+    assert set(results) == {"Dune", "Alien"}
+    assert len(store.get("Dune")["seen_urls"]) == research.RESEARCH_TOPICS_PER_MOVIE
+    assert len(store.get("Alien")["seen_urls"]) == research.RESEARCH_TOPICS_PER_MOVIE
+
+
+def test_incremental_research_drops_seen_urls(store, llm, run):
+    store.record("Dune", ["https://example.com/dune/0"], researched_at=100)
+    llm.output = _entries(_context("dune", 2))
+
+    result = research.research_node({"topic": "Dune", "incremental": True})
+
+    assert [item["title"] for item in result["research_context"]] == ["dune 1"]
+    assert store.get("Dune")["researched_at"] > 100